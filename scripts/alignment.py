@@ -0,0 +1,65 @@
+"""
+달력 정렬: 거래일이 다른 자산(ETF 평일, 암호화폐 매일)을 하나의 날짜 축에 맞춤
+- 축: 모든 자산 날짜의 합집합(union) 또는 그중 평일만(business)
+- 자산마다 축의 각 날짜 이하 마지막 bar를 이어 씀 (forward-fill), 첫 bar 이전 칸은 NaN
+- (자산 번호, 날짜) 복합 키 위에서 searchsorted 한 번으로 날짜 × 자산 밀집 행렬을 채움
+  → 상관관계, 차트, API가 같은 축과 같은 채움 규칙을 씀
+"""
+
+import numpy as np
+
+from returns import composite_keys, concat_columns
+
+CALENDARS = ("union", "business")
+DEFAULT_CALENDAR = "union"
+
+
+def weekdays(days):
+    """1970-01-01 기준 일수 → 요일 (월=0 … 일=6, 1970-01-01은 목요일)"""
+    return (np.asarray(days, dtype=np.int64) + 3) % 7
+
+
+def calendar_axis(days, calendar=DEFAULT_CALENDAR):
+    """정렬된 날짜 합집합 → 달력 축
+
+    business면 주말을 뺀다. 주말 bar(암호화폐)는 축에 없고 다음 평일 값에 이어서 반영된다.
+    """
+    axis = np.asarray(days, dtype=np.int64)
+    if calendar == "business":
+        return axis[weekdays(axis) < 5]
+    if calendar != "union":
+        raise ValueError(f"알 수 없는 달력: {calendar} ({', '.join(CALENDARS)})")
+    return axis
+
+
+class AlignedPrices:
+    """공유 날짜 축에 맞춘 가격 행렬 (날짜 × 자산)을 행 블록 단위로 만들어 주는 뷰
+
+    axis를 주지 않으면 자산 날짜의 합집합으로 calendar 축을 만든다.
+    """
+
+    def __init__(self, columns, symbols, calendar=DEFAULT_CALENDAR, axis=None):
+        lengths, ends, all_days, all_close = concat_columns(columns, symbols)
+        self.symbols = symbols
+        self.axis = calendar_axis(np.unique(all_days), calendar) if axis is None else np.asarray(axis, dtype=np.int64)
+        self.close = all_close
+        self.ends = ends
+        self._keys = composite_keys(np.repeat(np.arange(len(symbols)), lengths), all_days)
+        self._first = ends - lengths
+        self._assets = np.arange(len(symbols))
+
+    def positions(self, rows):
+        """축 위치 rows마다 그날 이하 마지막 bar의 전체 배열 위치 (행 × 자산) — 그날까지 bar가 없으면 -1"""
+        queries = composite_keys(self._assets[None, :], self.axis[np.asarray(rows)][:, None])
+        positions = np.searchsorted(self._keys, queries, side="right") - 1
+        return np.where(positions >= self._first[None, :], positions, -1)
+
+    def starts(self, start_days):
+        """자산 × 시작일마다 그날 이후 첫 bar의 전체 배열 위치 — 없으면 그 자산의 끝 위치"""
+        queries = composite_keys(self._assets[:, None], np.asarray(start_days, dtype=np.int64)[None, :])
+        return np.searchsorted(self._keys, queries, side="left")
+
+    def prices(self, rows):
+        """축 위치 rows의 가격 (행 × 자산) — 그날까지 bar가 없으면 NaN"""
+        positions = self.positions(rows)
+        return np.where(positions >= 0, self.close[np.maximum(positions, 0)], np.nan)
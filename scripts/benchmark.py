@@ -0,0 +1,461 @@
+#!/usr/bin/env python3
+"""
+데이터/렌더링 핫 패스 벤치마크
+- 합성 가격 생성기로 만든 데이터로 재현 가능하게 측정 (시드 고정, 네트워크 없음)
+- 케이스: calculate_performance, 위험 지표(risk_table), 상관관계 전체 계산(correlation),
+  임의 기간 질의 1,000개 × 전체 자산(range_query),
+  장중 링 버퍼(정규장 1분봉 390개 + 1분씩 30번 증분 + 1d.json/delta.json 저장), 암호화폐 날짜 중복 제거, performance.json 쓰기, generate_html 전체(압축 제외),
+  페이지 + performance.json 미리 압축(precompress)
+- import_time: 실행 모드별 모듈 import 시간 (크기와 무관, 아무것도 불러오지 않은 새 인터프리터에서 잼)
+- 크기: 지금 규모(10개 × 400일)부터 5,000개 × 20년까지
+- 케이스마다 별도 프로세스에서 실행해서 최대 RSS가 서로 섞이지 않음
+- 결과(시간, 최대 메모리, 출력 바이트)를 JSON 기준선으로 저장하고 다음 실행과 비교
+
+사용법:
+  python scripts/benchmark.py                     # 기본 크기 측정
+  python scripts/benchmark.py --sizes all --save  # 모든 크기 측정 후 기준선 저장
+  python scripts/benchmark.py --compare           # 기준선과 비교, 느려지면 종료 코드 1
+"""
+
+import argparse
+import io
+import json
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import ExitStack, redirect_stdout
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+import numpy as np
+
+from serializer import BACKEND
+
+BASELINE_PATH = Path(__file__).parent.parent / "benchmarks" / "baseline.json"
+
+# 이름: (자산 수, 자산당 일수)
+SIZES = {
+    "current": (10, 400),
+    "medium": (500, 5 * 252),
+    "large": (5000, 20 * 252),
+}
+DEFAULT_SIZES = ["current", "medium"]
+
+CASES = ["calculate_performance", "risk_table", "correlation", "range_query", "intraday", "crypto_dedup", "write_output",
+         "generate_html", "precompress"]
+
+# 모드별로 시작할 때 불러오는 코드
+IMPORT_CASE = "import_time"
+IMPORT_MODES = {
+    "render": "import generate_html",
+    "recompute": "import fetch_data",
+    "pipeline": "import pipeline",
+    "fetch_crypto": "import fetch_data, http_client; http_client.get_session()",
+    "fetch_etf": "import fetch_data; fetch_data.load_yfinance()",
+}
+
+IMPORT_PROBE = """
+import json, sys, time
+t0 = time.perf_counter()
+exec(sys.argv[1])
+seconds = time.perf_counter() - t0
+from streaming import peak_rss_mb
+print(json.dumps({"seconds": round(seconds, 4), "peak_rss_mb": round(peak_rss_mb(), 1), "output_bytes": None}))
+"""
+
+SEED = 20240101
+
+# 기준선보다 이 비율 이상 나빠지면 회귀로 봄
+TOLERANCE = 0.25
+
+
+# ============================================
+# 합성 데이터
+# ============================================
+
+def synthetic_days(n_days, end=None):
+    """end(기본 오늘)까지의 영업일 n_days개 (datetime64[D])"""
+    end = np.datetime64(end or date.today(), "D")
+    calendar = end - np.arange(n_days * 7 // 5 + 7)[::-1]
+    return calendar[np.is_busday(calendar)][-n_days:]
+
+
+def synthetic_close(rng, n_days):
+    """기하 랜덤 워크 종가 (소수 2자리)"""
+    steps = rng.normal(0.0003, 0.012, n_days)
+    return np.maximum(np.round(100 * np.exp(np.cumsum(steps)), 2), 0.01)
+
+
+def synthetic_prices(rng, days):
+    """performance.json과 같은 [{"date", "price"}, ...]"""
+    close = synthetic_close(rng, len(days))
+    return [{"date": str(d), "price": float(p)} for d, p in zip(days, close)]
+
+
+def synthetic_market_chart(rng, n_days):
+    """CoinGecko market_chart 응답의 prices와 같은 [[timestamp(ms), price], ...]
+
+    매일 00:00 UTC 값 뒤에 현재 시각 값이 하나 더 붙어서 마지막 날짜가 겹친다.
+    """
+    start = datetime.combine(date.today() - timedelta(days=n_days - 1), datetime.min.time())
+    stamps = start.timestamp() * 1000 + np.arange(n_days) * 86_400_000
+    stamps = np.append(stamps, stamps[-1] + 3_600_000)
+    prices = 100 * np.exp(np.cumsum(rng.normal(0.0005, 0.03, n_days + 1)))
+    return [[float(t), float(p)] for t, p in zip(stamps, prices)]
+
+
+def synthetic_assets(n_assets, n_days, seed=SEED):
+    """(심볼, 자산) 항목을 하나씩 생성 (모든 자산을 메모리에 올리지 않음)"""
+    from fetch_data import calculate_performance
+    from returns import get_date_ranges
+
+    rng = np.random.default_rng(seed)
+    days = synthetic_days(n_days)
+    date_ranges = get_date_ranges()
+    for i in range(n_assets):
+        prices = synthetic_prices(rng, days)
+        yield f"A{i:04d}", {
+            "name": f"Asset {i}",
+            "color": f"#{rng.integers(0, 0xFFFFFF):06x}",
+            "prices": prices,
+            "performance": {
+                period: calculate_performance(prices, start)
+                for period, start in date_ranges.items()
+            },
+        }
+
+
+def write_synthetic_performance(path, n_assets, n_days, seed=SEED, store_dir=None):
+    """합성 performance.json (store_dir면 fetch_data처럼 같은 가격으로 가격 저장소도 씀)"""
+    from price_store import StoreWriter, prices_to_columns
+    from streaming import performance_stream
+
+    last_updated = "2024-01-01 00:00"
+    with ExitStack() as stack:
+        write = stack.enter_context(performance_stream(path, last_updated))
+        store = stack.enter_context(StoreWriter(store_dir, last_updated)) if store_dir else None
+        for symbol, asset in synthetic_assets(n_assets, n_days, seed):
+            write(symbol, asset)
+            if store:
+                store.add(symbol, *prices_to_columns(asset["prices"]))
+
+
+# ============================================
+# 케이스 (반환: (측정한 초, 출력 바이트 또는 None))
+# 입력 생성 시간은 빼고 핫 패스만 잰다
+# ============================================
+
+def bench_calculate_performance(n_assets, n_days, workdir):
+    from fetch_data import calculate_performance
+    from returns import get_date_ranges
+
+    rng = np.random.default_rng(SEED)
+    days = synthetic_days(n_days)
+    date_ranges = get_date_ranges()
+    elapsed = 0.0
+    for _ in range(n_assets):
+        prices = synthetic_prices(rng, days)
+        t0 = time.perf_counter()
+        for start in date_ranges.values():
+            calculate_performance(prices, start)
+        elapsed += time.perf_counter() - t0
+    return elapsed, None
+
+
+def bench_risk_table(n_assets, n_days, workdir):
+    from returns import get_date_ranges
+    from risk import risk_table
+
+    rng = np.random.default_rng(SEED)
+    days = synthetic_days(n_days)
+    columns = {f"S{i:05d}": (days, synthetic_close(rng, n_days)) for i in range(n_assets)}
+    t0 = time.perf_counter()
+    risk_table(columns, get_date_ranges())
+    return time.perf_counter() - t0, None
+
+
+def bench_correlation(n_assets, n_days, workdir):
+    from correlation import update_correlation
+    from returns import get_date_ranges
+
+    rng = np.random.default_rng(SEED)
+    days = synthetic_days(n_days)
+    columns = {f"S{i:05d}": (days, synthetic_close(rng, n_days)) for i in range(n_assets)}
+    output_path = Path(workdir) / "correlation.json"
+    t0 = time.perf_counter()
+    update_correlation(columns, get_date_ranges(), "2024-01-01 00:00", output_path=output_path,
+                       state_dir=Path(workdir) / "state")
+    return time.perf_counter() - t0, output_path.stat().st_size
+
+
+def bench_range_query(n_assets, n_days, workdir):
+    from price_store import days_to_dates
+    from range_query import RangeIndex
+
+    rng = np.random.default_rng(SEED)
+    days = synthetic_days(n_days).astype(np.int32)
+    columns = {f"S{i:05d}": (days, synthetic_close(rng, n_days)) for i in range(n_assets)}
+    index = RangeIndex.from_columns(columns, Path(workdir) / "range_index")
+    bounds = np.sort(rng.integers(0, len(days), (1000, 2)), axis=1)
+    starts, ends = days_to_dates(days[bounds[:, 0]]).tolist(), days_to_dates(days[bounds[:, 1]]).tolist()
+    t0 = time.perf_counter()
+    index.query(starts, ends)
+    return time.perf_counter() - t0, None
+
+
+def bench_intraday(n_assets, n_days, workdir):
+    from intraday import IntradayRing, publish, update_ring
+
+    rng = np.random.default_rng(SEED)
+    days = synthetic_days(n_days).astype(np.int32)
+    symbols = [f"S{i:05d}" for i in range(n_assets)]
+    registry = {symbol: {"type": "etf"} for symbol in symbols}
+    columns = {symbol: (days, synthetic_close(rng, n_days)) for symbol in symbols}
+    # 마지막 날 09:30 EST(14:30 UTC)부터 1분봉, 기준가는 그 전날 종가
+    times = int(days[-1]) * 86400 + 14 * 3600 + 30 * 60 + 60 * np.arange(420)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.001, (n_assets, 420)), axis=1))
+    batches = [{symbol: (times[:390], close[a, :390]) for a, symbol in enumerate(symbols)}]
+    batches += [
+        {symbol: (times[k - 1:k + 1], close[a, k - 1:k + 1]) for a, symbol in enumerate(symbols)}
+        for k in range(390, 420)
+    ]
+    ring = IntradayRing(symbols, "1m")
+    t0 = time.perf_counter()
+    for fetched in batches:
+        batch = update_ring(ring, fetched, registry, columns)
+    snapshot, _ = publish(ring, batch, registry, output_dir=Path(workdir) / "intraday", ring_dir=Path(workdir) / "ring")
+    return time.perf_counter() - t0, snapshot.stat().st_size
+
+
+def bench_crypto_dedup(n_assets, n_days, workdir):
+    from fetch_data import market_chart_to_prices
+
+    rng = np.random.default_rng(SEED)
+    elapsed = 0.0
+    for _ in range(n_assets):
+        points = synthetic_market_chart(rng, n_days)
+        t0 = time.perf_counter()
+        market_chart_to_prices(points)
+        elapsed += time.perf_counter() - t0
+    return elapsed, None
+
+
+def bench_write_output(n_assets, n_days, workdir):
+    from streaming import performance_stream
+
+    path = Path(workdir) / "performance.json"
+    elapsed = 0.0
+    t0 = time.perf_counter()
+    with performance_stream(path, "2024-01-01 00:00") as write:
+        elapsed += time.perf_counter() - t0
+        for symbol, asset in synthetic_assets(n_assets, n_days):
+            t0 = time.perf_counter()
+            write(symbol, asset)
+            elapsed += time.perf_counter() - t0
+        t0 = time.perf_counter()
+    elapsed += time.perf_counter() - t0
+    return elapsed, path.stat().st_size
+
+
+def bench_generate_html(n_assets, n_days, workdir):
+    from generate_html import generate_html
+
+    data_path = Path(workdir) / "performance.json"
+    output_path = Path(workdir) / "index.html"
+    store_dir = Path(workdir) / "store"
+    write_synthetic_performance(data_path, n_assets, n_days, store_dir=store_dir)
+    t0 = time.perf_counter()
+    generate_html(data_path=data_path, output_path=output_path, correlation_path=Path(workdir) / "correlation.json",
+                  compress=False, store_dir=store_dir)
+    elapsed = time.perf_counter() - t0
+    return elapsed, output_path.stat().st_size
+
+
+def bench_precompress(n_assets, n_days, workdir):
+    from generate_html import generate_html
+    from precompress import precompress_files
+
+    data_path = Path(workdir) / "performance.json"
+    output_path = Path(workdir) / "index.html"
+    store_dir = Path(workdir) / "store"
+    write_synthetic_performance(data_path, n_assets, n_days, store_dir=store_dir)
+    generate_html(data_path=data_path, output_path=output_path, correlation_path=Path(workdir) / "correlation.json",
+                  compress=False, store_dir=store_dir)
+    t0 = time.perf_counter()
+    results = precompress_files([output_path, data_path])
+    elapsed = time.perf_counter() - t0
+    return elapsed, sum(result["gzip"] + (result["br"] or 0) for result in results.values())
+
+
+def run_case(case, size):
+    """현재 프로세스에서 케이스 하나 실행 → 결과 dict"""
+    from streaming import peak_rss_mb
+
+    n_assets, n_days = SIZES[size]
+    bench = globals()[f"bench_{case}"]
+    with tempfile.TemporaryDirectory() as workdir, redirect_stdout(io.StringIO()):
+        seconds, output_bytes = bench(n_assets, n_days, workdir)
+    return {
+        "seconds": round(seconds, 4),
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+        "output_bytes": output_bytes,
+    }
+
+
+def measure_import(mode, repeat=1):
+    """새 인터프리터에서 모드 하나의 import 시간을 repeat번 재고 가장 빠른 결과를 고름"""
+    runs = []
+    for _ in range(repeat):
+        proc = subprocess.run(
+            [sys.executable, "-c", IMPORT_PROBE, IMPORT_MODES[mode]],
+            cwd=Path(__file__).parent, capture_output=True, text=True, check=True,
+        )
+        runs.append(json.loads(proc.stdout))
+    return min(runs, key=lambda r: r["seconds"])
+
+
+def run_isolated(case, size, repeat=1):
+    """케이스를 새 프로세스에서 repeat번 실행하고 가장 빠른 결과를 고름"""
+    runs = []
+    for _ in range(repeat):
+        proc = subprocess.run(
+            [sys.executable, __file__, "--child", case, size],
+            capture_output=True, text=True, check=True,
+        )
+        runs.append(json.loads(proc.stdout))
+    return min(runs, key=lambda r: r["seconds"])
+
+
+# ============================================
+# 기준선
+# ============================================
+
+def load_baseline(path=BASELINE_PATH):
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_baseline(results, path=BASELINE_PATH):
+    """결과를 기준선에 저장 (이번에 재지 않은 케이스의 기존 값은 유지)"""
+    try:
+        merged = load_baseline(path)["results"]
+    except (OSError, ValueError, KeyError):
+        merged = {}
+    merged.update(results)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    baseline = {
+        "created": datetime.now().strftime("%Y-%m-%d %H:%M"),
+        "python": platform.python_version(),
+        "machine": f"{platform.system()} {platform.machine()}",
+        "json": BACKEND,
+        "results": merged,
+    }
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(baseline, f, ensure_ascii=False, indent=1)
+        f.write("\n")
+
+
+def compare(results, baseline, tolerance=TOLERANCE):
+    """기준선 대비 변화 출력, 회귀(시간/메모리/출력 크기가 tolerance 넘게 증가) 목록 반환"""
+    regressions = []
+    for key, result in results.items():
+        base = baseline["results"].get(key)
+        if base is None:
+            print(f"  {key:36} (기준선 없음)")
+            continue
+        parts = []
+        for metric in ("seconds", "peak_rss_mb", "output_bytes"):
+            old, new = base.get(metric), result.get(metric)
+            if not old or new is None:
+                continue
+            change = new / old - 1
+            parts.append(f"{metric} {change:+.0%}")
+            if change > tolerance:
+                regressions.append((key, metric, old, new))
+        print(f"  {key:36} " + " · ".join(parts))
+    return regressions
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="데이터/렌더링 벤치마크")
+    parser.add_argument("--sizes", default=",".join(DEFAULT_SIZES),
+                        help=f"측정할 크기 (쉼표 구분 또는 all, 선택: {', '.join(SIZES)}; 기본 {','.join(DEFAULT_SIZES)})")
+    parser.add_argument("--cases", default="all",
+                        help=f"측정할 케이스 (쉼표 구분 또는 all, 선택: {', '.join(CASES + [IMPORT_CASE])})")
+    parser.add_argument("--repeat", type=int, default=3,
+                        help="케이스마다 반복해서 가장 빠른 값을 씀 (기본 3)")
+    parser.add_argument("--baseline", type=Path, default=BASELINE_PATH,
+                        help="기준선 파일 (기본 benchmarks/baseline.json)")
+    parser.add_argument("--save", action="store_true", help="결과를 기준선으로 저장")
+    parser.add_argument("--compare", action="store_true", help="기준선과 비교, 회귀가 있으면 종료 코드 1")
+    parser.add_argument("--tolerance", type=float, default=TOLERANCE,
+                        help=f"회귀로 볼 증가 비율 (기본 {TOLERANCE})")
+    parser.add_argument("--child", nargs=2, metavar=("CASE", "SIZE"), help=argparse.SUPPRESS)
+    return parser.parse_args(argv)
+
+
+def _pick(spec, choices):
+    names = list(choices) if spec == "all" else spec.split(",")
+    unknown = [n for n in names if n not in choices]
+    if unknown:
+        raise SystemExit(f"알 수 없는 이름: {', '.join(unknown)}")
+    return names
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.child:
+        print(json.dumps(run_case(*args.child)))
+        return
+
+    sizes = _pick(args.sizes, SIZES)
+    cases = _pick(args.cases, CASES + [IMPORT_CASE])
+    # 측정을 다 하고 나서 실패하지 않도록 기준선부터 확인
+    if args.compare and not args.baseline.exists():
+        print(f"❌ 기준선이 없음: {args.baseline}")
+        print("   먼저 python scripts/benchmark.py --save 로 기준선을 저장하세요")
+        sys.exit(2)
+
+    print("=" * 50)
+    print(f"⏱️ 벤치마크 (JSON: {BACKEND})")
+    print("=" * 50)
+    results = {}
+    if IMPORT_CASE in cases:
+        cases.remove(IMPORT_CASE)
+        print("\n🚀 모드별 import 시간")
+        for mode in IMPORT_MODES:
+            result = measure_import(mode, args.repeat)
+            results[f"{IMPORT_CASE}/{mode}"] = result
+            print(f"  {mode:22} {result['seconds'] * 1000:8.1f}ms · {result['peak_rss_mb']:8.1f} MB")
+
+    for size in sizes if cases else []:
+        n_assets, n_days = SIZES[size]
+        print(f"\n📏 {size}: {n_assets:,}개 × {n_days:,}일")
+        for case in cases:
+            result = run_isolated(case, size, args.repeat)
+            results[f"{case}/{size}"] = result
+            output = f" · {result['output_bytes']:,} bytes" if result["output_bytes"] is not None else ""
+            print(f"  {case:22} {result['seconds']:9.3f}s · {result['peak_rss_mb']:8.1f} MB{output}")
+
+    exit_code = 0
+    if args.compare:
+        print(f"\n📊 기준선 비교 ({args.baseline})")
+        regressions = compare(results, load_baseline(args.baseline), args.tolerance)
+        for key, metric, old, new in regressions:
+            print(f"  ❌ {key} {metric}: {old} → {new}")
+        if regressions:
+            exit_code = 1
+        else:
+            print("  ✅ 회귀 없음")
+
+    if args.save:
+        save_baseline(results, args.baseline)
+        print(f"\n💾 기준선 저장: {args.baseline}")
+
+    sys.exit(exit_code)
+
+
+if __name__ == "__main__":
+    main()
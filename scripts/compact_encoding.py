@@ -0,0 +1,19 @@
+"""
+페이지에 싣는 날짜 축의 압축 인코딩
+- 시작 날짜 + 이전 날짜와의 일수 차이 ({"d0", "dd"})
+- 페이지의 decodeDates()가 'YYYY-MM-DD' 배열로 되돌림 (REBASED의 기간별 공유 축)
+"""
+
+import numpy as np
+
+from price_store import days_to_dates
+
+
+def encode_axis(axis):
+    """공유 날짜 축(일수 배열) → {"d0", "dd"}"""
+    axis = np.asarray(axis, dtype=np.int64)
+    return {
+        "d0": str(days_to_dates(axis[:1])[0]) if len(axis) else None,
+        "dd": np.diff(axis, prepend=axis[:1]).tolist(),
+    }
+
@@ -0,0 +1,318 @@
+#!/usr/bin/env python3
+"""
+기간별 자산 간 일간 수익률 상관관계
+- 모든 자산의 가격을 공유 날짜 축(모든 자산 날짜의 합집합)에 맞춤 (alignment.py): 그날 bar가 없으면 직전 종가를 이어 씀
+  → 일간 수익률 행렬 R (날짜 × 자산). 아직 bar가 없는 자산의 칸은 0으로 두고 관측 수에서 뺀다
+- R을 BLOCK_DAYS행씩 만들어서 합계 n, Σr, RᵀR에 BLOCK_ASSETS행씩 더함 → 메모리는 자산² 행렬 하나 + 블록
+- 기간별 합계를 .cache/correlation/에 남기고, 다음 실행에서는 새로 확정된 날의 행을 더하고
+  기간 밖으로 밀려난 행을 빼서 갱신 (전체 재계산 없음)
+  마지막 날 bar는 장중 값이 바뀔 수 있어서 합계에는 넣지 않고 결과를 낼 때만 더한다
+- 결과: data/correlation.json — 기간별 상관계수 상삼각(대각 포함)을 ×100 int8로 묶어 base64
+
+사용법:
+  python scripts/correlation.py          # 가격 저장소로 상관관계 갱신
+  python scripts/correlation.py --full   # 저장된 합계를 버리고 전체 재계산
+"""
+
+import argparse
+import base64
+import hashlib
+import os
+import re
+import zipfile
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+
+from alignment import AlignedPrices
+from price_store import STORE_DIR, load_store
+from returns import get_date_ranges, parse_window, to_day
+from serializer import dumps_bytes, load
+
+CORRELATION_PATH = Path(__file__).parent.parent / "data" / "correlation.json"
+STATE_DIR = Path(__file__).parent.parent / ".cache" / "correlation"
+STATE_VERSION = 1
+
+# 한 번에 만드는 수익률 행 수와 RᵀR을 나눠 더하는 자산 수
+# (임시 배열은 블록 × 자산, 자산 블록 × 자산 크기까지만 생김)
+BLOCK_DAYS = 64
+BLOCK_ASSETS = 512
+
+# 기간 안에서 이 비율 이상 수익률이 있어야 상관계수를 냄
+MIN_COVERAGE = 0.5
+MIN_OBSERVATIONS = 3
+
+# 더하고 빼기를 반복하며 쌓이는 부동소수 오차를 끊기 위한 전체 재계산 주기
+MAX_INCREMENTAL_UPDATES = 30
+
+# 상관계수를 낼 수 없는 칸 (int8)
+MISSING = -128
+
+
+class AlignedReturns(AlignedPrices):
+    """공유 날짜 축(합집합)에 맞춘 일간 수익률 행렬을 블록 단위로 만들어 주는 뷰"""
+
+    def returns(self, lo, hi):
+        """축 위치 [lo, hi)의 일간 수익률 (행 × 자산) — 전날이나 그날 가격이 없으면 NaN (lo >= 1)"""
+        prices = self.prices(np.arange(lo - 1, hi))
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return prices[1:] / prices[:-1] - 1
+
+
+def empty_sums(n_assets):
+    return {
+        "n": 0.0,
+        "obs": np.zeros(n_assets),
+        "s": np.zeros(n_assets),
+        "sxy": np.zeros((n_assets, n_assets)),
+    }
+
+
+def accumulate(aligned, lo, hi, sums, sign=1.0, block_days=BLOCK_DAYS):
+    """축 위치 [lo, hi)의 수익률 행을 합계에 더함 (sign=-1이면 뺌)"""
+    for start in range(lo, hi, block_days):
+        block = aligned.returns(start, min(start + block_days, hi))
+        valid = np.isfinite(block)
+        block[~valid] = 0.0
+        sums["n"] += sign * len(block)
+        sums["obs"] += sign * valid.sum(axis=0)
+        sums["s"] += sign * block.sum(axis=0)
+        signed = -block if sign < 0 else block
+        for i in range(0, block.shape[1], BLOCK_ASSETS):
+            sums["sxy"][i:i + BLOCK_ASSETS] += signed[:, i:i + BLOCK_ASSETS].T @ block
+    return sums
+
+
+def correlation_from_sums(sums):
+    """합계 → 상관계수 행렬 (관측이 모자라거나 변동이 없는 자산의 행/열은 NaN)
+
+    자산² 행렬을 새로 만들지 않도록 sums["sxy"]를 제자리에서 바꿔서 돌려준다.
+    """
+    n = sums["n"]
+    corr = sums["sxy"]
+    if n < MIN_OBSERVATIONS:
+        corr.fill(np.nan)
+        return corr
+
+    mean = sums["s"] / n
+    corr /= n
+    for i in range(0, len(corr), BLOCK_ASSETS):
+        corr[i:i + BLOCK_ASSETS] -= mean[i:i + BLOCK_ASSETS, None] * mean[None, :]
+    var = np.diag(corr).copy()
+    valid = (var > 1e-14) & (sums["obs"] >= max(MIN_OBSERVATIONS, MIN_COVERAGE * n))
+    sd = np.sqrt(np.where(valid, var, np.nan))
+    corr /= sd[:, None]
+    corr /= sd[None, :]
+    return np.clip(corr, -1.0, 1.0, out=corr)
+
+
+def quantize(corr):
+    """상관계수 → ×100 int8 (NaN은 MISSING)"""
+    scaled = np.round(corr * 100)
+    return np.where(np.isfinite(scaled), scaled, MISSING).astype(np.int8)
+
+
+def pack_triangle(matrix):
+    """대칭 행렬 → 상삼각(대각 포함) 행 우선 int8 base64 (float 행렬이면 quantize)"""
+    rows = [matrix[i, i:] for i in range(len(matrix))]
+    packed = np.concatenate(rows) if rows else np.empty(0, dtype=np.int8)
+    if packed.dtype != np.int8:
+        packed = quantize(packed)
+    return base64.b64encode(packed.tobytes()).decode("ascii")
+
+
+def unpack_triangle(text, n):
+    """pack_triangle의 역변환 → int8 (n × n) 행렬"""
+    values = np.frombuffer(base64.b64decode(text), dtype=np.int8)
+    matrix = np.empty((n, n), dtype=np.int8)
+    pos = 0
+    for i in range(n):
+        row = values[pos:pos + n - i]
+        matrix[i, i:] = row
+        matrix[i:, i] = row
+        pos += n - i
+    return matrix
+
+
+def crop_artifact(artifact, limit):
+    """결과에서 앞쪽 limit개 자산만 남기기 (페이지에 싣는 용도)"""
+    n = len(artifact["symbols"])
+    if n <= limit:
+        return artifact
+    return {
+        **artifact,
+        "symbols": artifact["symbols"][:limit],
+        "periods": {
+            period: {**entry, "q": pack_triangle(unpack_triangle(entry["q"], n)[:limit, :limit])}
+            for period, entry in artifact["periods"].items()
+        },
+    }
+
+
+def load_correlation(path=CORRELATION_PATH):
+    """결과 파일 읽기 (없으면 None)"""
+    try:
+        with open(path, "rb") as f:
+            return load(f)
+    except FileNotFoundError:
+        return None
+
+
+# ============================================
+# 기간별 합계 저장/갱신
+# ============================================
+
+def signature(symbols):
+    """합계를 이어 쓸 수 있는지 판단하는 자산 목록 지문"""
+    raw = "\n".join([str(STATE_VERSION), *symbols])
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def state_path(period, state_dir=STATE_DIR):
+    return Path(state_dir) / (re.sub(r"[^\w-]", "_", period) + ".npz")
+
+
+def load_state(path):
+    try:
+        with np.load(path) as saved:
+            return {key: saved[key] for key in saved.files}
+    except (OSError, ValueError, EOFError, zipfile.BadZipFile):
+        return None
+
+
+def save_state(path, sums, meta):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "wb") as f:
+        np.savez(f, **sums, **meta)
+    os.replace(tmp, path)
+
+
+def _axis_index(axis, day):
+    i = int(np.searchsorted(axis, day))
+    return i if i < len(axis) and axis[i] == day else None
+
+
+def _incremental(aligned, state, sig, base, settled):
+    """저장된 합계를 (base, settled] 구간으로 옮길 수 있으면 (합계, 횟수), 아니면 None"""
+    if state is None or str(state["signature"]) != sig or int(state["updates"]) >= MAX_INCREMENTAL_UPDATES:
+        return None
+    old_base = _axis_index(aligned.axis, int(state["base"]))
+    old_settled = _axis_index(aligned.axis, int(state["settled"]))
+    if old_base is None or old_settled is None:
+        return None
+    # 기간은 앞으로만 움직이고, 빠질 행은 이전에 더한 행 안에 있어야 함
+    if not (old_base <= base <= old_settled <= settled):
+        return None
+    # 이전 실행의 마지막 확정 가격이 그대로여야 그 뒤에 이어 붙일 수 있음
+    if not np.array_equal(aligned.prices([old_settled])[0], state["price"], equal_nan=True):
+        return None
+    # 바뀐 행이 기간 전체보다 많으면 새로 계산하는 편이 빠름
+    if (base - old_base) + (settled - old_settled) >= settled - base:
+        return None
+
+    sums = {key: state[key].astype(np.float64, copy=False) for key in ("obs", "s", "sxy")}
+    sums["n"] = float(state["n"])
+    accumulate(aligned, old_base + 1, base + 1, sums, sign=-1.0)
+    accumulate(aligned, old_settled + 1, settled + 1, sums)
+    return sums, int(state["updates"]) + 1
+
+
+def update_period(aligned, start_day, state=None, sig=None):
+    """기간 하나의 확정 합계 갱신 → (합계, 저장할 메타, 방식)
+
+    기간의 첫 bar(시작일 이후 첫 날)를 기준점으로 그 다음 날부터 마지막 확정 날까지의 수익률을 더한다.
+    """
+    axis = aligned.axis
+    base = int(np.searchsorted(axis, start_day))
+    settled = max(len(axis) - 2, base)
+
+    updated = _incremental(aligned, state, sig, base, settled)
+    if updated is not None:
+        sums, updates = updated
+        mode = "incremental"
+    else:
+        sums = accumulate(aligned, base + 1, settled + 1, empty_sums(len(aligned.symbols)))
+        updates = 0
+        mode = "full"
+
+    meta = {
+        "signature": np.array(sig),
+        "base": np.int64(axis[base]) if base < len(axis) else np.int64(start_day),
+        "settled": np.int64(axis[settled]) if settled < len(axis) else np.int64(start_day),
+        "price": aligned.prices([settled])[0] if settled < len(axis) else np.empty(0),
+        "updates": np.int64(updates),
+    }
+    return sums, meta, mode
+
+
+def update_correlation(columns, date_ranges, last_updated, output_path=CORRELATION_PATH,
+                       state_dir=STATE_DIR, full=False):
+    """기간별 상관관계를 갱신하고 결과 파일 저장 → 결과 dict
+
+    columns: {심볼: (days, close)} — 저장소 순서(레지스트리 순서)대로 결과에 실림
+    full이면 저장된 합계를 쓰지 않고 전체 재계산
+    """
+    symbols = list(columns)
+    aligned = AlignedReturns(columns, symbols)
+    sig = signature(symbols)
+    last = len(aligned.axis) - 1
+
+    periods = {}
+    modes = {"incremental": 0, "full": 0}
+    for period, start in date_ranges.items():
+        path = state_path(period, state_dir)
+        state = None if full else load_state(path)
+        start_day = to_day(start)
+        sums, meta, mode = update_period(aligned, start_day, state, sig)
+        save_state(path, {**sums, "n": np.float64(sums["n"])}, meta)
+        modes[mode] += 1
+
+        # 마지막 날(확정 전) 행은 저장한 뒤에 결과에만 더함
+        if int(np.searchsorted(aligned.axis, start_day)) < last:
+            accumulate(aligned, last, last + 1, sums)
+        periods[period] = {"days": int(sums["n"]), "q": pack_triangle(correlation_from_sums(sums))}
+
+    # 지금 기간 목록에 없는 합계 파일 정리
+    keep = {state_path(period, state_dir).name for period in date_ranges}
+    for path in Path(state_dir).glob("*.npz"):
+        if path.name not in keep:
+            path.unlink()
+
+    artifact = {"lastUpdated": last_updated, "symbols": symbols, "periods": periods}
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = output_path.with_name(output_path.name + ".tmp")
+    with open(tmp, "wb") as f:
+        f.write(dumps_bytes(artifact))
+    os.replace(tmp, output_path)
+
+    print(f"  🔗 상관관계: {len(symbols)}개 자산 × {len(periods)}개 기간 "
+          f"(증분 {modes['incremental']} · 전체 {modes['full']}) → {output_path.name}")
+    return artifact
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="기간별 자산 간 상관관계 갱신")
+    parser.add_argument("--full", action="store_true",
+                        help="저장된 합계를 버리고 전체 재계산")
+    parser.add_argument("--window", action="append", default=[], metavar="SPEC",
+                        help="추가 기간 (예: 2Y, since=2024-01-01) — 여러 번 지정 가능")
+    parser.add_argument("--store", type=Path, default=STORE_DIR,
+                        help="가격 저장소 위치")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    columns = load_store(args.store)
+    if not columns:
+        print(f"❌ 가격 저장소가 비어 있음: {args.store}")
+        return
+    date_ranges = get_date_ranges()
+    date_ranges.update(parse_window(spec) for spec in args.window)
+    update_correlation(columns, date_ranges, datetime.now().strftime("%Y-%m-%d %H:%M"), full=args.full)
+
+
+if __name__ == "__main__":
+    main()
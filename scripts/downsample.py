@@ -0,0 +1,81 @@
+"""
+차트용 시리즈 다운샘플링 (min/max 버킷)
+- 첫 점과 마지막 점은 항상 유지
+- 사이 구간을 버킷으로 나누고 버킷마다 최저점/최고점을 남김 → 전체 극값도 자동으로 유지
+- 버킷마다 같은 두 자리(버킷 첫/마지막 날)에 최저/최고점을 시간 순서로 넣어서
+  공유 축(alignment.py)의 모든 자산이 같은 x를 씀 → 차트 툴팁(index 모드)이 같은 날짜끼리 맞음
+- 버킷 단위 argmin/argmax를 자산 전체에 한 번에 구해서 파이썬 루프 없이 처리
+"""
+
+import argparse
+
+import numpy as np
+
+# 기간별 시리즈 하나당 최대 점 수
+POINT_BUDGET = 300
+# 첫/마지막 점 + 버킷 하나(2점)보다 넉넉해야 budget을 넘지 않음 — 0(다운샘플링 안 함)은 예외
+MIN_BUDGET = 6
+
+
+def check_budget(budget):
+    """budget이 0 또는 MIN_BUDGET 이상인지 확인"""
+    if budget and budget < MIN_BUDGET:
+        raise ValueError(f"최대 점 수는 0 또는 {MIN_BUDGET} 이상이어야 함: {budget}")
+    return budget
+
+
+def point_budget(text):
+    """argparse type: --max-points 값 (0 또는 MIN_BUDGET 이상)"""
+    try:
+        return check_budget(int(text))
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e)) from None
+
+
+def _bucket_edges(n, budget):
+    """첫/마지막 점을 뺀 [1, n-1)을 나눈 버킷 경계 (버킷당 2점)"""
+    n_buckets = max(1, (budget - 2) // 2)
+    return np.linspace(1, n - 1, n_buckets + 1).astype(np.int64)
+
+
+def shared_slots(n, budget=POINT_BUDGET):
+    """길이 n인 공유 축 시리즈를 줄일 때 남는 축 위치 (모든 시리즈 공통, 오름차순)"""
+    if not check_budget(budget) or n <= budget or n < 3:
+        return np.arange(n)
+    edges = _bucket_edges(n, budget)
+    slots = np.stack([edges[:-1], edges[1:] - 1], axis=1).ravel()
+    return np.unique(np.concatenate(([0], slots, [n - 1])))
+
+
+def shared_minmax(values, budget=POINT_BUDGET):
+    """공유 축 시리즈(축 × 시리즈, 1차원이면 시리즈 하나)를 shared_slots() 자리에 맞춰 줄임
+
+    버킷마다 최저점과 최고점을 먼저 나온 것부터 버킷의 첫 날, 마지막 날 자리에 넣는다.
+    값(극값 포함)은 그대로 남고 x는 버킷 폭 안에서만 움직인다. NaN은 무시하고, 버킷이 모두 NaN이면 NaN.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    n = len(values)
+    if not check_budget(budget) or n <= budget or n < 3:
+        return values
+    flat = values.ndim == 1
+    grid = values[:, None] if flat else values
+
+    edges = _bucket_edges(n, budget)
+    lo, hi = edges[:-1], edges[1:]
+    # 버킷 폭이 조금씩 달라서 가장 넓은 폭으로 채우고 넘치는 자리는 버킷 마지막 행을 반복
+    rows = np.minimum(lo[:, None] + np.arange(int((hi - lo).max()))[None, :], (hi - 1)[:, None])
+    window = grid[rows]
+    missing = np.isnan(window)
+    low = np.where(missing, np.inf, window).argmin(axis=1)
+    high = np.where(missing, -np.inf, window).argmax(axis=1)
+    low_value = np.take_along_axis(window, low[:, None], axis=1)[:, 0]
+    high_value = np.take_along_axis(window, high[:, None], axis=1)[:, 0]
+    first = np.where(low <= high, low_value, high_value)
+    second = np.where(low <= high, high_value, low_value)
+
+    slots = np.stack([lo, hi - 1], axis=1).ravel()
+    reduced = np.concatenate((grid[:1], np.stack([first, second], axis=1).reshape(-1, grid.shape[1]), grid[-1:]))
+    # 폭이 1인 버킷은 두 자리가 같은 날 (값도 같음) → shared_slots()처럼 한 번만 남김
+    _, keep = np.unique(np.concatenate(([0], slots, [n - 1])), return_index=True)
+    reduced = reduced[keep]
+    return reduced[:, 0] if flat else reduced
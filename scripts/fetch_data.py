@@ -5,60 +5,110 @@
 - 암호화폐: CoinGecko API (무료)
 """
 
-import json
-import requests
+import argparse
+import hashlib
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime, timedelta
 from pathlib import Path
 
-try:
-    import yfinance as yf
-except ImportError:
-    import subprocess
-    subprocess.check_call(['pip', 'install', 'yfinance', '--break-system-packages', '-q'])
-    import yfinance as yf
+import numpy as np
+
+import http_client
+import metrics
+from correlation import update_correlation
+from http_client import cache_key, cached_call, get_json, report_cache_stats
+from intraday import DEFAULT_INTERVAL, INTERVALS, IntradayRing, publish, update_ring
+from rate_limit import TokenBucket
+from price_store import (
+    STORE_DIR,
+    StoreWriter,
+    columns_to_prices,
+    dates_to_days,
+    load_store,
+    merge_columns,
+    prices_to_columns,
+    restated,
+)
+from registry import REGISTRY_PATH, chunked, load_registry
+from returns import get_date_ranges, parse_window, performance_table, to_day
+from risk import DEFAULT_PERIODS_PER_YEAR, PERIODS_PER_YEAR, risk_table
+from serializer import dumps_bytes
+from streaming import iter_performance_assets, peak_rss_mb, performance_stream
+
+_yf = None
+
+
+def load_yfinance():
+    """yfinance(+pandas)는 ETF를 실제로 받을 때만 불러옴
+
+    import만 수백 ms가 걸려서 모듈 로드 시점에 부르면 수익률 재계산이나
+    calculate_performance / ASSETS만 쓰는 도구까지 그 비용을 낸다.
+    """
+    global _yf
+    if _yf is None:
+        try:
+            import yfinance
+        except ImportError:
+            import subprocess
+            subprocess.check_call(['pip', 'install', 'yfinance', '--break-system-packages', '-q'])
+            import yfinance
+        _yf = yfinance
+    return _yf
 
 # ============================================
 # 자산 정의
 # ============================================
 
-ASSETS = {
-    # ETFs (yfinance)
-    "SPY": {"name": "S&P 500", "type": "etf", "color": "#3b82f6"},
-    "QQQ": {"name": "Nasdaq 100", "type": "etf", "color": "#8b5cf6"},
-    "IWM": {"name": "Russell 2000", "type": "etf", "color": "#06b6d4"},
-    "DIA": {"name": "Dow Jones", "type": "etf", "color": "#f59e0b"},
-    "GLD": {"name": "Gold", "type": "etf", "color": "#eab308"},
-    "EWY": {"name": "코스피(EWY)", "type": "etf", "color": "#ef4444"},
-    "USO": {"name": "Oil (USO)", "type": "etf", "color": "#84cc16"},
-    
-    # Crypto ETFs (yfinance)
-    "IBIT": {"name": "Bitcoin (IBIT)", "type": "etf", "color": "#f7931a"},
-    "ETHA": {"name": "Ethereum (ETHA)", "type": "etf", "color": "#627eea"},
-    "SOLZ": {"name": "Solana (SOLZ)", "type": "etf", "color": "#00ffa3"},
-}
+# 심볼, 이름, 색상, 소스 유형, 그룹은 data/assets.csv에서 관리
+ASSETS = load_registry()
 
-COINGECKO_API = "https://api.coingecko.com/api/v3"
+# 로컬 스텁 서버로 테스트할 때는 COINGECKO_API 환경 변수로 바꿀 수 있음
+COINGECKO_API = os.environ.get("COINGECKO_API", "https://api.coingecko.com/api/v3")
 
+# CoinGecko 무료 구간 예산: 분당 요청 수, 조회 가능한 최대 일수, 429/5xx 재시도 횟수
+COINGECKO_RATE_PER_MIN = 10
+COINGECKO_BURST = 2
+CRYPTO_MAX_DAYS = 365
+CRYPTO_RETRIES = 5
+CRYPTO_WORKERS = 2
 
-def get_date_ranges():
-    """기간별 시작 날짜 계산"""
-    today = datetime.now()
-    
-    return {
-        "1W": today - timedelta(days=7),
-        "1M": today - timedelta(days=30),
-        "3M": today - timedelta(days=90),
-        "12M": today - timedelta(days=365),
-        "YTD": datetime(today.year, 1, 1),
-    }
+COINGECKO_LIMITER = TokenBucket(COINGECKO_RATE_PER_MIN, capacity=COINGECKO_BURST)
+
+# 보관할 가격 히스토리 길이 / 증분 수집 시 다시 받는 겹침 구간 (정정된 종가 반영용)
+HISTORY_DAYS = 400
+OVERLAP_DAYS = 5
+
+OUTPUT_PATH = Path(__file__).parent.parent / "data" / "performance.json"
 
+# lastUpdated를 뺀 가격/성과 데이터의 해시 (이전 실행과 비교해서 바뀐 게 없으면 저장하지 않음)
+CONTENT_HASH_PATH = OUTPUT_PATH.with_name("performance.sha256")
 
-def fetch_etf_data(symbol, days=400):
+# 데이터가 바뀌지 않아 아무것도 쓰지 않았을 때의 종료 코드
+EXIT_UNCHANGED = 3
+
+# 배치 다운로드 설정 (한 번의 요청에 묶을 티커 수 / 동시 요청 수)
+BATCH_SIZE = 50
+MAX_WORKERS = 4
+
+# 수집 → 계산 → 저장을 한 번에 처리할 심볼 수 (메모리 사용량의 상한)
+CHUNK_SIZE = 500
+
+
+def provider_id(symbol, registry=None):
+    """소스 쪽 식별자 (yfinance 티커 / CoinGecko 코인 id)"""
+    info = (registry or ASSETS).get(symbol, {})
+    return info.get("id") or symbol
+
+
+def fetch_etf_data(symbol, days=HISTORY_DAYS):
     """yfinance로 ETF 데이터 가져오기"""
     print(f"  📈 {symbol} 데이터 수집 중...")
     
     try:
-        ticker = yf.Ticker(symbol)
+        ticker = load_yfinance().Ticker(symbol)
         end_date = datetime.now()
         start_date = end_date - timedelta(days=days)
         
@@ -68,13 +118,7 @@ def fetch_etf_data(symbol, days=400):
             print(f"  ⚠️ {symbol} 데이터 없음")
             return None
         
-        # 날짜와 종가만 추출
-        data = []
-        for date, row in hist.iterrows():
-            data.append({
-                "date": date.strftime("%Y-%m-%d"),
-                "price": round(row["Close"], 2)
-            })
+        data = history_to_prices(hist)
         
         print(f"  ✅ {symbol}: {len(data)}일 데이터")
         return data
@@ -84,37 +128,160 @@ def fetch_etf_data(symbol, days=400):
         return None
 
 
-def fetch_crypto_data(coin_id, days=400):
-    """CoinGecko로 암호화폐 데이터 가져오기"""
+def history_to_prices(hist):
+    """yfinance 히스토리에서 날짜와 종가만 추출"""
+    data = []
+    for date, close in hist["Close"].dropna().items():
+        data.append({
+            "date": date.strftime("%Y-%m-%d"),
+            "price": round(close, 2)
+        })
+    return data
+
+
+def fetch_etf_batch(symbols, days=HISTORY_DAYS, registry=None):
+    """yfinance 다중 티커 다운로드로 여러 ETF를 한 번에 가져오기
+
+    같은 날 같은 요청은 디스크 캐시에서 돌려주고, 모든 심볼이 성공한 배치만 캐시한다.
+    """
+    tickers = {symbol: provider_id(symbol, registry) for symbol in symbols}
+    key = cache_key("yfinance.download", sorted(tickers.values()), days, datetime.now().strftime("%Y-%m-%d"))
+    t0 = time.perf_counter()
+    results = cached_call(
+        key,
+        lambda: download_etf_batch(list(tickers.values()), days),
+        cacheable=lambda results: all(results.get(t) for t in tickers.values()),
+    )
+    elapsed = time.perf_counter() - t0
+    
+    fetched = {symbol: results.get(ticker) for symbol, ticker in tickers.items()}
+    for symbol, prices in fetched.items():
+        metrics.record_fetch("etf", symbol, elapsed, rows=len(prices or []), failed=prices is None, batch=len(symbols))
+    return fetched
+
+
+def download_etf_batch(symbols, days=HISTORY_DAYS):
+    """yf.download 한 번으로 배치 수집
+
+    배치 요청 자체가 실패하면 심볼별 fetch_etf_data로 대체해서
+    한 심볼의 오류가 배치 전체로 번지지 않도록 한다.
+    """
+    print(f"  📦 배치 수집 중: {', '.join(symbols)}")
+    
+    end_date = datetime.now()
+    start_date = end_date - timedelta(days=days)
+    
+    try:
+        with metrics.stage("yfinance_download"):
+            hist = load_yfinance().download(
+                symbols,
+                start=start_date,
+                end=end_date,
+                group_by="ticker",
+                auto_adjust=True,
+                threads=False,
+                progress=False,
+            )
+    except Exception as e:
+        print(f"  ⚠️ 배치 다운로드 실패, 개별 수집으로 전환: {e}")
+        return {symbol: fetch_etf_data(symbol, days) for symbol in symbols}
+    
+    with metrics.stage("yfinance_parse"):
+        return split_etf_batch(hist, symbols)
+
+
+def split_etf_batch(hist, symbols):
+    """yf.download 결과(티커별 컬럼 그룹)를 {심볼: prices 또는 None}으로 나누기"""
+    results = {}
+    tickers = set(hist.columns.get_level_values(0)) if not hist.empty else set()
+    for symbol in symbols:
+        try:
+            if symbol not in tickers:
+                print(f"  ⚠️ {symbol} 데이터 없음")
+                results[symbol] = None
+                continue
+            
+            data = history_to_prices(hist[symbol])
+            if not data:
+                print(f"  ⚠️ {symbol} 데이터 없음")
+                results[symbol] = None
+                continue
+            
+            print(f"  ✅ {symbol}: {len(data)}일 데이터")
+            results[symbol] = data
+        
+        except Exception as e:
+            print(f"  ❌ {symbol} 오류: {e}")
+            results[symbol] = None
+    
+    return results
+
+
+def fetch_all(symbols, batch_fetcher=fetch_etf_batch, batch_size=BATCH_SIZE, max_workers=MAX_WORKERS, **kwargs):
+    """심볼을 배치로 나눠 제한된 워커 풀에서 동시에 수집
+
+    batch_fetcher는 심볼 리스트를 받아 {심볼: prices 또는 None}을 돌려주는
+    함수면 무엇이든 된다 (테스트에서는 로컬 스텁 서버용 fetcher를 넣으면 됨).
+    """
+    symbols = list(symbols)
+    batches = [symbols[i:i + batch_size] for i in range(0, len(symbols), batch_size)]
+    results = {}
+    
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as pool:
+        futures = {pool.submit(batch_fetcher, batch, **kwargs): batch for batch in batches}
+        for future in as_completed(futures):
+            batch = futures[future]
+            try:
+                results.update(future.result())
+            except Exception as e:
+                print(f"  ❌ 배치 오류 ({', '.join(batch)}): {e}")
+                for symbol in batch:
+                    results[symbol] = None
+    
+    return results
+
+
+def market_chart_to_prices(points):
+    """CoinGecko market_chart의 [[timestamp(ms), price], ...] → 날짜별 가격 리스트
+
+    일별 데이터 끝에 현재 시각 값이 하나 더 붙어서 같은 날짜가 두 번 나올 수 있다.
+    """
+    data = []
+    for timestamp, price in points:
+        date = datetime.fromtimestamp(timestamp / 1000).strftime("%Y-%m-%d")
+        data.append({
+            "date": date,
+            "price": round(price, 2)
+        })
+    
+    # 중복 날짜 제거 (마지막 값 유지)
+    seen = {}
+    for item in data:
+        seen[item["date"]] = item["price"]
+    
+    data = [{"date": d, "price": p} for d, p in seen.items()]
+    data.sort(key=lambda x: x["date"])
+    return data
+
+
+def fetch_crypto_data(coin_id, days=HISTORY_DAYS):
+    """CoinGecko로 암호화폐 데이터 가져오기
+
+    요청은 COINGECKO_LIMITER 예산 안에서만 나가고, 429/5xx는 백오프 후 재시도한다.
+    """
     print(f"  🪙 {coin_id} 데이터 수집 중...")
     
     try:
         url = f"{COINGECKO_API}/coins/{coin_id}/market_chart"
         params = {
             "vs_currency": "usd",
-            "days": days,
+            "days": min(days, CRYPTO_MAX_DAYS),
             "interval": "daily"
         }
         
-        response = requests.get(url, params=params, timeout=30)
-        response.raise_for_status()
-        result = response.json()
-        
-        data = []
-        for timestamp, price in result["prices"]:
-            date = datetime.fromtimestamp(timestamp / 1000).strftime("%Y-%m-%d")
-            data.append({
-                "date": date,
-                "price": round(price, 2)
-            })
-        
-        # 중복 날짜 제거 (마지막 값 유지)
-        seen = {}
-        for item in data:
-            seen[item["date"]] = item["price"]
-        
-        data = [{"date": d, "price": p} for d, p in seen.items()]
-        data.sort(key=lambda x: x["date"])
+        result = get_json(url, params=params, timeout=30,
+                          limiter=COINGECKO_LIMITER, retries=CRYPTO_RETRIES)
+        data = market_chart_to_prices(result["prices"])
         
         print(f"  ✅ {coin_id}: {len(data)}일 데이터")
         return data
@@ -124,6 +291,146 @@ def fetch_crypto_data(coin_id, days=400):
         return None
 
 
+def fetch_crypto_batch(symbols, days=HISTORY_DAYS, registry=None):
+    """fetch_all용 암호화폐 배치 fetcher (심볼 → CoinGecko id)"""
+    results = {}
+    for symbol in symbols:
+        with metrics.fetch("crypto", symbol) as call:
+            results[symbol] = fetch_crypto_data(provider_id(symbol, registry), days)
+            call["rows"] = len(results[symbol] or [])
+            call["failed"] = results[symbol] is None
+    return results
+
+
+# 소스 유형별 배치 fetcher와 배치 크기 / 동시 요청 수 (None이면 CLI 값 사용)
+SOURCES = {
+    "etf": {"fetcher": fetch_etf_batch, "batch_size": None, "workers": None},
+    # 한 코인씩, 속도는 COINGECKO_LIMITER가 조절
+    "crypto": {"fetcher": fetch_crypto_batch, "batch_size": 1, "workers": CRYPTO_WORKERS},
+}
+
+
+def fetch_sources(plans, registry=None, batch_size=BATCH_SIZE, max_workers=MAX_WORKERS):
+    """소스별 수집 계획을 동시에 실행 → {심볼: prices 또는 None}
+
+    plans: {소스 유형: {일수: [심볼]}}
+    소스마다 별도 스레드에서 돌기 때문에 CoinGecko 요청이 레이트 리밋을
+    기다리는 동안에도 ETF 수집은 계속 진행된다.
+    """
+    def run(source, plan):
+        conf = SOURCES[source]
+        results = {}
+        for days, symbols in sorted(plan.items()):
+            mode = "전체" if days == HISTORY_DAYS else "증분"
+            print(f"  🔄 [{source}] {mode} 수집: 최근 {days}일 × {len(symbols)}개")
+            results.update(fetch_all(
+                symbols,
+                conf["fetcher"],
+                batch_size=conf["batch_size"] or batch_size,
+                max_workers=conf["workers"] or max_workers,
+                days=days,
+                registry=registry,
+            ))
+        return results
+    
+    fetched = {}
+    with ThreadPoolExecutor(max_workers=max(1, len(plans))) as pool:
+        futures = [pool.submit(run, source, plan) for source, plan in plans.items()]
+        for future in as_completed(futures):
+            fetched.update(future.result())
+    return fetched
+
+
+def fetch_etf_intraday(symbols, interval=DEFAULT_INTERVAL, registry=None):
+    """yf.download 한 번으로 여러 ETF의 최근 세션 분봉 → {심볼: (times, close) 또는 None}"""
+    tickers = {symbol: provider_id(symbol, registry) for symbol in symbols}
+    print(f"  📦 분봉 수집 중: {', '.join(symbols)}")
+    try:
+        hist = load_yfinance().download(
+            list(tickers.values()),
+            period="1d",
+            interval=interval,
+            group_by="ticker",
+            auto_adjust=True,
+            prepost=False,
+            threads=False,
+            progress=False,
+        )
+    except Exception as e:
+        print(f"  ❌ 분봉 배치 오류 ({', '.join(symbols)}): {e}")
+        return {symbol: None for symbol in symbols}
+    
+    available = set(hist.columns.get_level_values(0)) if not hist.empty else set()
+    results = {}
+    for symbol, ticker in tickers.items():
+        close = hist[ticker]["Close"].dropna() if ticker in available else None
+        if close is None or close.empty:
+            print(f"  ⚠️ {symbol} 분봉 없음")
+            results[symbol] = None
+            continue
+        times = close.index.as_unit("s").asi8.astype(np.int64)
+        results[symbol] = (times, close.to_numpy(dtype=np.float64))
+    return results
+
+
+def market_chart_to_bars(points, step):
+    """CoinGecko market_chart의 [[timestamp(ms), price], ...] → bar 간격으로 내린 (times, close)
+
+    같은 칸에 여러 값이 있으면 마지막 값 (마지막 점은 현재 시각이라 진행 중인 bar가 된다).
+    """
+    points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+    times = (points[:, 0] // 1000).astype(np.int64)
+    times -= times % step
+    # 뒤집어서 np.unique의 첫 등장 = 원래 순서의 마지막 값
+    unique, index = np.unique(times[::-1], return_index=True)
+    return unique, points[::-1, 1][index]
+
+
+def fetch_crypto_intraday(symbols, interval=DEFAULT_INTERVAL, registry=None):
+    """fetch_all용 암호화폐 분봉 fetcher (CoinGecko는 days=1이면 5분 간격)"""
+    results = {}
+    for symbol in symbols:
+        coin_id = provider_id(symbol, registry)
+        try:
+            result = get_json(
+                f"{COINGECKO_API}/coins/{coin_id}/market_chart",
+                params={"vs_currency": "usd", "days": 1},
+                ttl=0, timeout=30, limiter=COINGECKO_LIMITER, retries=CRYPTO_RETRIES,
+            )
+            results[symbol] = market_chart_to_bars(result["prices"], INTERVALS[interval])
+        except Exception as e:
+            print(f"  ❌ {coin_id} 분봉 오류: {e}")
+            results[symbol] = None
+    return results
+
+
+# 소스 유형별 분봉 fetcher (SOURCES와 같은 형식)
+INTRADAY_SOURCES = {
+    "etf": {"fetcher": fetch_etf_intraday, "batch_size": None, "workers": None},
+    "crypto": {"fetcher": fetch_crypto_intraday, "batch_size": 1, "workers": CRYPTO_WORKERS},
+}
+
+
+def fetch_intraday(registry, interval=DEFAULT_INTERVAL, batch_size=BATCH_SIZE, max_workers=MAX_WORKERS):
+    """레지스트리 전체 분봉 → {심볼: (times, close) 또는 None}"""
+    by_source = {}
+    for symbol, info in registry.items():
+        by_source.setdefault(info["type"], []).append(symbol)
+    
+    fetched = {}
+    for source, symbols in by_source.items():
+        conf = INTRADAY_SOURCES[source]
+        fetched.update(fetch_all(
+            symbols,
+            conf["fetcher"],
+            batch_size=conf["batch_size"] or batch_size,
+            max_workers=conf["workers"] or max_workers,
+            interval=interval,
+            registry=registry,
+        ))
+    return fetched
+
+
 def calculate_performance(prices, start_date):
     """특정 날짜부터의 수익률 계산"""
     start_str = start_date.strftime("%Y-%m-%d")
@@ -142,56 +449,336 @@ def calculate_performance(prices, start_date):
     return round((end_price - start_price) / start_price * 100, 2)
 
 
-def main():
+class UnchangedData(Exception):
+    """수집한 데이터의 내용 해시가 이전 실행과 같음 (저장을 취소하고 빠져나갈 때 사용)"""
+
+
+def read_content_hash(path=CONTENT_HASH_PATH):
+    try:
+        return Path(path).read_text(encoding="utf-8").strip() or None
+    except OSError:
+        return None
+
+
+def update_content_hash(content, symbol, entry, days, close, start_days):
+    """내용 해시에 자산 하나를 더함: 레지스트리 항목, (days, close) 바이트, 기간별 시작 bar 위치
+
+    성과/위험 지표는 이 값들로 정해지므로 넣지 않는다.
+    기간 시작일이 매일 바뀌어도 시작 bar가 같으면 (주말·휴장일) 해시는 그대로다.
+    """
+    days = np.ascontiguousarray(days, dtype=np.int32)
+    content.update(dumps_bytes([symbol, entry, len(days)], sort_keys=True))
+    content.update(days.tobytes())
+    content.update(np.ascontiguousarray(close, dtype=np.float64).tobytes())
+    content.update(np.searchsorted(days, start_days).astype(np.int64).tobytes())
+
+
+def write_content_hash(digest, path=CONTENT_HASH_PATH):
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_text(digest + "\n", encoding="utf-8")
+    os.replace(tmp, path)
+
+
+def load_stored_columns(store_dir=STORE_DIR, legacy_path=OUTPUT_PATH):
+    """이전 실행에서 저장한 가격 읽기 → {심볼: (days, close)}
+
+    컬럼형 저장소가 아직 없으면 기존 performance.json에서 한 번 옮겨온다.
+    """
+    try:
+        columns = load_store(store_dir)
+    except (OSError, ValueError) as e:
+        print(f"  ⚠️ 가격 저장소를 읽을 수 없음: {e}")
+        columns = {}
+    if columns:
+        return columns
+    
+    if not legacy_path.exists():
+        return {}
+    
+    try:
+        return {
+            symbol: prices_to_columns(asset["prices"])
+            for symbol, asset in iter_performance_assets(legacy_path)
+            if asset.get("prices")
+        }
+    except (OSError, ValueError, KeyError) as e:
+        print(f"  ⚠️ 저장된 데이터를 읽을 수 없음, 전체 수집으로 진행: {e}")
+        return {}
+
+
+def plan_fetch_days(symbols, stored, full_refresh=False):
+    """심볼별로 다시 받아야 할 일수를 계산해서 {일수: [심볼]}로 묶기
+
+    저장된 마지막 날짜 이후 구간 + OVERLAP_DAYS만 요청하고,
+    저장본이 없거나 full_refresh면 HISTORY_DAYS 전체를 요청한다.
+    """
+    today = int(dates_to_days(datetime.now().strftime("%Y-%m-%d")))
+    plan = {}
+    
+    for symbol in symbols:
+        columns = stored.get(symbol)
+        if full_refresh or columns is None or not len(columns[0]):
+            days = HISTORY_DAYS
+        else:
+            days = min(HISTORY_DAYS, today - int(columns[0][-1]) + OVERLAP_DAYS)
+        plan.setdefault(days, []).append(symbol)
+    
+    return plan
+
+
+def restated_symbols(fetched, stored):
+    """증분으로 받은 구간이 저장된 종가와 어긋나는 심볼 (배당/분할로 수정 종가가 다시 계산됨)"""
+    return [
+        symbol for symbol, prices in fetched.items()
+        if prices is not None and restated(stored.get(symbol), prices_to_columns(prices))
+    ]
+
+
+def history_cutoff_day(history_days=HISTORY_DAYS):
+    """보관 구간의 첫 날 (1970-01-01 기준 일수)"""
+    return int(dates_to_days((datetime.now() - timedelta(days=history_days)).strftime("%Y-%m-%d")))
+
+
+def positive_int(text):
+    """argparse type: 1 이상의 정수"""
+    value = int(text)
+    if value < 1:
+        raise argparse.ArgumentTypeError(f"1 이상이어야 함: {text}")
+    return value
+
+
+def build_parser(add_help=True):
+    """수집 옵션 파서 (pipeline.py가 parents로 재사용)"""
+    parser = argparse.ArgumentParser(description="자산 성과 데이터 수집", add_help=add_help)
+    parser.add_argument("--batch-size", type=positive_int, default=BATCH_SIZE,
+                        help=f"한 번에 다운로드할 티커 수 (기본 {BATCH_SIZE})")
+    parser.add_argument("--workers", type=positive_int, default=MAX_WORKERS,
+                        help=f"동시 다운로드 수 (기본 {MAX_WORKERS})")
+    parser.add_argument("--full-refresh", action="store_true",
+                        help=f"저장된 데이터를 무시하고 {HISTORY_DAYS}일 전체를 다시 수집")
+    parser.add_argument("--window", action="append", default=[], metavar="SPEC",
+                        help="추가로 계산할 기간 (예: 2Y, 5Y, since=2024-01-01), 여러 번 지정 가능")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="디스크 응답 캐시를 쓰지 않고 항상 새로 요청")
+    parser.add_argument("--registry", type=Path, default=REGISTRY_PATH,
+                        help="자산 레지스트리 CSV 경로 (기본 data/assets.csv)")
+    parser.add_argument("--chunk-size", type=positive_int, default=CHUNK_SIZE,
+                        help=f"한 번에 수집·계산·저장할 심볼 수 (기본 {CHUNK_SIZE})")
+    parser.add_argument("--offline", action="store_true",
+                        help="수집하지 않고 저장된 가격으로 수익률만 다시 계산 (yfinance/requests를 불러오지 않음)")
+    parser.add_argument("--force-write", action="store_true",
+                        help="데이터가 이전 실행과 같아도 performance.json을 다시 씀")
+    return parser
+
+
+def parse_args(argv=None):
+    parser = build_parser()
+    parser.add_argument("--intraday", nargs="?", choices=list(INTERVALS), const=DEFAULT_INTERVAL, default=None,
+                        help=f"일봉 대신 장중 분봉만 수집해서 1D 기간 갱신 (간격 생략 시 {DEFAULT_INTERVAL})")
+    metrics.add_arguments(parser)
+    return parser.parse_args(argv)
+
+
+def process_chunk(symbols, registry, stored, date_ranges, cutoff_day, args):
+    """심볼 한 묶음을 수집 → 병합 → 수익률 계산까지 처리
+
+    반환: [(심볼, days, close, performance, risk)] — 수집과 저장 모두 실패한 심볼은 빠진다.
+    증분 수집 결과가 저장된 종가와 어긋나면(수정 종가 재계산) 그 심볼은 전체 구간을 다시 받는다.
+    args.offline이면 수집 없이 저장본만으로 계산한다.
+    """
+    fetched = {}
+    if not args.offline:
+        by_source = {}
+        for symbol in symbols:
+            by_source.setdefault(registry[symbol]["type"], []).append(symbol)
+        plans = {
+            source: plan_fetch_days(source_symbols, stored, full_refresh=args.full_refresh)
+            for source, source_symbols in by_source.items()
+        }
+        with metrics.stage("fetch"):
+            fetched = fetch_sources(plans, registry, batch_size=args.batch_size, max_workers=args.workers)
+            
+            # 겹치는 bar가 달라졌으면 저장본 전체가 이전 기준이라 HISTORY_DAYS 전체를 다시 받음
+            refetch = restated_symbols(fetched, stored)
+            if refetch:
+                print(f"  🔁 수정 종가가 다시 계산됨, 전체 재수집: {', '.join(refetch)}")
+                retry = {}
+                for symbol in refetch:
+                    retry.setdefault(registry[symbol]["type"], {}).setdefault(HISTORY_DAYS, []).append(symbol)
+                refetched = fetch_sources(retry, registry, batch_size=args.batch_size, max_workers=args.workers)
+                replaced = {symbol for symbol, prices in refetched.items() if prices is not None}
+                for symbol in sorted(set(refetch) - replaced):
+                    print(f"  ⚠️ {symbol} 전체 재수집 실패, 증분 결과 유지")
+                fetched.update((symbol, refetched[symbol]) for symbol in replaced)
+                stored = {symbol: columns for symbol, columns in stored.items() if symbol not in replaced}
+    
+    with metrics.stage("compute"):
+        periods_per_year = {
+            symbol: PERIODS_PER_YEAR.get(registry[symbol]["type"], DEFAULT_PERIODS_PER_YEAR)
+            for symbol in symbols
+        }
+        return merge_and_compute(symbols, fetched, stored, date_ranges, cutoff_day, periods_per_year)
+
+
+def merge_and_compute(symbols, fetched, stored, date_ranges, cutoff_day, periods_per_year=None):
+    """수집 결과를 저장본과 병합하고 수익률/위험 지표 계산 → [(심볼, days, close, performance, risk)]"""
+    columns = {}
+    for symbol in symbols:
+        if symbol in fetched and fetched[symbol] is None and symbol in stored:
+            print(f"  ⚠️ {symbol} 수집 실패, 저장된 데이터 유지")
+        days, close = merge_columns(stored.get(symbol), prices_to_columns(fetched.get(symbol)), cutoff_day)
+        if len(days):
+            columns[symbol] = (days, close)
+    
+    # 묶음 안의 모든 자산 × 모든 기간 수익률과 위험 지표를 한 번에 계산
+    performance = performance_table(columns, date_ranges)
+    risk = risk_table(columns, date_ranges, periods_per_year)
+    return [
+        (symbol, days, close, performance[symbol], risk[symbol])
+        for symbol, (days, close) in columns.items()
+    ]
+
+
+def run(args, keep=False):
+    """수집 → 계산 → 저장 전체 실행
+
+    keep이면 (lastUpdated, [(심볼, 자산, days, close), ...])를 돌려줘서
+    같은 프로세스의 HTML 생성이 performance.json을 다시 읽지 않게 한다.
+    자산에는 prices를 넣지 않고 days/close는 가격 저장소(mmap)의 뷰라서 전체 가격을 메모리에 두지 않는다.
+    가격·레지스트리·기간 시작 bar가 이전 실행과 같으면 (update_content_hash) 아무것도 쓰지 않고 UnchangedData를 올린다.
+    """
+    http_client.cache_enabled = not args.no_cache
+    registry = load_registry(args.registry)
+    
     print("=" * 50)
     print("🚀 자산 성과 데이터 수집 시작")
     print(f"📅 {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+    print(f"📋 레지스트리: {len(registry)}개 자산, {args.chunk_size}개씩 처리")
     print("=" * 50)
     
     date_ranges = get_date_ranges()
-    all_data = {}
-    
-    # 모든 ETF 데이터 수집
-    print("\n📊 ETF 데이터 수집")
-    for symbol, info in ASSETS.items():
-        prices = fetch_etf_data(symbol)
-        if prices:
-            all_data[symbol] = {
-                "name": info["name"],
-                "color": info["color"],
-                "prices": prices,
-                "performance": {}
-            }
-            
-            # 기간별 수익률 계산
-            for period, start_date in date_ranges.items():
-                perf = calculate_performance(prices, start_date)
-                all_data[symbol]["performance"][period] = perf
-    
-    # 결과 저장
-    output = {
-        "lastUpdated": datetime.now().strftime("%Y-%m-%d %H:%M"),
-        "assets": all_data
-    }
-    
-    output_path = Path(__file__).parent.parent / "data" / "performance.json"
+    date_ranges.update(parse_window(spec) for spec in args.window)
+    start_days = np.array([to_day(start) for start in date_ranges.values()], dtype=np.int64)
+    cutoff_day = history_cutoff_day()
+    
+    if args.offline:
+        print("\n📊 저장된 가격으로 수익률 재계산 (수집 안 함)")
+    else:
+        print(f"\n📊 데이터 수집 (ETF 배치 {args.batch_size}개·동시 {args.workers}개, "
+              f"CoinGecko 분당 {COINGECKO_RATE_PER_MIN}회)")
+    with metrics.stage("load_stored"):
+        stored = {} if args.full_refresh else load_stored_columns()
+    
+    output_path = OUTPUT_PATH
     output_path.parent.mkdir(exist_ok=True)
+    last_updated = datetime.now().strftime("%Y-%m-%d %H:%M")
+    
+    # 묶음 단위로 수집·계산해서 가격 저장소와 performance.json에 바로 이어 씀
+    # (전체 자산의 가격을 한꺼번에 메모리에 들고 있지 않음)
+    saved = 0
+    summary = []
+    kept_meta = []
+    content = hashlib.sha256()
+    previous_hash = read_content_hash()
+    with StoreWriter(last_updated=last_updated) as store, performance_stream(output_path, last_updated) as write:
+        for chunk in chunked(registry, args.chunk_size):
+            rows = process_chunk(chunk, registry, stored, date_ranges, cutoff_day, args)
+            with metrics.stage("write"):
+                for symbol, days, close, performance, risk in rows:
+                    store.add(symbol, days, close)
+                    asset = {
+                        "name": registry[symbol]["name"],
+                        "color": registry[symbol]["color"],
+                        "prices": columns_to_prices(days, close),
+                        "performance": performance,
+                        "risk": risk
+                    }
+                    write(symbol, asset)
+                    update_content_hash(content, symbol, registry[symbol], days, close, start_days)
+                    if keep:
+                        kept_meta.append((symbol, {key: value for key, value in asset.items() if key != "prices"}))
+                    saved += 1
+                    summary.append((symbol, asset["name"], performance.get("YTD")))
+        
+        # 예외로 빠져나가면 performance.json과 저장소 모두 임시 파일만 지우고 그대로 둠
+        if content.hexdigest() == previous_hash and not args.force_write:
+            print(f"\n⏸️ 가격/성과 데이터가 이전 실행과 같아서 저장하지 않음 ({previous_hash[:12]})")
+            raise UnchangedData(previous_hash)
     
-    with open(output_path, "w", encoding="utf-8") as f:
-        json.dump(output, f, ensure_ascii=False)
+    write_content_hash(content.hexdigest())
+    print(f"  💾 가격 저장소 갱신: {STORE_DIR}")
+    
+    # 상관관계는 모든 자산이 필요해서 묶음 처리가 끝난 뒤 저장소(mmap)에서 계산
+    columns = load_store()
+    with metrics.stage("correlation"):
+        update_correlation(columns, date_ranges, last_updated, full=args.full_refresh)
     
     print("\n" + "=" * 50)
-    print(f"✅ 완료! {len(all_data)}개 자산 저장됨")
+    print(f"✅ 완료! {saved}개 자산 저장됨")
     print(f"📁 {output_path}")
+    report_cache_stats()
+    print(f"📈 최대 메모리(RSS): {peak_rss_mb():.1f} MB")
     print("=" * 50)
     
-    # YTD 성과 출력
+    # YTD 성과 출력 (자산이 많으면 상위 20개만)
     print("\n📊 YTD 성과:")
-    for symbol, data in sorted(all_data.items(), key=lambda x: x[1]["performance"].get("YTD", 0) or 0, reverse=True):
-        perf = data["performance"].get("YTD", "N/A")
+    ranked = sorted(summary, key=lambda x: x[2] or 0, reverse=True)
+    for symbol, name, perf in ranked[:20]:
         if perf is not None:
             sign = "+" if perf >= 0 else ""
-            print(f"  {symbol:5} {data['name']:20} {sign}{perf}%")
+            print(f"  {symbol:5} {name:20} {sign}{perf}%")
+    if len(ranked) > 20:
+        print(f"  ... 외 {len(ranked) - 20}개")
+    
+    if not keep:
+        return None
+    return last_updated, [(symbol, meta, *columns[symbol]) for symbol, meta in kept_meta]
+
+
+def run_intraday(args):
+    """장중 분봉 수집 → 링 버퍼 갱신 → data/intraday/의 1d.json / delta.json 저장
+
+    새 bar가 하나도 없으면 (장 마감 등) 아무것도 쓰지 않고 UnchangedData를 올린다.
+    """
+    http_client.cache_enabled = not args.no_cache
+    registry = load_registry(args.registry)
+    print(f"⏱️ 장중 {args.intraday}봉 수집: {len(registry)}개 자산")
+    
+    with metrics.stage("load_stored"):
+        ring = IntradayRing.load(list(registry), args.intraday)
+        # 전일 종가용 (저장소가 캐시에 없으면 performance.json에서)
+        columns = load_stored_columns()
+    with metrics.stage("fetch"):
+        fetched = fetch_intraday(registry, args.intraday, batch_size=args.batch_size, max_workers=args.workers)
+    with metrics.stage("compute"):
+        batch = update_ring(ring, fetched, registry, columns)
+    
+    if not batch:
+        print("\n⏸️ 새 bar가 없어서 저장하지 않음")
+        raise UnchangedData(None)
+    
+    with metrics.stage("write"):
+        publish(ring, batch, registry)
+    bars = sum(len(entry["t"]) for entry in batch.values())
+    resets = sum(1 for entry in batch.values() if entry.get("reset"))
+    print(f"\n✅ 배치 {ring.seq}: {len(batch)}개 자산, bar {bars:,}개 (새 세션 {resets}개)")
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    metrics.enabled = args.metrics_dir is not None
+    metrics.reset()
+    try:
+        run_intraday(args) if args.intraday else run(args)
+    except UnchangedData:
+        sys.exit(EXIT_UNCHANGED)
+    finally:
+        metrics.write_report(args.metrics_dir, extra=run_metrics())
+
+
+def run_metrics():
+    """계측 리포트에 붙일 실행 전체 값"""
+    return {"httpCache": http_client.cache_stats(), "peakRssMb": round(peak_rss_mb(), 1)}
 
 
 if __name__ == "__main__":
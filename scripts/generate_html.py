@@ -1,23 +1,594 @@
 #!/usr/bin/env python3
 """
 JSON 데이터를 읽어서 차트 HTML 생성
+- performance.json을 자산 하나씩 여러 번 읽으며 페이지/샤드에 바로 이어 씀
+  (전체 가격 데이터를 한꺼번에 메모리에 올리지 않음)
 """
 
+import argparse
+import hashlib
 import json
+import os
+import re
+from contextlib import ExitStack
+from itertools import islice
 from pathlib import Path
 from datetime import datetime
 
-def generate_html():
-    # 데이터 로드
-    data_path = Path(__file__).parent.parent / "data" / "performance.json"
+import numpy as np
+
+import metrics
+from correlation import CORRELATION_PATH, crop_artifact, load_correlation
+from alignment import CALENDARS, DEFAULT_CALENDAR, AlignedPrices, calendar_axis
+from compact_encoding import encode_axis
+from downsample import POINT_BUDGET, point_budget, shared_minmax, shared_slots
+from intraday import DELTA_FILE, INTERVALS, INTRADAY_DIR, INTRADAY_PERIOD, SNAPSHOT_FILE
+from precompress import original_name, precompress_files, remove_compressed
+from price_store import STORE_DIR, days_to_dates, load_store, prices_to_columns, store_matches
+from returns import get_date_ranges, to_day
+from serializer import dumps
+from streaming import (
+    iter_performance_assets,
+    iter_performance_meta,
+    json_object_stream,
+    object_entries,
+    peak_rss_mb,
+    read_last_updated,
+)
+
+DATA_PATH = Path(__file__).parent.parent / "data" / "performance.json"
+OUTPUT_PATH = Path(__file__).parent.parent / "index.html"
+
+# 샤드 모드 출력 위치 (페이지 기준 상대 URL)
+SHARD_DIR = Path(__file__).parent.parent / "data" / "shards"
+SHARD_URL = "data/shards/"
+
+# 장중 1D 데이터 (intraday.py가 쓰고 페이지가 주기적으로 delta를 읽음)
+INTRADAY_URL = "data/intraday/"
+
+# 페이지에서 데이터를 스트리밍으로 채워 넣을 자리
+ASSETS_MARK = "/*__ASSETS_DATA__*/"
+REBASED_MARK = "/*__REBASED__*/"
+CORRELATION_MARK = "/*__CORRELATION__*/"
+
+# 리베이스 시리즈를 한 번에 계산하는 자산 수 (묶음 × 가장 긴 기간 축 크기의 행렬)
+REBASE_BLOCK = 256
+
+# 페이지 히트맵에 싣는 최대 자산 수 (레지스트리 앞쪽부터, 전체 결과는 data/correlation.json)
+CORRELATION_PAGE_MAX = 50
+
+
+def iter_asset_columns(data_path=DATA_PATH, columns=None):
+    """(심볼, 자산, days, close)를 하나씩 읽기
+
+    columns(가격 저장소)가 있으면 performance.json에서는 메타/성과만 읽고 가격은 파싱하지 않는다.
+    """
+    if columns is None:
+        for symbol, asset in iter_performance_assets(data_path):
+            days, close = prices_to_columns(asset["prices"])
+            yield symbol, asset, days, close
+        return
+    for symbol, asset in iter_performance_meta(data_path):
+        days, close = columns[symbol]
+        yield symbol, asset, days, close
+
+
+def file_source(data_path=DATA_PATH, store_dir=STORE_DIR):
+    """performance.json (+ 가격 저장소)을 읽는 자산 소스
+
+    자산 소스는 부를 때마다 (심볼, 자산, days, close)를 처음부터 다시 돌려주는 함수다.
+    여러 패스로 읽으므로 한 번 쓰고 끝나는 이터레이터가 아니라 함수로 넘긴다.
+    같은 실행에서 쓴 가격 저장소가 있으면 가격은 저장소(mmap)에서 읽고,
+    없거나 performance.json과 맞지 않으면 JSON의 prices를 파싱한다.
+    """
+    columns = None
+    if store_matches(read_last_updated(data_path), store_dir):
+        try:
+            columns = load_store(store_dir)
+        except (OSError, ValueError) as e:
+            print(f"  ⚠️ 가격 저장소를 읽을 수 없음, performance.json에서 가격을 읽음: {e}")
+    return lambda: iter_asset_columns(data_path, columns)
+
+
+def memory_source(dataset):
+    """이미 메모리에 있는 [(심볼, 자산, days, close), ...]를 쓰는 자산 소스 (pipeline.py)
+
+    자산에 prices가 없어도 된다 (페이지와 샤드는 가격을 days/close로만 쓴다).
+    """
+    return lambda: iter(dataset)
+
+
+def asset_meta(asset):
+    """자산에서 prices를 뺀 메타 정보 (이름, 색, 기간별 성과, 위험 지표)"""
+    return {key: value for key, value in asset.items() if key != "prices"}
+
+
+def scan_assets(source):
+    """첫 번째 패스: 공유 날짜 축만 모음
+
+    반환: (축 일수 배열, 자산 수)
+    """
+    axis = np.empty(0, dtype=np.int64)
+    count = 0
+    for _, _, days, _ in source():
+        count += 1
+        if len(days):
+            axis = np.union1d(axis, days)
+    return axis, count
+
+
+def period_axes(axis, date_ranges, calendar=DEFAULT_CALENDAR):
+    """기간별 공유 축 (달력 축에서 기간 시작일 이후 부분)
+
+    반환: (기간 시작 일수 배열, {기간: 축 일수 배열})
+    """
+    axis = calendar_axis(axis, calendar)
+    start_days = np.array([to_day(d) for d in date_ranges.values()], dtype=np.int64)
+    axes = {
+        period: axis[np.searchsorted(axis, start):]
+        for period, start in zip(date_ranges, start_days.tolist())
+    }
+    return start_days, axes
+
+
+def rebase_block(block, start_days, axes, max_points=POINT_BUDGET):
+    """자산 묶음의 기간별 시작일 대비 수익률(%)을 기간 공유 축에 맞춘 시리즈
+
+    block: [(days, close), ...]
+    묶음 전체를 가장 긴 기간 축에 (자산 번호, 날짜) 복합 키 searchsorted 한 번으로 맞추고
+    기간 축(그 축의 끝부분)마다 잘라 쓴다.
+    반환: 자산마다 {기간: 수익률 배열} — 길이는 shared_slots(len(기간 축))과 같고, 기간 안 첫 bar 이전 칸은 NaN.
+    기준가는 calculate_performance와 같은 시작일 이후 첫 bar이고, bar가 없는 날은 직전 종가를 이어 쓴다.
+    """
+    series = [{} for _ in block]
+    full = max(axes.values(), key=len, default=np.empty(0, dtype=np.int64))
+    aligned = AlignedPrices(dict(enumerate(block)), list(range(len(block))), axis=full)
+    if not len(aligned.close):
+        return series
+    positions = aligned.positions(np.arange(len(full)))
+    starts = aligned.starts(start_days)
     
-    with open(data_path, "r", encoding="utf-8") as f:
-        data = json.load(f)
+    for (period, axis), start in zip(axes.items(), starts.T):
+        valid = start < aligned.ends
+        base = aligned.close[np.minimum(start, len(aligned.close) - 1)]
+        valid &= base != 0
+        # 기간 시작 전 bar는 이어 쓰지 않음 (positions가 -1이면 start보다 작아서 같이 빠짐)
+        rows = positions[len(full) - len(axis):]
+        filled = np.where(rows >= start[None, :], aligned.close[np.maximum(rows, 0)], np.nan)
+        valid &= ~np.isnan(filled).all(axis=0)
+        if not valid.any():
+            continue
+        pct = np.round((filled[:, valid] - base[valid]) / base[valid] * 100, 2)
+        reduced = shared_minmax(pct, max_points)
+        for column, asset in enumerate(np.flatnonzero(valid).tolist()):
+            series[asset][period] = reduced[:, column]
+    return series
+
+
+def rebased_assets(assets, start_days, axes, max_points=POINT_BUDGET, block_size=REBASE_BLOCK):
+    """(심볼, 자산, days, close)를 block_size개씩 rebase_block으로 계산 → (심볼, 자산, {기간: 시리즈})를 하나씩
+
+    묶음 단위로만 메모리에 올려서 자산이 많아도 스트리밍으로 쓸 수 있다.
+    """
+    assets = iter(assets)
+    while block := list(islice(assets, block_size)):
+        series = rebase_block([(days, close) for _, _, days, close in block], start_days, axes, max_points)
+        for (symbol, asset, _, _), periods in zip(block, series):
+            yield symbol, asset, periods
+
+
+def to_json_values(values):
+    """NaN을 null로 바꾼 리스트 (표준 json은 NaN을 그대로 써서 JSON이 깨짐)"""
+    if not np.isnan(values).any():
+        return values.tolist()
+    return [None if v != v else v for v in values.tolist()]
+
+
+def build_inline_data_script():
+    """데이터를 페이지에 모두 싣는 모드의 DATA 스크립트
+
+    ASSETS_DATA / REBASED 자리는 write_page()가 자산 하나씩 채운다.
+    ASSETS_DATA는 샤드 모드의 meta처럼 가격 없이 메타 정보만 싣는다 (차트는 REBASED만 읽음).
+    REBASED는 {"axes": {기간: 압축 날짜 축}, "series": {심볼: {기간: 수익률}}} 순서라서
+    축을 먼저 쓰고 자산 단위로 이어 쓸 수 있다. 모든 자산의 기간 시리즈가 같은 날짜 축을 쓴다.
+    """
+    return f'''        function decodeDates(packed) {{
+            const dates = [];
+            if (packed.d0 === null) return dates;
+            let t = Date.parse(packed.d0 + 'T00:00:00Z');
+            packed.dd.forEach(d => {{
+                t += d * 86400000;
+                dates.push(new Date(t).toISOString().slice(0, 10));
+            }});
+            return dates;
+        }}
+
+        const ASSETS_DATA = {ASSETS_MARK};
+        const REBASED = {REBASED_MARK};
+        const CORRELATION = {CORRELATION_MARK};
+
+        function loadMeta() {{
+            return Promise.resolve();
+        }}
+
+        function loadSeries(period) {{
+            const series = {{}};
+            if (!REBASED.axes[period]) return Promise.resolve(series);
+            const dates = decodeDates(REBASED.axes[period]);
+            Object.entries(REBASED.series).forEach(([symbol, periods]) => {{
+                if (!periods[period]) return;
+                series[symbol] = periods[period].map((y, i) => ({{ x: dates[i], y }}));
+            }});
+            return Promise.resolve(series);
+        }}
+
+        function prefetchWhenIdle() {{}}'''
+
+
+def build_shard_data_script():
+    """데이터를 샤드 파일에서 불러오는 모드의 DATA 스크립트
+
+    페이지에는 데이터가 전혀 들어가지 않으므로 데이터가 바뀌어도 index.html은 그대로다.
+    manifest.json(짧은 캐시) → 해시가 붙은 meta/기간 샤드(긴 캐시) 순서로 읽는다.
+    """
+    return f'''        const SHARD_BASE = '{SHARD_URL}';
+        let ASSETS_DATA = {{}};
+        let SHARDS = {{}};
+        let CORRELATION = null;
+
+        function loadMeta() {{
+            return fetchJSON(SHARD_BASE + 'manifest.json', {{ cache: 'no-cache' }})
+                .then(manifest => {{
+                    SHARDS = manifest.shards;
+                    return Promise.all([
+                        fetchJSON(SHARD_BASE + manifest.meta),
+                        manifest.correlation ? fetchJSON(SHARD_BASE + manifest.correlation) : null
+                    ]);
+                }})
+                .then(([meta, correlation]) => {{
+                    ASSETS_DATA = meta.assets;
+                    CORRELATION = correlation;
+                    document.getElementById('last-updated').textContent = meta.lastUpdated;
+                }});
+        }}
+
+        function loadSeries(period) {{
+            if (!SHARDS[period]) return Promise.resolve({{}});
+            return fetchJSON(SHARD_BASE + SHARDS[period]).then(shard => {{
+                const series = {{}};
+                Object.entries(shard.series).forEach(([symbol, values]) => {{
+                    series[symbol] = values.map((y, i) => ({{ x: shard.dates[i], y }}));
+                }});
+                return series;
+            }});
+        }}
+
+        function prefetchWhenIdle() {{
+            const idle = window.requestIdleCallback || (fn => setTimeout(fn, 1500));
+            Object.keys(SHARDS).forEach(period => {{
+                idle(() => getDatasets(period).catch(() => {{}}));
+            }});
+        }}'''
+
+
+def build_intraday_script():
+    """1D 기간 스크립트 (두 데이터 모드 공통)
+
+    1d.json으로 지금 세션 전체를 그리고, 1D를 보는 동안에는 delta.json을 주기적으로 읽어서
+    새 배치의 bar만 데이터셋 끝에 이어 붙인다. 놓친 배치가 있으면 1d.json을 다시 읽는다.
+    """
+    poll_ms = min(INTERVALS.values()) * 1000
+    return f'''        const INTRADAY_PERIOD = '{INTRADAY_PERIOD}';
+        const INTRADAY_BASE = '{INTRADAY_URL}';
+        const INTRADAY_POLL_MS = {poll_ms};
+        let intradaySeq = null;
+        let intradayTimer = null;
+
+        function fetchJSON(url, options) {{
+            return fetch(url, options).then(r => {{
+                if (!r.ok) throw new Error(`${{url}}: ${{r.status}}`);
+                return r.json();
+            }});
+        }}
+
+        function intradayPoints(entry) {{
+            return entry.t.map((t, i) => ({{ x: t * 1000, y: entry.y[i] }}));
+        }}
+
+        function setIntradayPerformance(symbol, points) {{
+            if (!ASSETS_DATA[symbol] || !points.length) return;
+            ASSETS_DATA[symbol].performance[INTRADAY_PERIOD] = points[points.length - 1].y;
+        }}
+
+        function loadIntraday() {{
+            return fetchJSON(INTRADAY_BASE + '{SNAPSHOT_FILE}', {{ cache: 'no-cache' }}).then(snapshot => {{
+                const series = {{}};
+                Object.entries(snapshot.assets).forEach(([symbol, entry]) => {{
+                    if (!ASSETS_DATA[symbol]) return;
+                    series[symbol] = intradayPoints(entry);
+                    setIntradayPerformance(symbol, series[symbol]);
+                }});
+                intradaySeq = snapshot.seq;
+                if (!intradayTimer) intradayTimer = setInterval(pollIntraday, INTRADAY_POLL_MS);
+                return series;
+            }});
+        }}
+
+        // 새 배치의 bar를 이어 붙임 (같은 시각 이후 점은 진행 중인 bar라서 바꿔 씀, reset이면 새 세션)
+        function applyIntradayBatches(datasets, batches) {{
+            const bySymbol = {{}};
+            datasets.forEach(ds => {{ bySymbol[ds.label] = ds; }});
+            batches.forEach(batch => {{
+                Object.entries(batch.assets).forEach(([symbol, entry]) => {{
+                    if (!ASSETS_DATA[symbol]) return;
+                    const points = intradayPoints(entry);
+                    let ds = bySymbol[symbol];
+                    if (!ds) {{
+                        ds = bySymbol[symbol] = buildDatasets({{ [symbol]: [] }})[0];
+                        datasets.push(ds);
+                    }}
+                    if (entry.reset) {{
+                        ds.data = points;
+                    }} else if (points.length) {{
+                        const from = points[0].x;
+                        while (ds.data.length && ds.data[ds.data.length - 1].x >= from) ds.data.pop();
+                        ds.data.push(...points);
+                    }}
+                    setIntradayPerformance(symbol, ds.data);
+                }});
+            }});
+        }}
+
+        function pollIntraday() {{
+            if (currentPeriod !== INTRADAY_PERIOD || intradaySeq === null || document.hidden) return;
+            fetchJSON(INTRADAY_BASE + '{DELTA_FILE}', {{ cache: 'no-cache' }}).then(delta => {{
+                if (delta.seq === intradaySeq) return false;
+                const batches = delta.batches.filter(b => b.seq > intradaySeq);
+                // 번호가 작아졌거나 (다시 시작한 수집) 빠졌으면 스냅샷부터 다시 읽음
+                if (!batches.length || batches[0].seq !== intradaySeq + 1) {{
+                    delete datasetCache[INTRADAY_PERIOD];
+                    intradaySeq = null;
+                    return true;
+                }}
+                return getDatasets(INTRADAY_PERIOD).then(datasets => {{
+                    applyIntradayBatches(datasets, batches);
+                    intradaySeq = delta.seq;
+                    return true;
+                }});
+            }}).then(changed => {{
+                if (changed && currentPeriod === INTRADAY_PERIOD) updateChart();
+            }}).catch(() => {{}});
+        }}'''
+
+
+def write_page(path, page, fillers):
+    """page를 path에 쓰면서 자리표시마다 fillers[자리표시](out)로 내용을 바로 이어 씀
+
+    임시 파일에 쓰고 끝까지 성공했을 때만 기존 페이지를 교체한다.
+    반환: {자리표시: 채운 바이트 수}
+    """
+    parts = [page]
+    if fillers:
+        parts = re.split("(" + "|".join(re.escape(mark) for mark in fillers) + ")", page)
+    
+    sizes = {}
+    tmp = path.with_name(path.name + ".tmp")
+    try:
+        with open(tmp, "w", encoding="utf-8") as out:
+            for part in parts:
+                if part in fillers:
+                    start = out.tell()
+                    fillers[part](out)
+                    sizes[part] = out.tell() - start
+                else:
+                    out.write(part)
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
+    os.replace(tmp, path)
+    return sizes
+
+
+def report_payload(sizes, page_size):
+    """페이지에 실은 데이터 크기 (자리표시별, 페이지 전체 대비)"""
+    if not sizes:
+        return
+    total = sum(sizes.values())
+    parts = " · ".join(f"{mark.strip('/*_')} {size:,}" for mark, size in sizes.items())
+    print(f"  📦 페이지 데이터: {parts} bytes (합계 {total:,} / 페이지 {page_size:,} bytes, {total / page_size:.0%})")
+
+
+def stream_assets_script(out, source):
+    """페이지의 ASSETS_DATA 자리에 {심볼: 메타}를 자산 하나씩 씀 (가격은 싣지 않음)"""
+    out.write("{")
+    with object_entries(out, compact=True) as write:
+        for symbol, asset, _, _ in source():
+            write(symbol, asset_meta(asset))
+    out.write("}")
+
+
+def stream_rebased(out, source, start_days, axes, max_points=POINT_BUDGET):
+    """페이지의 REBASED 자리에 기간 축과 {심볼: {기간: 시리즈}}를 자산 하나씩 씀"""
+    packed = {period: encode_axis(axis[shared_slots(len(axis), max_points)]) for period, axis in axes.items()}
+    out.write('{"axes":' + dumps(packed) + ',"series":{')
+    with object_entries(out, compact=True) as write:
+        for symbol, _, series in rebased_assets(source(), start_days, axes, max_points):
+            if series:
+                write(symbol, {period: to_json_values(values) for period, values in series.items()})
+    out.write("}}")
+
+
+def _rename_hashed(path, name):
+    """스트리밍으로 다 쓴 파일을 내용 해시가 붙은 이름으로 옮기고 (파일명, 크기)를 돌려줌
+
+    같은 내용의 파일이 이미 있으면 새로 쓴 쪽을 지운다.
+    """
+    with open(path, "rb") as f:
+        digest = hashlib.file_digest(f, "sha256").hexdigest()[:12]
+    target = path.with_name(f"{name}.{digest}.json")
+    if target.exists():
+        path.unlink()
+    else:
+        os.replace(path, target)
+    return target.name, target.stat().st_size
+
+
+def read_manifest(shard_dir=SHARD_DIR):
+    """샤드 manifest.json (없거나 깨졌으면 빈 dict)"""
+    try:
+        with open(shard_dir / "manifest.json", "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def manifest_files(manifest):
+    """manifest가 가리키는 샤드 파일 이름"""
+    names = {manifest.get("meta"), manifest.get("correlation"), *manifest.get("shards", {}).values()}
+    return names - {None}
+
+
+def write_shards(source, last_updated, start_days, axes, max_points=POINT_BUDGET, shard_dir=SHARD_DIR,
+                 correlation=None):
+    """meta 샤드 + 기간별 샤드 (+ 상관관계 샤드) + manifest.json 저장
+
+    자산을 한 번 읽으면서 모든 샤드에 동시에 이어 쓰고, 다 쓴 뒤에 내용 해시로 이름을 붙인다.
+    기간 샤드: {"dates": [...], "series": {심볼: [수익률, ...]}} — 모든 자산이 dates를 같이 쓰고 빈 칸은 null
+    날짜는 기간 공유 축에서 남길 자리라 자산을 읽기 전에 미리 쓸 수 있다.
+
+    해시가 붙은 파일은 내용이 바뀌지 않는 한 이름도 그대로라서
+    CDN/브라우저에 Cache-Control: immutable로 오래 둘 수 있다.
+    manifest.json만 짧은 캐시로 두면 된다.
+    """
+    shard_dir.mkdir(parents=True, exist_ok=True)
+    periods = list(axes)
     
-    last_updated = data["lastUpdated"]
-    assets_json = json.dumps(data["assets"], ensure_ascii=False)
+    staged = {"meta": shard_dir / "meta.staging"}
+    staged.update((f"period-{period}", shard_dir / f"period-{period}.staging") for period in periods)
     
-    html = f'''<!DOCTYPE html>
+    with ExitStack() as stack:
+        write_meta = stack.enter_context(json_object_stream(
+            staged["meta"],
+            head='{"lastUpdated":' + dumps(last_updated) + ',"assets":{',
+            tail="}}",
+            compact=True,
+        ))
+        write_period = {
+            period: stack.enter_context(json_object_stream(
+                staged[f"period-{period}"],
+                head='{"dates":' + dumps(days_to_dates(axes[period][shared_slots(len(axes[period]), max_points)]).tolist())
+                     + ',"series":{',
+                tail="}}",
+                compact=True,
+            ))
+            for period in periods
+        }
+        
+        for symbol, asset, series in rebased_assets(source(), start_days, axes, max_points):
+            write_meta(symbol, asset_meta(asset))
+            for period, values in series.items():
+                write_period[period](symbol, to_json_values(values))
+    
+    meta_file, meta_size = _rename_hashed(staged["meta"], "meta")
+    print(f"  🧩 {meta_file}: {meta_size:,} bytes")
+    
+    shard_files = {}
+    for period in periods:
+        filename, size = _rename_hashed(staged[f"period-{period}"], f"period-{period}")
+        shard_files[period] = filename
+        print(f"  🧩 {filename}: {size:,} bytes")
+    
+    previous = read_manifest(shard_dir)
+    manifest = {"meta": meta_file, "shards": shard_files}
+    if correlation is not None:
+        staging = shard_dir / "correlation.staging"
+        with open(staging, "w", encoding="utf-8") as f:
+            f.write(dumps(correlation))
+        manifest["correlation"], size = _rename_hashed(staging, "correlation")
+        print(f"  🧩 {manifest['correlation']}: {size:,} bytes")
+    tmp = shard_dir / "manifest.json.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=1)
+    os.replace(tmp, shard_dir / "manifest.json")
+    
+    # 새 manifest와 직전 manifest가 모두 가리키지 않는 샤드 (와 압축 버전) 정리
+    # 샤드는 immutable로 캐시되므로 이전 manifest나 페이지 셸을 가진 클라이언트가 아직 직전 세대를 읽는다
+    # mtime은 쓰지 않음 — 워크플로는 새로 checkout한 트리에서 돌아서 모든 파일이 방금 만든 것처럼 보임
+    keep = {"manifest.json"} | manifest_files(manifest) | manifest_files(previous)
+    for path in shard_dir.iterdir():
+        name = original_name(path.name)
+        if name.endswith(".json") and name not in keep:
+            path.unlink()
+    
+    return manifest
+
+
+def generate_html(max_points=POINT_BUDGET, shards=False, data_path=DATA_PATH,
+                  source=None, last_updated=None, output_path=OUTPUT_PATH, correlation_path=CORRELATION_PATH,
+                  compress=True, calendar=DEFAULT_CALENDAR, store_dir=STORE_DIR):
+    """페이지(와 샤드) 생성
+
+    source/last_updated를 넘기면 (pipeline.py) performance.json을 다시 읽지 않고 그 데이터를 쓴다.
+    상관관계 결과(correlation.py)가 있으면 앞쪽 CORRELATION_PAGE_MAX개 자산을 히트맵으로 싣는다.
+    compress면 페이지와 데이터 파일 옆에 미리 압축한 .gz/.br을 저장한다 (precompress.py).
+    차트 시리즈는 기간마다 calendar 축(alignment.py)에 맞춰서 모든 자산이 같은 날짜를 쓴다.
+    """
+    if source is None:
+        source = file_source(data_path, store_dir)
+        last_updated = read_last_updated(data_path)
+    
+    # 첫 번째 패스: 공유 날짜 축만 모음
+    with metrics.stage("render_scan"):
+        axis, count = scan_assets(source)
+    date_ranges = get_date_ranges()
+    start_days, axes = period_axes(axis, date_ranges, calendar)
+    print(f"📄 자산 {count}개, 날짜 축 {len(axis)}일 (차트 달력: {calendar})")
+    correlation = load_correlation(correlation_path)
+    if correlation is not None:
+        correlation = crop_artifact(correlation, CORRELATION_PAGE_MAX)
+    
+    # 장중 데이터가 있을 때만 1D 버튼을 보여줌
+    intraday = (INTRADAY_DIR / SNAPSHOT_FILE).exists()
+    
+    if shards:
+        # 페이지 셸에는 데이터를 싣지 않고 샤드 파일로 분리
+        with metrics.stage("render_shards"):
+            write_shards(source, last_updated, start_days, axes, max_points, correlation=correlation)
+        page = render_page("", build_shard_data_script(), intraday)
+        fillers = {}
+    else:
+        # 기간 버튼마다 브라우저에서 다시 계산하지 않도록 리베이스 시리즈를 미리 계산
+        page = render_page(last_updated, build_inline_data_script(), intraday)
+        fillers = {
+            ASSETS_MARK: lambda out: stream_assets_script(out, source),
+            REBASED_MARK: lambda out: stream_rebased(out, source, start_days, axes, max_points),
+            CORRELATION_MARK: lambda out: out.write(dumps(correlation)),
+        }
+    
+    with metrics.stage("render_page"):
+        sizes = write_page(output_path, page, fillers)
+    report_payload(sizes, output_path.stat().st_size)
+    
+    # 페이지와 함께 내보내는 파일 (샤드는 현재와 아직 정리하지 않은 이전 세대)
+    static_files = [output_path, *(path for path in (data_path, correlation_path) if path.exists())]
+    if shards:
+        static_files += sorted(SHARD_DIR.glob("*.json"))
+    if compress:
+        with metrics.stage("render_compress"):
+            precompress_files(static_files)
+    else:
+        remove_compressed(static_files)
+    print(f"✅ HTML 생성 완료: {output_path}")
+    print(f"📈 최대 메모리(RSS): {peak_rss_mb():.1f} MB")
+
+
+def render_page(last_updated, data_script, intraday=False):
+    """페이지 HTML (데이터 자리표시 포함), intraday면 1D 버튼 포함"""
+    intraday_button = (
+        f'<button class="period-btn" data-period="{INTRADAY_PERIOD}">1일</button>\n                '
+        if intraday else ""
+    )
+    return f'''<!DOCTYPE html>
 <html lang="ko">
 <head>
     <meta charset="UTF-8">
@@ -212,6 +783,7 @@ def generate_html():
         .stats-dot {{ width: 8px; height: 8px; border-radius: 50%; flex-shrink: 0; }}
         .stats-name {{ font: 500 12px var(--sans); }}
         .stats-symbol {{ color: var(--text-muted); font: 10px var(--mono); margin-left: 4px; }}
+        .stats-risk {{ display: block; color: var(--text-muted); font: 10px var(--mono); margin-top: 2px; }}
         .stats-perf {{
             font: 600 13px var(--mono);
             flex-shrink: 0;
@@ -219,6 +791,11 @@ def generate_html():
         .stats-perf.positive {{ color: var(--green); }}
         .stats-perf.negative {{ color: var(--red); }}
 
+        /* ====== CORRELATION ====== */
+        .corr-section {{ margin-top: 12px; padding-top: 10px; border-top: 1px solid var(--border); }}
+        .corr-canvas {{ display: block; width: 100%; aspect-ratio: 1; cursor: crosshair; }}
+        .corr-info {{ min-height: 14px; margin-top: 6px; color: var(--text-dim); font: 10px var(--mono); text-align: center; }}
+
         /* ====== FOOTER ====== */
         .footer {{
             padding: 8px 16px 16px;
@@ -290,7 +867,7 @@ def generate_html():
         <div class="header">
             <h1>글로벌 자산 퍼포먼스</h1>
             <div class="sub">주식, 채권, 원자재, 암호화폐 — 주요 자산군 수익률 비교</div>
-            <div class="time">마지막 업데이트: {last_updated}</div>
+            <div class="time">마지막 업데이트: <span id="last-updated">{last_updated}</span></div>
         </div>
 
         <div class="share-bar">
@@ -303,7 +880,7 @@ def generate_html():
 
         <div class="controls">
             <div class="period-buttons">
-                <button class="period-btn" data-period="1W">1주</button>
+                {intraday_button}<button class="period-btn" data-period="1W">1주</button>
                 <button class="period-btn" data-period="1M">1개월</button>
                 <button class="period-btn" data-period="3M">3개월</button>
                 <button class="period-btn" data-period="12M">1년</button>
@@ -318,10 +895,15 @@ def generate_html():
             <div class="stats-box">
                 <div class="stats-title">수익률 (<span id="period-label">YTD</span>)</div>
                 <ul class="stats-list" id="stats-list"></ul>
+                <div class="corr-section" id="corr-section" style="display:none">
+                    <div class="stats-title">상관관계 (<span id="corr-period">YTD</span>)</div>
+                    <canvas class="corr-canvas" id="corrChart"></canvas>
+                    <div class="corr-info" id="corr-info"></div>
+                </div>
             </div>
         </div>
 
-        <div class="footer">데이터 출처: Yahoo Finance · 주요 자산군 ETF 기준 · 투자 판단은 본인의 책임입니다</div>
+        <div class="footer">데이터 출처: Yahoo Finance · CoinGecko · 투자 판단은 본인의 책임입니다</div>
     </div>
 
     <div class="toast" id="toast"></div>
@@ -377,61 +959,68 @@ def generate_html():
         }}
 
         /* ====== DATA ====== */
-        const ASSETS_DATA = {assets_json};
+{data_script}
+
+{build_intraday_script()}
 
         let currentPeriod = 'YTD';
         let chart = null;
         let highlightedAsset = null;
 
-        function getStartDate(period) {{
-            const now = new Date();
-            switch(period) {{
-                case '1W': return new Date(now - 7 * 24 * 60 * 60 * 1000);
-                case '1M': return new Date(now - 30 * 24 * 60 * 60 * 1000);
-                case '3M': return new Date(now - 90 * 24 * 60 * 60 * 1000);
-                case '12M': return new Date(now - 365 * 24 * 60 * 60 * 1000);
-                case 'YTD': return new Date(now.getFullYear(), 0, 1);
-                default: return new Date(now.getFullYear(), 0, 1);
+        const datasetCache = {{}};
+
+        function buildDatasets(series) {{
+            return Object.entries(series).map(([symbol, points]) => {{
+                const data = ASSETS_DATA[symbol];
+                return {{
+                    label: symbol,
+                    data: points,
+                    assetColor: data.color,
+                    borderColor: data.color,
+                    backgroundColor: data.color + '20',
+                    borderWidth: 2,
+                    pointRadius: 0,
+                    pointHoverRadius: 4,
+                    tension: 0.1,
+                    fill: false
+                }};
+            }});
+        }}
+
+        function getDatasets(period) {{
+            if (!datasetCache[period]) {{
+                const load = period === INTRADAY_PERIOD ? loadIntraday() : loadSeries(period);
+                datasetCache[period] = load.then(buildDatasets);
+                datasetCache[period].catch(() => {{ delete datasetCache[period]; }});
             }}
+            return datasetCache[period];
         }}
 
-        function calculatePercentChange(prices, startDate) {{
-            const startStr = startDate.toISOString().split('T')[0];
-            const filtered = prices.filter(p => p.date >= startStr);
-            if (filtered.length === 0) return [];
-            const basePrice = filtered[0].price;
-            return filtered.map(p => ({{
-                x: p.date,
-                y: ((p.price - basePrice) / basePrice * 100).toFixed(2)
-            }}));
-        }}
-
-        function updateChart() {{
-            const startDate = getStartDate(currentPeriod);
-            const datasets = [];
-
-            Object.entries(ASSETS_DATA).forEach(([symbol, data]) => {{
-                const percentData = calculatePercentChange(data.prices, startDate);
-                if (percentData.length > 0) {{
-                    const isHighlighted = highlightedAsset === symbol;
-                    const isFaded = highlightedAsset && highlightedAsset !== symbol;
-
-                    datasets.push({{
-                        label: symbol,
-                        data: percentData,
-                        borderColor: isFaded ? data.color + '40' : data.color,
-                        backgroundColor: data.color + '20',
-                        borderWidth: isHighlighted ? 4 : 2,
-                        pointRadius: 0,
-                        pointHoverRadius: 4,
-                        tension: 0.1,
-                        fill: false
-                    }});
-                }}
+        function applyHighlight(datasets) {{
+            datasets.forEach(ds => {{
+                const isHighlighted = highlightedAsset === ds.label;
+                const isFaded = highlightedAsset && highlightedAsset !== ds.label;
+                ds.borderColor = isFaded ? ds.assetColor + '40' : ds.assetColor;
+                ds.borderWidth = isHighlighted ? 4 : 2;
             }});
+        }}
+
+        function timeUnit(period) {{
+            if (period === INTRADAY_PERIOD) return 'hour';
+            return period === '1W' ? 'day' : period === '1M' ? 'week' : 'month';
+        }}
+
+        async function updateChart() {{
+            const period = currentPeriod;
+            const datasets = await getDatasets(period);
+            if (period !== currentPeriod) return;
+            // 1D 수익률은 장중 데이터를 읽은 뒤에야 채워짐
+            if (period === INTRADAY_PERIOD) updateStats();
+            applyHighlight(datasets);
 
             if (chart) {{
-                chart.data.datasets = datasets;
+                if (chart.data.datasets !== datasets) chart.data.datasets = datasets;
+                chart.options.scales.x.time.unit = timeUnit(period);
                 chart.update('none');
             }} else {{
                 const ctx = document.getElementById('perfChart').getContext('2d');
@@ -468,9 +1057,9 @@ def generate_html():
                             x: {{
                                 type: 'time',
                                 time: {{
-                                    unit: currentPeriod === '1W' ? 'day' :
-                                          currentPeriod === '1M' ? 'week' : 'month',
+                                    unit: timeUnit(period),
                                     displayFormats: {{
+                                        hour: 'HH:mm',
                                         day: 'MM/dd',
                                         week: 'MM/dd',
                                         month: 'yy/MM'
@@ -538,6 +1127,16 @@ def generate_html():
             }}
         }}
 
+        // 기간별 위험 지표 한 줄 요약 (변동성 · MDD · 샤프)
+        function formatRisk(risk) {{
+            if (!risk) return '';
+            const parts = [];
+            if (risk.volatility !== null) parts.push(`변동성 ${{risk.volatility.toFixed(1)}}%`);
+            if (risk.maxDrawdown !== null) parts.push(`MDD ${{risk.maxDrawdown.toFixed(1)}}%`);
+            if (risk.sharpe !== null) parts.push(`샤프 ${{risk.sharpe.toFixed(2)}}`);
+            return parts.join(' · ');
+        }}
+
         function updateStats() {{
             const list = document.getElementById('stats-list');
             document.getElementById('period-label').textContent = currentPeriod;
@@ -547,15 +1146,17 @@ def generate_html():
                     symbol,
                     name: data.name,
                     color: data.color,
-                    perf: data.performance[currentPeriod]
+                    perf: data.performance[currentPeriod],
+                    risk: data.risk ? data.risk[currentPeriod] : null
                 }}))
-                .filter(a => a.perf !== null)
+                .filter(a => a.perf !== null && a.perf !== undefined)
                 .sort((a, b) => b.perf - a.perf);
 
             list.innerHTML = sorted.map(asset => {{
                 const perfClass = asset.perf >= 0 ? 'positive' : 'negative';
                 const perfSign = asset.perf >= 0 ? '+' : '';
                 const highlightClass = highlightedAsset === asset.symbol ? ' highlighted' : '';
+                const riskText = formatRisk(asset.risk);
                 let opacity = '1';
                 if (highlightedAsset && highlightedAsset !== asset.symbol) {{ opacity = '0.4'; }}
 
@@ -563,7 +1164,7 @@ def generate_html():
                     <li class="stats-item${{highlightClass}}" data-symbol="${{asset.symbol}}" style="opacity:${{opacity}}">
                         <div class="stats-asset">
                             <div class="stats-dot" style="background: ${{asset.color}}"></div>
-                            <span class="stats-name">${{asset.name}}<span class="stats-symbol"> ${{asset.symbol}}</span></span>
+                            <span class="stats-name">${{asset.name}}<span class="stats-symbol"> ${{asset.symbol}}</span>${{riskText ? `<span class="stats-risk">${{riskText}}</span>` : ''}}</span>
                         </div>
                         <span class="stats-perf ${{perfClass}}">${{perfSign}}${{asset.perf}}%</span>
                     </li>
@@ -579,8 +1180,98 @@ def generate_html():
                     updateStats();
                 }});
             }});
+
+            updateCorrelation();
+        }}
+
+        /* ====== CORRELATION ====== */
+        const corrCache = {{}};
+
+        // 상삼각(대각 포함) int8 base64 → n × n 행렬 (×100, -128은 값 없음)
+        function correlationMatrix(period) {{
+            if (!CORRELATION || !CORRELATION.periods[period]) return null;
+            if (!corrCache[period]) {{
+                const n = CORRELATION.symbols.length;
+                const bytes = atob(CORRELATION.periods[period].q);
+                const matrix = new Int8Array(n * n);
+                let pos = 0;
+                for (let i = 0; i < n; i++) {{
+                    for (let j = i; j < n; j++) {{
+                        const v = (bytes.charCodeAt(pos++) << 24) >> 24;
+                        matrix[i * n + j] = v;
+                        matrix[j * n + i] = v;
+                    }}
+                }}
+                corrCache[period] = matrix;
+            }}
+            return corrCache[period];
+        }}
+
+        function corrColor(v) {{
+            if (v === -128) return '#111111';
+            const alpha = Math.abs(v) / 100;
+            return v >= 0 ? `rgba(34,211,238,${{alpha}})` : `rgba(239,68,68,${{alpha}})`;
+        }}
+
+        function updateCorrelation() {{
+            const section = document.getElementById('corr-section');
+            const matrix = correlationMatrix(currentPeriod);
+            if (!matrix) {{ section.style.display = 'none'; return; }}
+            section.style.display = '';
+            document.getElementById('corr-period').textContent = currentPeriod;
+
+            const symbols = CORRELATION.symbols;
+            const n = symbols.length;
+            const canvas = document.getElementById('corrChart');
+            const size = canvas.clientWidth || 240;
+            const ratio = window.devicePixelRatio || 1;
+            canvas.width = canvas.height = Math.round(size * ratio);
+            const ctx = canvas.getContext('2d');
+            ctx.setTransform(ratio, 0, 0, ratio, 0, 0);
+            ctx.clearRect(0, 0, size, size);
+
+            const cell = size / n;
+            const h = symbols.indexOf(highlightedAsset);
+            for (let i = 0; i < n; i++) {{
+                for (let j = 0; j < n; j++) {{
+                    ctx.globalAlpha = h < 0 || i === h || j === h ? 1 : 0.35;
+                    ctx.fillStyle = corrColor(matrix[i * n + j]);
+                    ctx.fillRect(j * cell, i * cell, Math.ceil(cell), Math.ceil(cell));
+                }}
+            }}
+            ctx.globalAlpha = 1;
         }}
 
+        function corrCellAt(event) {{
+            const rect = document.getElementById('corrChart').getBoundingClientRect();
+            const n = CORRELATION.symbols.length;
+            const i = Math.floor((event.clientY - rect.top) / rect.height * n);
+            const j = Math.floor((event.clientX - rect.left) / rect.width * n);
+            return i >= 0 && i < n && j >= 0 && j < n ? [i, j] : null;
+        }}
+
+        const corrCanvas = document.getElementById('corrChart');
+        corrCanvas.addEventListener('mousemove', event => {{
+            const info = document.getElementById('corr-info');
+            const matrix = correlationMatrix(currentPeriod);
+            const cellAt = matrix && corrCellAt(event);
+            if (!cellAt) {{ info.textContent = ''; return; }}
+            const [i, j] = cellAt;
+            const v = matrix[i * CORRELATION.symbols.length + j];
+            info.textContent = `${{CORRELATION.symbols[i]}} × ${{CORRELATION.symbols[j]}}  ${{v === -128 ? '-' : (v / 100).toFixed(2)}}`;
+        }});
+        corrCanvas.addEventListener('mouseleave', () => {{
+            document.getElementById('corr-info').textContent = '';
+        }});
+        corrCanvas.addEventListener('click', event => {{
+            const cellAt = correlationMatrix(currentPeriod) && corrCellAt(event);
+            if (!cellAt) return;
+            const symbol = CORRELATION.symbols[cellAt[0]];
+            highlightedAsset = highlightedAsset === symbol ? null : symbol;
+            updateChart();
+            updateStats();
+        }});
+
         document.querySelectorAll('.period-btn').forEach(btn => {{
             btn.addEventListener('click', () => {{
                 document.querySelectorAll('.period-btn').forEach(b => b.classList.remove('active'));
@@ -600,21 +1291,45 @@ def generate_html():
                     chart.options.layout.padding.right = isMobile ? 5 : 85;
                     chart.update('none');
                 }}
+                updateCorrelation();
             }}, 200);
         }});
 
-        updateChart();
-        updateStats();
+        loadMeta().then(() => {{
+            updateChart();
+            updateStats();
+            prefetchWhenIdle();
+        }});
     </script>
 </body>
 </html>'''
-    
-    output_path = Path(__file__).parent.parent / "index.html"
-    with open(output_path, "w", encoding="utf-8") as f:
-        f.write(html)
-    
-    print(f"✅ HTML 생성 완료: {output_path}")
+
+
+def build_parser(add_help=True):
+    """HTML 생성 옵션 파서 (pipeline.py가 parents로 재사용)"""
+    parser = argparse.ArgumentParser(description="차트 HTML 생성", add_help=add_help)
+    parser.add_argument("--max-points", type=point_budget, default=POINT_BUDGET,
+                        help=f"기간별 시리즈당 최대 점 수, 0이면 다운샘플링 안 함, 그 외엔 6 이상 (기본 {POINT_BUDGET})")
+    parser.add_argument("--shards", action="store_true",
+                        help="데이터를 내용 해시가 붙은 기간별 샤드(data/shards/)로 분리하고 페이지는 필요할 때 불러옴")
+    parser.add_argument("--calendar", choices=CALENDARS, default=DEFAULT_CALENDAR,
+                        help="차트 날짜 축: union(모든 자산 날짜) 또는 business(평일만, 주말 bar는 다음 평일에 반영) (기본 union)")
+    parser.add_argument("--no-compress", action="store_true",
+                        help="미리 압축한 .gz/.br을 만들지 않음 (이전 압축 파일은 삭제)")
+    return parser
+
+
+def parse_args(argv=None):
+    parser = build_parser()
+    metrics.add_arguments(parser)
+    return parser.parse_args(argv)
 
 
 if __name__ == "__main__":
-    generate_html()
+    args = parse_args()
+    metrics.enabled = args.metrics_dir is not None
+    try:
+        generate_html(max_points=args.max_points, shards=args.shards,
+                      compress=not args.no_compress, calendar=args.calendar)
+    finally:
+        metrics.write_report(args.metrics_dir, extra={"peakRssMb": round(peak_rss_mb(), 1)})
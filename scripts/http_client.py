@@ -0,0 +1,191 @@
+"""
+공유 HTTP 클라이언트
+- 연결 풀을 쓰는 requests.Session 하나를 모든 요청이 같이 사용
+- URL + 파라미터 기준 디스크 응답 캐시 (TTL, ETag / Last-Modified 조건부 요청)
+- 재실행 시 TTL 안의 응답은 네트워크 없이 캐시에서 바로 반환
+- requests는 실제로 네트워크 요청을 할 때 불러옴 (캐시만 쓰거나 수집하지 않는 실행은 import 비용 없음)
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from pathlib import Path
+
+import metrics
+from rate_limit import RETRY_STATUSES, backoff_delay, parse_retry_after
+
+CACHE_DIR = Path(__file__).parent.parent / ".cache" / "http"
+CACHE_TTL = 6 * 60 * 60  # 초
+
+POOL_SIZE = 16
+
+_session = None
+_session_lock = threading.Lock()
+
+_stats = {"hit": 0, "revalidated": 0, "miss": 0}
+_stats_lock = threading.Lock()
+
+# 캐시를 끄면 (예: --no-cache) 항상 네트워크로 요청
+cache_enabled = True
+
+
+def get_session():
+    """프로세스 전체에서 공유하는 연결 풀 세션"""
+    global _session
+    with _session_lock:
+        if _session is None:
+            import requests
+            from requests.adapters import HTTPAdapter
+
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=POOL_SIZE, pool_maxsize=POOL_SIZE)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            _session = session
+        return _session
+
+
+def _count(kind):
+    with _stats_lock:
+        _stats[kind] += 1
+
+
+def cache_stats():
+    """{hit, revalidated, miss} 카운트 사본"""
+    with _stats_lock:
+        return dict(_stats)
+
+
+def cache_key(*parts):
+    """임의의 JSON 직렬화 가능한 값들로 캐시 키 만들기"""
+    raw = json.dumps(parts, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def _cache_path(key):
+    return CACHE_DIR / key[:2] / f"{key}.json"
+
+
+def _read_entry(key):
+    path = _cache_path(key)
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_entry(key, entry):
+    path = _cache_path(key)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(entry, f, ensure_ascii=False)
+    os.replace(tmp, path)
+
+
+def _request(url, params, headers, timeout, limiter, retries):
+    """레이트 리밋을 지키며 요청, 429/5xx/연결 오류는 지수 백오프로 재시도"""
+    session = get_session()
+    import requests
+
+    for attempt in range(retries + 1):
+        if limiter is not None:
+            limiter.acquire()
+
+        try:
+            response = session.get(url, params=params, headers=headers, timeout=timeout)
+        except (requests.ConnectionError, requests.Timeout) as e:
+            if attempt == retries:
+                raise
+            delay = backoff_delay(attempt)
+            metrics.add("retries")
+            print(f"  ⏳ 연결 오류 ({e.__class__.__name__}), {delay:.1f}초 후 재시도 ({attempt + 1}/{retries})")
+            time.sleep(delay)
+            continue
+
+        if response.status_code not in RETRY_STATUSES or attempt == retries:
+            return response
+
+        if response.status_code == 429 and limiter is not None:
+            limiter.drain()
+        delay = backoff_delay(attempt, retry_after=parse_retry_after(response.headers.get("Retry-After")))
+        metrics.add("retries")
+        print(f"  ⏳ HTTP {response.status_code}, {delay:.1f}초 후 재시도 ({attempt + 1}/{retries})")
+        time.sleep(delay)
+
+
+def get_json(url, params=None, ttl=CACHE_TTL, timeout=30, limiter=None, retries=0):
+    """GET 요청 후 JSON 반환 (디스크 캐시 사용)
+
+    - TTL 안의 캐시: 네트워크 없이 반환 (hit)
+    - TTL이 지났지만 ETag / Last-Modified가 있으면 조건부 요청, 304면 캐시 재사용 (revalidated)
+    - 그 외: 새로 받아서 캐시에 저장 (miss)
+    limiter(TokenBucket)가 있으면 네트워크 요청마다 토큰을 쓰고, 캐시 hit은 토큰을 쓰지 않는다.
+    재시도가 다 떨어진 HTTP 오류는 requests.HTTPError로 그대로 올라간다.
+    """
+    key = cache_key("GET", url, params or {})
+    entry = _read_entry(key) if cache_enabled else None
+
+    if entry and time.time() - entry["fetched_at"] < ttl:
+        _count("hit")
+        return entry["body"]
+
+    headers = {}
+    if entry:
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+
+    response = _request(url, params, headers, timeout, limiter, retries)
+    metrics.add("bytes", len(response.content))
+
+    if entry and response.status_code == 304:
+        entry["fetched_at"] = time.time()
+        _write_entry(key, entry)
+        _count("revalidated")
+        return entry["body"]
+
+    response.raise_for_status()
+    body = response.json()
+    _count("miss")
+
+    if cache_enabled:
+        _write_entry(key, {
+            "url": url,
+            "params": params or {},
+            "fetched_at": time.time(),
+            "etag": response.headers.get("ETag"),
+            "last_modified": response.headers.get("Last-Modified"),
+            "body": body,
+        })
+    return body
+
+
+def cached_call(key, fn, ttl=CACHE_TTL, cacheable=None):
+    """HTTP를 직접 다루지 않는 라이브러리 호출(yfinance 등) 결과를 같은 디스크 캐시에 저장
+
+    fn()의 결과는 JSON 직렬화 가능해야 한다. None이거나 cacheable(결과)가
+    거짓이면 (예: 일부 심볼 실패) 캐시하지 않아서 재실행 때 다시 요청한다.
+    """
+    entry = _read_entry(key) if cache_enabled else None
+    if entry and time.time() - entry["fetched_at"] < ttl:
+        _count("hit")
+        return entry["body"]
+
+    body = fn()
+    _count("miss")
+    if cache_enabled and body is not None and (cacheable is None or cacheable(body)):
+        _write_entry(key, {"fetched_at": time.time(), "body": body})
+    return body
+
+
+def report_cache_stats():
+    stats = cache_stats()
+    total = sum(stats.values())
+    if not total:
+        return
+    print(f"🗄️ HTTP 캐시: hit {stats['hit']} · revalidated {stats['revalidated']} · miss {stats['miss']}")
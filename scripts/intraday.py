@@ -0,0 +1,311 @@
+"""
+장중 분봉 링 버퍼와 1D 기간
+- 심볼마다 24시간 분량의 bar를 담는 고정 크기 링 버퍼 (.cache/intraday/)
+  → 얼마나 오래 돌려도 메모리와 파일 크기가 그대로
+- 1D 수익률: 세션 기준가 대비, 새로 들어온 bar만 계산해서 링에 같이 저장 (이전 bar는 다시 계산하지 않음)
+  ETF는 직전 일봉 종가(가격 저장소), 암호화폐는 UTC 자정 이후 첫 bar가 기준가
+- 페이지용 출력 (data/intraday/)
+  1d.json: 지금 세션 전체 (페이지를 처음 열 때)
+  delta.json: 최근 DELTA_BATCHES번의 실행에서 새로 붙은 bar만 (페이지가 주기적으로 읽어서 이어 붙임)
+- 분봉 수집은 fetch_data.py --intraday
+"""
+
+import json
+import os
+from datetime import datetime
+from functools import lru_cache
+from pathlib import Path
+from zoneinfo import ZoneInfo
+
+import numpy as np
+
+from precompress import precompress_files
+from price_store import days_to_dates
+from serializer import dumps, load
+from streaming import json_object_stream
+
+INTRADAY_DIR = Path(__file__).parent.parent / "data" / "intraday"
+SNAPSHOT_FILE = "1d.json"
+DELTA_FILE = "delta.json"
+
+# 링 버퍼 상태 (페이지에는 필요 없어서 data/ 밖에 둠)
+RING_DIR = Path(__file__).parent.parent / ".cache" / "intraday"
+RING_FILE = "ring.npz"
+RING_MANIFEST = "manifest.json"
+RING_VERSION = 1
+
+INTRADAY_PERIOD = "1D"
+INTERVALS = {"1m": 60, "5m": 300}
+DEFAULT_INTERVAL = "5m"
+# 링 하나에 담는 시간 (암호화폐 하루 전체가 들어가는 길이)
+RING_SECONDS = 24 * 60 * 60
+
+# delta.json에 남기는 최근 배치 수 (5분 간격이면 한 시간)
+DELTA_BATCHES = 12
+
+# 소스 유형별 세션 날짜를 정하는 시간대와 1D 기준가
+SESSIONS = {
+    "etf": {"tz": "America/New_York", "base": "previous_close"},
+    "crypto": {"tz": "UTC", "base": "session_open"},
+}
+
+
+@lru_cache(maxsize=256)
+def _utc_offset(tz, hour):
+    """hour(epoch 시간 단위) 시점의 tz UTC 오프셋 (초)"""
+    return int(datetime.fromtimestamp(hour * 3600, ZoneInfo(tz)).utcoffset().total_seconds())
+
+
+def session_days(times, tz):
+    """bar 시각(epoch 초) → 세션 날짜 (1970-01-01 기준 일수)
+
+    UTC 오프셋은 마지막 bar 기준 하나만 쓴다 (서머타임은 장이 없는 새벽에 바뀜).
+    """
+    return (times + _utc_offset(tz, int(times[-1]) // 3600)) // 86400
+
+
+class IntradayRing:
+    """심볼마다 capacity개 bar를 담는 고정 크기 링 버퍼 (자산 × capacity 배열)
+
+    head[a]는 다음에 쓸 칸, count[a]는 채워진 칸 수.
+    change에는 bar마다 세션 기준가 대비 수익률(%)을 쓸 때 한 번만 계산해 둔다.
+    """
+
+    def __init__(self, symbols, interval=DEFAULT_INTERVAL, capacity=None):
+        self.symbols = list(symbols)
+        self.index = {symbol: a for a, symbol in enumerate(self.symbols)}
+        self.interval = interval
+        self.capacity = capacity or RING_SECONDS // INTERVALS[interval]
+        self.seq = 0
+        n = len(self.symbols)
+        self.times = np.zeros((n, self.capacity), dtype=np.int64)
+        self.close = np.zeros((n, self.capacity), dtype=np.float64)
+        self.change = np.full((n, self.capacity), np.nan)
+        self.head = np.zeros(n, dtype=np.int64)
+        self.count = np.zeros(n, dtype=np.int64)
+        self.session_day = np.full(n, -1, dtype=np.int64)
+        self.base = np.full(n, np.nan)
+
+    def slots(self, a, last=None):
+        """자산 a의 채워진 칸 번호 (오래된 것부터), last면 최근 last개만"""
+        count = int(self.count[a]) if last is None else min(last, int(self.count[a]))
+        return (self.head[a] - count + np.arange(count)) % self.capacity
+
+    def last_time(self, a):
+        return int(self.times[a, (self.head[a] - 1) % self.capacity]) if self.count[a] else -1
+
+    def append(self, a, times, close):
+        """시각 오름차순 bar를 이어 쓰기 → 새로 쓰거나 값이 바뀐 bar 수
+
+        마지막 bar와 시각이 같은 bar는 아직 진행 중인 bar라서 값만 바꾸고, 그보다 이른 bar는 버린다.
+        """
+        last = self.last_time(a)
+        keep = times >= last
+        times, close = times[keep], close[keep]
+        changed = 0
+        if len(times) and times[0] == last:
+            slot = (self.head[a] - 1) % self.capacity
+            if self.close[a, slot] != close[0]:
+                self.close[a, slot] = close[0]
+                changed = 1
+            times, close = times[1:], close[1:]
+
+        times, close = times[-self.capacity:], close[-self.capacity:]
+        slots = (self.head[a] + np.arange(len(times))) % self.capacity
+        self.times[a, slots] = times
+        self.close[a, slots] = close
+        self.change[a, slots] = np.nan
+        self.head[a] = (self.head[a] + len(times)) % self.capacity
+        self.count[a] = min(int(self.count[a]) + len(times), self.capacity)
+        return changed + len(times)
+
+    def reindex(self, symbols):
+        """레지스트리가 바뀌었을 때 같은 심볼의 행만 옮긴 새 링"""
+        ring = IntradayRing(symbols, self.interval, self.capacity)
+        ring.seq = self.seq
+        for symbol, a in ring.index.items():
+            old = self.index.get(symbol)
+            if old is None:
+                continue
+            for name in ("times", "close", "change", "head", "count", "session_day", "base"):
+                getattr(ring, name)[a] = getattr(self, name)[old]
+        return ring
+
+    def save(self, ring_dir=RING_DIR):
+        """배열(npz)을 먼저 교체하고 manifest를 마지막에 씀"""
+        ring_dir = Path(ring_dir)
+        ring_dir.mkdir(parents=True, exist_ok=True)
+        tmp = ring_dir / (RING_FILE + ".tmp")
+        with open(tmp, "wb") as f:
+            np.savez(f, times=self.times, close=self.close, change=self.change, head=self.head,
+                     count=self.count, session_day=self.session_day, base=self.base)
+        os.replace(tmp, ring_dir / RING_FILE)
+
+        manifest = {
+            "version": RING_VERSION,
+            "interval": self.interval,
+            "capacity": self.capacity,
+            "seq": self.seq,
+            "symbols": self.symbols,
+        }
+        tmp = ring_dir / (RING_MANIFEST + ".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=1)
+        os.replace(tmp, ring_dir / RING_MANIFEST)
+
+    @classmethod
+    def load(cls, symbols, interval=DEFAULT_INTERVAL, ring_dir=RING_DIR):
+        """저장된 링 읽기 (없거나 간격이 다르면 빈 링), 심볼 목록은 symbols에 맞춤"""
+        ring_dir = Path(ring_dir)
+        try:
+            with open(ring_dir / RING_MANIFEST, "r", encoding="utf-8") as f:
+                manifest = json.load(f)
+            arrays = np.load(ring_dir / RING_FILE)
+        except (OSError, ValueError) as e:
+            if (ring_dir / RING_MANIFEST).exists():
+                print(f"  ⚠️ 링 버퍼를 읽을 수 없음, 새로 시작: {e}")
+            return cls(symbols, interval)
+
+        if manifest.get("version") != RING_VERSION or manifest.get("interval") != interval:
+            print(f"  ♻️ 링 버퍼 간격이 달라 새로 시작 ({manifest.get('interval')} → {interval})")
+            return cls(symbols, interval)
+
+        ring = cls(manifest["symbols"], interval, manifest["capacity"])
+        ring.seq = manifest["seq"]
+        for name in ("times", "close", "change", "head", "count", "session_day", "base"):
+            setattr(ring, name, arrays[name])
+        return ring if ring.symbols == list(symbols) else ring.reindex(symbols)
+
+
+# ============================================
+# 링 갱신과 1D 수익률
+# ============================================
+
+def previous_close(columns, symbol, day):
+    """가격 저장소에서 day 이전 마지막 일봉 종가 (없으면 NaN)"""
+    if symbol not in columns:
+        return np.nan
+    days, close = columns[symbol]
+    i = int(np.searchsorted(days, day)) - 1
+    return float(close[i]) if i >= 0 else np.nan
+
+
+def session_series(ring, a, tz, last=None):
+    """자산 a의 현재 세션 bar 칸 번호 (last면 최근 last개 중에서)"""
+    slots = ring.slots(a, last)
+    if not len(slots) or ring.session_day[a] < 0:
+        return slots[:0]
+    return slots[session_days(ring.times[a, slots], tz) == ring.session_day[a]]
+
+
+def update_ring(ring, fetched, registry, columns):
+    """수집한 bar를 링에 붙이고 새 bar의 1D 수익률만 계산 → 이번 배치 {심볼: {"t", "y"[, "reset"]}}
+
+    세션이 바뀐 자산은 기준가를 새로 정하고 세션 전체를 reset으로 보낸다.
+    """
+    batch = {}
+    for symbol, bars in fetched.items():
+        a = ring.index.get(symbol)
+        if bars is None or a is None or not len(bars[0]):
+            continue
+        times, close = bars
+        session = SESSIONS.get(registry[symbol]["type"], SESSIONS["crypto"])
+        day = int(session_days(times, session["tz"])[-1])
+
+        changed = ring.append(a, times, close)
+        reset = day > ring.session_day[a]
+        if not changed and not reset:
+            continue
+
+        if reset:
+            ring.session_day[a] = day
+            ring.base[a] = previous_close(columns, symbol, day) if session["base"] == "previous_close" else np.nan
+            slots = session_series(ring, a, session["tz"])
+            if not len(slots):
+                continue
+            if not np.isfinite(ring.base[a]):
+                ring.base[a] = ring.close[a, slots[0]]
+        else:
+            slots = session_series(ring, a, session["tz"], last=changed)
+            if not len(slots):
+                continue
+
+        ring.change[a, slots] = np.round((ring.close[a, slots] / ring.base[a] - 1) * 100, 2) + 0.0
+        batch[symbol] = {"t": ring.times[a, slots].tolist(), "y": ring.change[a, slots].tolist()}
+        if reset:
+            batch[symbol]["reset"] = True
+    return batch
+
+
+# ============================================
+# 페이지용 출력
+# ============================================
+
+def write_snapshot(ring, registry, last_updated, output_dir=INTRADAY_DIR):
+    """지금 세션 전체를 1d.json으로 (수익률은 링에 계산해 둔 값을 그대로 씀)"""
+    path = output_dir / SNAPSHOT_FILE
+    head = ('{"interval":' + dumps(ring.interval) + ',"seq":' + dumps(ring.seq)
+            + ',"lastUpdated":' + dumps(last_updated) + ',"assets":{')
+    with json_object_stream(path, head=head, tail="}}", compact=True) as write:
+        for symbol, a in ring.index.items():
+            session = SESSIONS.get(registry[symbol]["type"], SESSIONS["crypto"])
+            slots = session_series(ring, a, session["tz"])
+            if not len(slots):
+                continue
+            write(symbol, {
+                "session": str(days_to_dates(ring.session_day[a])),
+                "base": float(ring.base[a]),
+                "t": ring.times[a, slots].tolist(),
+                "y": ring.change[a, slots].tolist(),
+            })
+    return path
+
+
+def published_seq(output_dir=INTRADAY_DIR):
+    """이미 내보낸 delta.json의 배치 번호 (없으면 0)"""
+    try:
+        with open(output_dir / DELTA_FILE, "rb") as f:
+            return int(load(f).get("seq", 0))
+    except (OSError, ValueError, TypeError):
+        return 0
+
+
+def write_delta(ring, batch, last_updated, output_dir=INTRADAY_DIR):
+    """이전 delta.json의 배치 뒤에 이번 배치를 붙이고 최근 DELTA_BATCHES개만 남김"""
+    path = output_dir / DELTA_FILE
+    batches = []
+    try:
+        with open(path, "rb") as f:
+            previous = load(f)
+        if previous.get("interval") == ring.interval:
+            batches = [b for b in previous["batches"] if b["seq"] < ring.seq]
+    except (OSError, ValueError, KeyError):
+        pass
+    batches = (batches + [{"seq": ring.seq, "assets": batch}])[-DELTA_BATCHES:]
+
+    delta = {"interval": ring.interval, "seq": ring.seq, "lastUpdated": last_updated, "batches": batches}
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(dumps(delta))
+    os.replace(tmp, path)
+    return path
+
+
+def publish(ring, batch, registry, output_dir=INTRADAY_DIR, ring_dir=RING_DIR):
+    """배치 번호를 올리고 링 → 1d.json → delta.json 순서로 저장 (출력은 미리 압축도 함께)
+
+    링을 먼저 저장하므로 출력 중에 멈추면 다음 실행의 배치 번호가 건너뛰고,
+    페이지는 놓친 배치로 보고 1d.json을 다시 읽는다.
+    링이 캐시에서 사라져 새로 시작했어도 배치 번호는 커밋된 delta.json 다음부터 이어서
+    열려 있는 페이지의 번호보다 작아지지 않는다.
+    """
+    ring.seq = max(ring.seq, published_seq(output_dir)) + 1
+    last_updated = datetime.now().strftime("%Y-%m-%d %H:%M")
+    output_dir.mkdir(parents=True, exist_ok=True)
+    ring.save(ring_dir)
+    outputs = [
+        write_snapshot(ring, registry, last_updated, output_dir),
+        write_delta(ring, batch, last_updated, output_dir),
+    ]
+    precompress_files(outputs)
+    return outputs
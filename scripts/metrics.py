@@ -0,0 +1,183 @@
+"""
+실행 계측
+- stage(): 단계별 소요 시간 (같은 이름은 누적, 여러 스레드에서 불러도 됨)
+- fetch(): 심볼 하나의 수집 호출 — 지연 시간, 행 수, 바이트, 재시도, 실패
+  http_client는 add()로 지금 스레드의 수집 호출에 재시도/바이트를 더한다
+- write_report(): JSON 실행 리포트 + Prometheus textfile 형식으로 내보내기
+- 꺼져 있으면 (기본) 아무것도 기록하지 않고, 켜도 호출마다 perf_counter 두 번과 dict 갱신 정도
+"""
+
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+
+# --metrics-dir를 주면 켜짐
+enabled = False
+
+METRICS_DIR = Path(__file__).parent.parent / ".cache" / "metrics"
+REPORT_FILE = "run.json"
+PROM_FILE = "performance_chart.prom"
+PROM_PREFIX = "performance_chart"
+
+FETCH_FIELDS = ("seconds", "rows", "bytes", "retries", "failures", "calls")
+
+_lock = threading.Lock()
+_local = threading.local()
+_started = time.time()
+_stages = {}
+_fetches = {}
+
+
+def reset():
+    global _started
+    with _lock:
+        _started = time.time()
+        _stages.clear()
+        _fetches.clear()
+
+
+@contextmanager
+def stage(name):
+    """with stage("fetch"): ... 블록의 소요 시간을 name 단계에 누적"""
+    if not enabled:
+        yield
+        return
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - t0
+        with _lock:
+            entry = _stages.setdefault(name, {"seconds": 0.0, "calls": 0})
+            entry["seconds"] += elapsed
+            entry["calls"] += 1
+
+
+def record_fetch(source, symbol, seconds=0.0, rows=0, nbytes=0, retries=0, failed=False, batch=1):
+    """수집 결과 하나를 기록 (배치 다운로드는 배치 전체 시간을 심볼마다 기록하고 batch에 크기)"""
+    if not enabled:
+        return
+    with _lock:
+        entry = _fetches.setdefault(symbol, {"source": source, "batch": batch, **dict.fromkeys(FETCH_FIELDS, 0)})
+        entry["seconds"] += seconds
+        entry["rows"] += rows
+        entry["bytes"] += nbytes
+        entry["retries"] += retries
+        entry["failures"] += int(failed)
+        entry["calls"] += 1
+
+
+@contextmanager
+def fetch(source, symbol):
+    """수집 호출 하나를 측정
+
+    with fetch("crypto", "BTC") as call:
+        prices = ...
+        call["rows"] = len(prices)
+    블록 안에서 예외가 나거나 call["failed"]를 참으로 두면 실패로 센다.
+    """
+    if not enabled:
+        yield {}
+        return
+    call = {"rows": 0, "bytes": 0, "retries": 0, "failed": False}
+    previous = getattr(_local, "call", None)
+    _local.call = call
+    t0 = time.perf_counter()
+    try:
+        yield call
+    except BaseException:
+        call["failed"] = True
+        raise
+    finally:
+        _local.call = previous
+        record_fetch(source, symbol, time.perf_counter() - t0, call["rows"], call["bytes"],
+                     call["retries"], call["failed"])
+
+
+def add(key, n=1):
+    """지금 스레드에서 진행 중인 fetch() 호출의 카운터 증가 (없으면 무시)"""
+    call = getattr(_local, "call", None)
+    if call is not None:
+        call[key] += n
+
+
+def report(extra=None):
+    """실행 리포트 dict"""
+    with _lock:
+        stages = {name: dict(entry) for name, entry in _stages.items()}
+        fetches = {symbol: dict(entry) for symbol, entry in _fetches.items()}
+    totals = {field: sum(entry[field] for entry in fetches.values()) for field in FETCH_FIELDS if field != "seconds"}
+    for entry in stages.values():
+        entry["seconds"] = round(entry["seconds"], 4)
+    for entry in fetches.values():
+        entry["seconds"] = round(entry["seconds"], 4)
+    return {
+        "startedAt": datetime.fromtimestamp(_started).isoformat(timespec="seconds"),
+        "seconds": round(time.time() - _started, 3),
+        "stages": stages,
+        "fetchTotals": totals,
+        "fetches": fetches,
+        **(extra or {}),
+    }
+
+
+def _label(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def to_prometheus(data):
+    """리포트 dict → Prometheus textfile 형식"""
+    lines = []
+
+    def metric(name, help_text, samples):
+        lines.append(f"# HELP {PROM_PREFIX}_{name} {help_text}")
+        lines.append(f"# TYPE {PROM_PREFIX}_{name} gauge")
+        for labels, value in samples:
+            label_text = ",".join(f'{key}="{_label(v)}"' for key, v in labels.items())
+            lines.append(f"{PROM_PREFIX}_{name}{{{label_text}}} {value}" if labels else f"{PROM_PREFIX}_{name} {value}")
+
+    metric("run_timestamp_seconds", "Unix time the run started", [({}, round(_started, 3))])
+    metric("run_seconds", "Wall time of the run", [({}, data["seconds"])])
+    metric("stage_seconds", "Wall time spent per stage",
+           [({"stage": name}, entry["seconds"]) for name, entry in data["stages"].items()])
+    fetches = data["fetches"].items()
+    for field, help_text in (
+        ("seconds", "Fetch latency per symbol (batch latency for batched downloads)"),
+        ("rows", "Price rows returned per symbol"),
+        ("bytes", "Response bytes per symbol (0 when not observable)"),
+        ("retries", "HTTP retries per symbol"),
+        ("failures", "Failed fetches per symbol"),
+    ):
+        metric(f"fetch_{field}", help_text,
+               [({"source": entry["source"], "symbol": symbol}, entry[field]) for symbol, entry in fetches])
+    return "\n".join(lines) + "\n"
+
+
+def _write_atomic(path, text):
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(tmp, path)
+
+
+def write_report(metrics_dir=METRICS_DIR, extra=None):
+    """JSON 리포트와 Prometheus textfile 저장 (node_exporter textfile collector가 읽을 수 있게 원자적으로 교체)"""
+    if not enabled:
+        return None
+    metrics_dir = Path(metrics_dir)
+    metrics_dir.mkdir(parents=True, exist_ok=True)
+    data = report(extra)
+    _write_atomic(metrics_dir / REPORT_FILE, json.dumps(data, ensure_ascii=False, indent=1) + "\n")
+    _write_atomic(metrics_dir / PROM_FILE, to_prometheus(data))
+    print(f"📏 계측 리포트: {metrics_dir / REPORT_FILE}, {metrics_dir / PROM_FILE}")
+    return data
+
+
+def add_arguments(parser):
+    parser.add_argument("--metrics-dir", type=Path, nargs="?", const=METRICS_DIR, default=None,
+                        help=f"단계별/심볼별 계측을 켜고 JSON 리포트와 Prometheus textfile을 저장 "
+                             f"(경로 생략 시 {METRICS_DIR.relative_to(METRICS_DIR.parent.parent)})")
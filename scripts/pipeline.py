@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+수집 → HTML 생성을 한 프로세스에서 실행
+- 수집 결과를 메모리에 둔 채로 HTML 생성에 넘겨서 performance.json을 다시 읽지 않음
+- 단계별 입력 지문을 .cache/pipeline.json에 남기고, 입력이 그대로면 그 단계를 건너뜀
+  - 수집: 레지스트리 내용 + 기간 옵션이 같고 마지막 수집이 --fetch-interval분 이내
+  - HTML 생성: performance.json·correlation.json 내용 + 생성 코드 + 옵션 + 오늘 날짜가 같고 결과 파일이 있음
+- 수집한 가격/성과가 이전 실행과 같고 (lastUpdated 제외) HTML 생성 입력도 그대로면 아무것도 쓰지 않고 EXIT_UNCHANGED로 종료
+- fetch_data.py / generate_html.py는 지금처럼 따로 실행해도 된다
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import sys
+import time
+from datetime import date
+from pathlib import Path
+
+import fetch_data
+import generate_html
+import metrics
+from correlation import CORRELATION_PATH
+from fetch_data import EXIT_UNCHANGED, UnchangedData
+from http_client import cache_key
+from intraday import INTRADAY_DIR, SNAPSHOT_FILE
+
+STATE_PATH = Path(__file__).parent.parent / ".cache" / "pipeline.json"
+
+# 마지막 수집 뒤 이 시간(분) 안에는 입력이 같으면 다시 수집하지 않음
+FETCH_INTERVAL = 60
+
+# HTML 결과에 영향을 주는 코드 (바뀌면 다시 생성)
+RENDER_SOURCES = [
+    Path(__file__).parent / name
+    for name in ("generate_html.py", "compact_encoding.py", "downsample.py", "streaming.py", "correlation.py",
+                 "precompress.py", "intraday.py", "alignment.py")
+]
+
+
+def file_digest(path):
+    """파일 내용의 sha256 (없으면 None)"""
+    try:
+        with open(path, "rb") as f:
+            return hashlib.file_digest(f, "sha256").hexdigest()
+    except FileNotFoundError:
+        return None
+
+
+def load_state(path=STATE_PATH):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_state(state, path=STATE_PATH):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(state, f, ensure_ascii=False, indent=1)
+    os.replace(tmp, path)
+
+
+def fetch_inputs(args):
+    return cache_key("fetch", file_digest(args.registry), sorted(args.window))
+
+
+def render_inputs(args):
+    return cache_key(
+        "render",
+        file_digest(fetch_data.OUTPUT_PATH),
+        file_digest(CORRELATION_PATH),
+        (INTRADAY_DIR / SNAPSHOT_FILE).exists(),
+        [file_digest(path) for path in RENDER_SOURCES],
+        args.max_points,
+        args.shards,
+        args.no_compress,
+        args.calendar,
+        date.today().isoformat(),
+    )
+
+
+def render_outputs_exist(args):
+    if not generate_html.OUTPUT_PATH.exists():
+        return False
+    return not args.shards or (generate_html.SHARD_DIR / "manifest.json").exists()
+
+
+def should_fetch(args, state):
+    if args.force or args.full_refresh:
+        return True
+    last = state.get("fetch", {})
+    fresh = time.time() - last.get("at", 0) < args.fetch_interval * 60
+    return not (fresh and last.get("inputs") == fetch_inputs(args) and fetch_data.OUTPUT_PATH.exists())
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description="수집 → HTML 생성 파이프라인",
+        parents=[fetch_data.build_parser(add_help=False), generate_html.build_parser(add_help=False)],
+    )
+    parser.add_argument("--fetch-interval", type=float, default=FETCH_INTERVAL,
+                        help=f"입력이 같을 때 다시 수집하지 않는 시간(분) (기본 {FETCH_INTERVAL})")
+    parser.add_argument("--force", action="store_true",
+                        help="입력이 그대로여도 모든 단계를 실행")
+    metrics.add_arguments(parser)
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    args.force_write = args.force_write or args.force
+    metrics.enabled = args.metrics_dir is not None
+    metrics.reset()
+    try:
+        run(args)
+    finally:
+        metrics.write_report(args.metrics_dir, extra=fetch_data.run_metrics())
+
+
+def run(args):
+    """입력이 바뀐 단계만 실행"""
+    state = load_state()
+
+    # source가 None이면 generate_html이 performance.json을 직접 읽음
+    source = last_updated = None
+    if should_fetch(args, state):
+        try:
+            last_updated, dataset = fetch_data.run(args, keep=True)
+            source = generate_html.memory_source(dataset)
+        except UnchangedData:
+            # 데이터는 그대로여도 생성 코드/옵션이 바뀌었거나 페이지가 없으면 아래에서 다시 생성
+            print("⏭️ 데이터가 그대로: 저장된 performance.json으로 HTML 생성 여부 확인")
+        state["fetch"] = {"inputs": fetch_inputs(args), "at": time.time()}
+        save_state(state)
+    else:
+        print(f"⏭️ 수집 건너뜀: 입력이 그대로이고 {args.fetch_interval:g}분 안에 수집함")
+
+    inputs = render_inputs(args)
+    if args.force or state.get("render", {}).get("inputs") != inputs or not render_outputs_exist(args):
+        print("\n🔧 HTML 생성")
+        generate_html.generate_html(
+            max_points=args.max_points,
+            shards=args.shards,
+            compress=not args.no_compress,
+            calendar=args.calendar,
+            source=source,
+            last_updated=last_updated,
+        )
+        state["render"] = {"inputs": inputs, "at": time.time()}
+        save_state(state)
+    else:
+        print("⏭️ HTML 생성 건너뜀: performance.json과 생성 옵션이 그대로")
+        if source is None:
+            # 수집을 건너뛰었거나 데이터가 그대로였으면 이번 실행에서 쓴 파일이 없음
+            sys.exit(EXIT_UNCHANGED)
+
+
+if __name__ == "__main__":
+    main()
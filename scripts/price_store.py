@@ -0,0 +1,244 @@
+"""
+컬럼형 가격 저장소
+- 심볼별 [{"date", "price"}] 리스트 대신 int32 일수 배열 + float64 종가 배열
+- 모든 심볼을 이어 붙인 days / close 두 .npy 파일과 작은 manifest.json으로 저장
+  데이터 파일은 세대마다 다른 이름(days.<세대>.npy)으로 쓰고 manifest가 가리킴
+- np.load(mmap_mode="r")로 열기 때문에 JSON 파싱이나 bar 단위 객체 생성 없이 읽힘
+- 커밋하지 않는 .cache/store/에 둠 (비어 있으면 fetch_data가 performance.json에서 다시 채움)
+"""
+
+import json
+import os
+import shutil
+from pathlib import Path
+
+import numpy as np
+
+STORE_DIR = Path(__file__).parent.parent / ".cache" / "store"
+STORE_VERSION = 1
+
+DAYS_FILE = "days.npy"
+CLOSE_FILE = "close.npy"
+MANIFEST_FILE = "manifest.json"
+
+# 종가는 소수 둘째 자리로 반올림해서 저장 → 1센트 차이는 재계산으로 보지 않음
+RESTATE_TOLERANCE = 0.011
+
+
+def dates_to_days(dates):
+    """'YYYY-MM-DD' 문자열 → 1970-01-01 기준 일수 (int32)"""
+    return np.asarray(dates, dtype="datetime64[D]").astype(np.int32)
+
+
+def days_to_dates(days):
+    """1970-01-01 기준 일수 → 'YYYY-MM-DD' 문자열 배열"""
+    return np.datetime_as_string(np.asarray(days, dtype="datetime64[D]"), unit="D")
+
+
+def prices_to_columns(prices):
+    """[{"date", "price"}] 리스트 → (days, close) 배열"""
+    if not prices:
+        return np.empty(0, dtype=np.int32), np.empty(0, dtype=np.float64)
+    days = dates_to_days([p["date"] for p in prices])
+    close = np.fromiter((p["price"] for p in prices), dtype=np.float64, count=len(prices))
+    return days, close
+
+
+def columns_to_prices(days, close):
+    """(days, close) 배열 → 페이지용 [{"date", "price"}] 리스트"""
+    return [
+        {"date": date, "price": price}
+        for date, price in zip(days_to_dates(days).tolist(), np.asarray(close).tolist())
+    ]
+
+
+def versioned_name(name, generation):
+    """'days.npy' → 'days.<세대>.npy'"""
+    stem, suffix = os.path.splitext(name)
+    return f"{stem}.{generation}{suffix}"
+
+
+def read_manifest(directory, name=MANIFEST_FILE):
+    """디렉터리의 manifest (없거나 깨졌으면 빈 dict)"""
+    try:
+        with open(Path(directory) / name, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def write_manifest(directory, manifest, name=MANIFEST_FILE):
+    tmp = Path(directory) / (name + ".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=1)
+    os.replace(tmp, Path(directory) / name)
+
+
+def remove_stale_generations(directory, names, keep):
+    """names(기본 이름)의 세대 파일 중 keep에 없는 것 삭제 (세대 없는 예전 이름 포함)"""
+    for name in names:
+        stem, suffix = os.path.splitext(name)
+        for path in Path(directory).glob(f"{stem}*{suffix}"):
+            if path.name not in keep:
+                path.unlink(missing_ok=True)
+
+
+def merge_columns(stored, fetched, cutoff_day=None):
+    """저장된 (days, close)에 새로 받은 구간을 합치기
+
+    겹치는 날짜는 새 값으로 덮어쓰고, cutoff_day 이전 bar는 잘라낸다.
+    """
+    parts = [c for c in (fetched, stored) if c is not None and len(c[0])]
+    if not parts:
+        return np.empty(0, dtype=np.int32), np.empty(0, dtype=np.float64)
+
+    all_days = np.concatenate([p[0] for p in parts]).astype(np.int32, copy=False)
+    all_close = np.concatenate([p[1] for p in parts]).astype(np.float64, copy=False)
+
+    # np.unique는 첫 등장 위치를 돌려주므로 앞에 둔 fetched 값이 우선함
+    days, index = np.unique(all_days, return_index=True)
+    close = all_close[index]
+
+    if cutoff_day is not None:
+        keep = days >= cutoff_day
+        days, close = days[keep], close[keep]
+
+    return days, close
+
+
+def restated(stored, fetched, tolerance=RESTATE_TOLERANCE):
+    """저장된 종가가 새로 받은 구간과 겹치는 날짜에서 달라졌는지
+
+    수정 종가(auto_adjust)는 배당/분할이 생기면 과거 전체가 다시 계산되는데
+    증분 수집은 겹치는 몇 bar만 덮어써서 이전 기준 값과 새 기준 값이 섞인다.
+    저장본의 마지막 bar는 장중에 받은 값일 수 있어서 비교하지 않는다.
+    """
+    if stored is None or fetched is None or len(stored[0]) < 2 or not len(fetched[0]):
+        return False
+    _, mine, theirs = np.intersect1d(stored[0][:-1], fetched[0], return_indices=True)
+    diff = np.abs(np.asarray(stored[1])[mine] - np.asarray(fetched[1])[theirs])
+    return bool(np.any(diff > tolerance))
+
+
+class StoreWriter:
+    """심볼을 하나씩 이어 쓰는 저장소 writer
+
+    bar 데이터는 바로 임시 파일로 흘려보내서 메모리에는 manifest용
+    심볼별 offset/length만 남는다. close()에서 .npy 헤더를 붙여 새 세대 이름으로 저장하고
+    manifest를 마지막에 바꾼다. 기존 파일을 덮어쓰지 않으므로 manifest 하나를 읽은 쪽은
+    그 manifest의 배열 쌍만 본다 (새 배열과 이전 offset이 섞이지 않음).
+    직전 세대 파일은 한 번 더 남겨 두어 이전 manifest를 막 읽은 쪽도 파일을 열 수 있다.
+    중간에 예외가 나면 임시 파일만 지우고 기존 저장소는 그대로 둔다.
+    """
+
+    def __init__(self, store_dir=STORE_DIR, last_updated=None):
+        self.store_dir = Path(store_dir)
+        self.last_updated = last_updated
+        self.store_dir.mkdir(parents=True, exist_ok=True)
+        self.symbols = {}
+        self.rows = 0
+        self._previous = read_manifest(self.store_dir)
+        self.generation = self._previous.get("generation", 0) + 1
+        self._names = {name: versioned_name(name, self.generation) for name in (DAYS_FILE, CLOSE_FILE)}
+        self._raw = {
+            DAYS_FILE: (self.store_dir / (DAYS_FILE + ".raw"), np.dtype(np.int32)),
+            CLOSE_FILE: (self.store_dir / (CLOSE_FILE + ".raw"), np.dtype(np.float64)),
+        }
+        self._files = {name: open(path, "wb") for name, (path, _) in self._raw.items()}
+
+    def add(self, symbol, days, close):
+        """심볼 하나의 (days, close)를 이어 쓰기"""
+        days = np.ascontiguousarray(days, dtype=np.int32)
+        close = np.ascontiguousarray(close, dtype=np.float64)
+        if len(days) != len(close):
+            raise ValueError(f"{symbol}: days/close 길이가 다름 ({len(days)} != {len(close)})")
+        self._files[DAYS_FILE].write(days.tobytes())
+        self._files[CLOSE_FILE].write(close.tobytes())
+        self.symbols[symbol] = {"offset": self.rows, "length": len(days)}
+        self.rows += len(days)
+
+    def close(self):
+        for f in self._files.values():
+            f.close()
+
+        # raw 바이트 앞에 .npy 헤더를 붙여서 mmap으로 열 수 있는 파일로 교체
+        for name, (raw_path, dtype) in self._raw.items():
+            tmp = self.store_dir / (self._names[name] + ".tmp")
+            header = {
+                "descr": np.lib.format.dtype_to_descr(dtype),
+                "fortran_order": False,
+                "shape": (self.rows,),
+            }
+            with open(tmp, "wb") as out, open(raw_path, "rb") as raw:
+                np.lib.format.write_array_header_1_0(out, header)
+                shutil.copyfileobj(raw, out)
+            os.replace(tmp, self.store_dir / self._names[name])
+            raw_path.unlink()
+
+        files = {"days": self._names[DAYS_FILE], "close": self._names[CLOSE_FILE]}
+        manifest = {
+            "version": STORE_VERSION,
+            "generation": self.generation,
+            "epoch": "1970-01-01",
+            "lastUpdated": self.last_updated,
+            "rows": self.rows,
+            "files": files,
+            "symbols": self.symbols,
+        }
+        write_manifest(self.store_dir, manifest)
+
+        # 새 세대와 직전 세대만 남김
+        keep = {*files.values(), *self._previous.get("files", {}).values()}
+        remove_stale_generations(self.store_dir, (DAYS_FILE, CLOSE_FILE), keep)
+        return self.store_dir
+
+    def abort(self):
+        for f in self._files.values():
+            f.close()
+        for raw_path, _ in self._raw.values():
+            raw_path.unlink(missing_ok=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+        return False
+
+
+def store_matches(last_updated, store_dir=STORE_DIR):
+    """저장소가 lastUpdated가 같은 performance.json과 같은 실행에서 쓴 것인지"""
+    return last_updated is not None and read_manifest(store_dir).get("lastUpdated") == last_updated
+
+
+def load_store(store_dir=STORE_DIR, mmap=True):
+    """저장소 열기 → {심볼: (days, close)}
+
+    mmap=True면 반환되는 배열은 메모리 맵 파일의 슬라이스(뷰)라서
+    실제로 접근하는 구간만 디스크에서 읽힌다. 저장소가 없으면 빈 dict.
+    """
+    store_dir = Path(store_dir)
+    manifest_path = store_dir / MANIFEST_FILE
+    if not manifest_path.exists():
+        return {}
+
+    with open(manifest_path, "r", encoding="utf-8") as f:
+        manifest = json.load(f)
+
+    if manifest.get("version") != STORE_VERSION:
+        raise ValueError(f"지원하지 않는 저장소 버전: {manifest.get('version')}")
+
+    # 빈 배열은 메모리 맵을 만들 수 없으므로 그냥 읽는다
+    mode = "r" if mmap and manifest["rows"] else None
+    all_days = np.load(store_dir / manifest["files"]["days"], mmap_mode=mode)
+    all_close = np.load(store_dir / manifest["files"]["close"], mmap_mode=mode)
+
+    columns = {}
+    for symbol, span in manifest["symbols"].items():
+        start, end = span["offset"], span["offset"] + span["length"]
+        columns[symbol] = (all_days[start:end], all_close[start:end])
+
+    return columns
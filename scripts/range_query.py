@@ -0,0 +1,313 @@
+#!/usr/bin/env python3
+"""
+임의 기간 수익률 질의 (누적 로그 수익률 + 날짜 인덱스)
+- 처음 질의할 때 가격 저장소로 두 배열을 만들어 .cache/range_index/에 저장 (커밋하지 않음)
+  저장소가 바뀌면 (세대/파일이 다르면) 다음 질의에서 다시 만든다
+  - cumlog.npy: 자산별 누적 로그 수익률 log(p_k / p_0)을 저장소 순서대로 이어 붙인 배열
+  - counts.npy: (달력 일수 + 1) × 자산 int32 — 그 날까지의 bar 수 (행 0은 첫날 전날)
+- 기간 [시작, 끝]의 수익률 = 시작일 이후 첫 bar ~ 끝일 이전 마지막 bar (calculate_performance와 같은 규칙)
+  → 날짜 - 첫날로 counts 행 두 개를 읽고, cumlog 두 값을 빼서 exp - 1 (탐색 없음)
+- 결과는 로그/지수 변환을 거쳐서 calculate_performance와 1e-12 수준으로 다를 수 있다
+  (소수 2자리 반올림 경계에 딱 걸리는 드문 경우에만 0.01 차이)
+
+사용법:
+  python scripts/range_query.py --since 2025-01-01                       # 모든 자산
+  python scripts/range_query.py --start 2025-01-01 --end 2025-06-30 SPY BTC
+  python scripts/range_query.py --queries ranges.csv --json              # 한 줄에 "시작,끝" — 질의 × 모든 자산
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from datetime import date
+from pathlib import Path
+
+import numpy as np
+
+from price_store import (
+    STORE_DIR,
+    dates_to_days,
+    days_to_dates,
+    load_store,
+    read_manifest,
+    remove_stale_generations,
+    versioned_name,
+    write_manifest,
+)
+from returns import concat_columns
+from serializer import dumps
+
+INDEX_DIR = Path(__file__).parent.parent / ".cache" / "range_index"
+INDEX_VERSION = 1
+
+COUNTS_FILE = "counts.npy"
+CUMLOG_FILE = "cumlog.npy"
+MANIFEST_FILE = "manifest.json"
+
+# counts를 만들 때 한 번에 표시하는 자산 수 (임시 인덱스 배열 크기 제한)
+BUILD_BLOCK_ASSETS = 512
+
+
+def _write_array_atomic(path, array):
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "wb") as f:
+        np.save(f, array)
+    os.replace(tmp, path)
+
+
+def store_signature(store_dir=STORE_DIR):
+    """가격 저장소 버전 (manifest 세대 + 데이터 파일 크기/수정 시각), 저장소가 없으면 None"""
+    manifest = read_manifest(store_dir)
+    if not manifest:
+        return None
+    files = []
+    for name in sorted(manifest.get("files", {}).values()):
+        try:
+            st = os.stat(Path(store_dir) / name)
+        except FileNotFoundError:
+            return None
+        files.append([name, st.st_size, st.st_mtime_ns])
+    return {"generation": manifest.get("generation"), "files": files}
+
+
+def build_range_index(columns, index_dir=INDEX_DIR, store=None):
+    """{심볼: (days, close)} → 누적 로그 수익률 + 날짜 인덱스 저장
+
+    배열은 세대마다 새 이름으로 쓰고 manifest를 마지막에 바꾼다. 기존 파일을 덮어쓰지 않으므로
+    manifest 하나를 읽은 쪽은 그 manifest의 counts/cumlog 쌍만 본다 (직전 세대 파일도 한 번 더 남김).
+    store는 인덱스를 만든 가격 저장소의 store_signature() (RangeIndex.load_or_build가 비교).
+    """
+    index_dir = Path(index_dir)
+    index_dir.mkdir(parents=True, exist_ok=True)
+    previous = read_manifest(index_dir)
+    generation = previous.get("generation", 0) + 1
+    names = {name: versioned_name(name, generation) for name in (COUNTS_FILE, CUMLOG_FILE)}
+    symbols = list(columns)
+    lengths, ends, all_days, all_close = concat_columns(columns, symbols)
+    first = ends - lengths
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        logs = np.log(np.where(all_close > 0, all_close, np.nan))
+    cumlog = logs - np.repeat(logs[first[lengths > 0]], lengths[lengths > 0])
+
+    day0 = int(all_days.min()) if len(all_days) else 0
+    n_days = int(all_days.max()) - day0 + 1 if len(all_days) else 0
+
+    # 행 r = day0 + r - 1일까지의 bar 수: bar가 있는 (날짜, 자산) 칸에 1을 찍고 날짜 방향 누적합
+    tmp = index_dir / (names[COUNTS_FILE] + ".tmp")
+    counts = np.lib.format.open_memmap(tmp, mode="w+", dtype=np.int32, shape=(n_days + 1, len(symbols)))
+    for lo in range(0, len(symbols), BUILD_BLOCK_ASSETS):
+        hi = min(lo + BUILD_BLOCK_ASSETS, len(symbols))
+        bars = slice(first[lo], ends[hi - 1])
+        counts[all_days[bars] - day0 + 1, np.repeat(np.arange(lo, hi), lengths[lo:hi])] = 1
+    np.cumsum(counts, axis=0, out=counts)
+    counts.flush()
+    del counts
+    os.replace(tmp, index_dir / names[COUNTS_FILE])
+    _write_array_atomic(index_dir / names[CUMLOG_FILE], cumlog)
+
+    files = {"counts": names[COUNTS_FILE], "cumlog": names[CUMLOG_FILE]}
+    manifest = {
+        "version": INDEX_VERSION,
+        "generation": generation,
+        "store": store,
+        "day0": str(days_to_dates([day0])[0]),
+        "days": n_days,
+        "files": files,
+        "symbols": symbols,
+    }
+    write_manifest(index_dir, manifest)
+    remove_stale_generations(index_dir, (COUNTS_FILE, CUMLOG_FILE),
+                             {*files.values(), *previous.get("files", {}).values()})
+    print(f"  🧮 기간 질의 인덱스: {len(symbols)}개 자산 × {n_days}일 → {index_dir.name}/")
+    return index_dir
+
+
+def _to_days(values):
+    """날짜 하나 또는 목록 → 일수 배열 ('YYYY-MM-DD' / date / datetime)"""
+    if isinstance(values, (str, date)):
+        values = [values]
+    texts = [v.strftime("%Y-%m-%d") if isinstance(v, date) else v for v in values]
+    return dates_to_days(texts).astype(np.int64)
+
+
+class RangeIndex:
+    """누적 로그 수익률 인덱스 위의 기간 수익률 질의
+
+    index = RangeIndex.load_or_build()
+    index.returns("2025-01-01")                       # {심볼: 수익률(%) 또는 None}
+    index.query(starts, ends)                         # (질의 × 자산) float64, 계산할 수 없으면 NaN
+    """
+
+    def __init__(self, symbols, day0, counts, cumlog):
+        self.symbols = list(symbols)
+        self.day0 = int(day0)
+        self.counts = counts
+        self.cumlog = cumlog
+        lengths = np.asarray(counts[-1], dtype=np.int64) if len(counts) else np.zeros(len(self.symbols), np.int64)
+        self.offsets = np.cumsum(lengths) - lengths
+        self._columns = {symbol: i for i, symbol in enumerate(self.symbols)}
+
+    @classmethod
+    def load(cls, index_dir=INDEX_DIR, mmap=True):
+        """저장된 인덱스 열기 (없으면 FileNotFoundError)"""
+        index_dir = Path(index_dir)
+        with open(index_dir / MANIFEST_FILE, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+        if manifest.get("version") != INDEX_VERSION:
+            raise ValueError(f"지원하지 않는 인덱스 버전: {manifest.get('version')}")
+        mode = "r" if mmap and manifest["days"] else None
+        counts = np.load(index_dir / manifest["files"]["counts"], mmap_mode=mode)
+        cumlog = np.load(index_dir / manifest["files"]["cumlog"], mmap_mode=mode)
+        return cls(manifest["symbols"], dates_to_days(manifest["day0"]), counts, cumlog)
+
+    @classmethod
+    def load_or_build(cls, index_dir=INDEX_DIR, store_dir=STORE_DIR, rebuild=False):
+        """인덱스 열기 — 없거나 가격 저장소가 바뀌었으면 먼저 다시 만듦 (저장소도 없으면 FileNotFoundError)"""
+        store = store_signature(store_dir)
+        if rebuild or store is None or read_manifest(index_dir).get("store") != store:
+            columns = load_store(store_dir)
+            if columns:
+                build_range_index(columns, index_dir, store=store_signature(store_dir))
+            elif not (Path(index_dir) / MANIFEST_FILE).exists():
+                raise FileNotFoundError(f"가격 저장소가 비어 있음: {store_dir}")
+        return cls.load(index_dir)
+
+    @classmethod
+    def from_columns(cls, columns, index_dir=INDEX_DIR):
+        build_range_index(columns, index_dir)
+        return cls.load(index_dir)
+
+    def columns_for(self, symbols=None):
+        """심볼 목록 → 인덱스 열 번호 (없는 심볼은 KeyError)"""
+        if symbols is None:
+            return np.arange(len(self.symbols))
+        return np.array([self._columns[s] for s in symbols], dtype=np.int64)
+
+    def query(self, starts, ends=None, symbols=None):
+        """질의마다 [시작, 끝] 수익률(%) → (질의 × 자산) float64
+
+        ends가 없으면 마지막 날까지. 시작/끝은 같은 길이의 날짜 목록(또는 날짜 하나).
+        시작일 이후 끝일 이전에 bar가 없으면 NaN.
+        """
+        cols = self.columns_for(symbols)
+        n_rows = len(self.counts)
+        start_days = _to_days(starts)
+        end_days = _to_days(ends) if ends is not None else np.full(len(start_days), self.day0 + n_rows - 2)
+        if len(end_days) == 1 and len(start_days) > 1:
+            end_days = np.repeat(end_days, len(start_days))
+        if not n_rows or not len(cols):
+            return np.full((len(start_days), len(cols)), np.nan)
+
+        # 시작일 전날까지의 bar 수 = 시작 bar 순번, 끝일까지의 bar 수 - 1 = 끝 bar 순번
+        start_rows = np.clip(start_days - self.day0, 0, n_rows - 1)
+        end_rows = np.clip(end_days - self.day0 + 1, 0, n_rows - 1)
+        if symbols is None:
+            # 전체 자산이면 행 단위로 읽음 (2차원 fancy index보다 빠름)
+            start_ord = self.counts[start_rows]
+            end_ord = self.counts[end_rows].astype(np.int64) - 1
+        else:
+            start_ord = self.counts[start_rows[:, None], cols[None, :]]
+            end_ord = self.counts[end_rows[:, None], cols[None, :]].astype(np.int64) - 1
+
+        valid = (end_ord >= start_ord) & (end_days >= start_days)[:, None]
+        base = self.offsets[cols][None, :]
+        last = max(len(self.cumlog) - 1, 0)
+        diff = (self.cumlog[np.minimum(base + end_ord.clip(0), last)]
+                - self.cumlog[np.minimum(base + start_ord, last)])
+        with np.errstate(invalid="ignore", over="ignore"):
+            result = np.expm1(diff) * 100
+        result[~valid] = np.nan
+        return result
+
+    def returns(self, start, end=None, symbols=None):
+        """기간 하나 → {심볼: 수익률(%) 소수 2자리 또는 None}"""
+        cols = self.columns_for(symbols)
+        row = self.query([start], None if end is None else [end], symbols)[0]
+        return {
+            self.symbols[c]: (None if value != value else round(value, 2))
+            for c, value in zip(cols.tolist(), row.tolist())
+        }
+
+
+def read_queries(path):
+    """'시작,끝' 한 줄에 하나 (끝 생략 가능, #은 주석) → (시작 목록, 끝 목록)"""
+    starts, ends = [], []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.split("#", 1)[0].strip()
+            if not line:
+                continue
+            start, _, end = line.partition(",")
+            starts.append(start.strip())
+            ends.append(end.strip() or None)
+    return starts, ends
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="임의 기간 수익률 질의")
+    parser.add_argument("symbols", nargs="*", help="질의할 심볼 (생략하면 모든 자산)")
+    parser.add_argument("--start", "--since", dest="start", help="시작일 YYYY-MM-DD")
+    parser.add_argument("--end", help="끝일 YYYY-MM-DD (기본 마지막 날)")
+    parser.add_argument("--queries", type=Path, help="'시작,끝' 한 줄에 하나씩 적은 파일")
+    parser.add_argument("--json", action="store_true", help="JSON으로 출력")
+    parser.add_argument("--rebuild", action="store_true", help="가격 저장소로 인덱스를 다시 만들고 질의")
+    parser.add_argument("--index-dir", type=Path, default=INDEX_DIR, help="인덱스 위치")
+    args = parser.parse_args(argv)
+    if not args.start and not args.queries:
+        parser.error("--start 또는 --queries가 필요함")
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    try:
+        index = RangeIndex.load_or_build(args.index_dir, rebuild=args.rebuild)
+    except FileNotFoundError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+    symbols = args.symbols or None
+    try:
+        cols = index.columns_for(symbols)
+    except KeyError as e:
+        print(f"❌ 인덱스에 없는 심볼: {e.args[0]}")
+        sys.exit(1)
+    names = [index.symbols[c] for c in cols.tolist()]
+
+    if args.queries:
+        starts, ends = read_queries(args.queries)
+        last_day = str(days_to_dates([index.day0 + len(index.counts) - 2])[0])
+        ends = [end or last_day for end in ends]
+    else:
+        starts, ends = [args.start], [args.end] if args.end else None
+
+    t0 = time.perf_counter()
+    matrix = index.query(starts, ends, symbols)
+    elapsed = time.perf_counter() - t0
+
+    rows = [
+        {symbol: (None if v != v else round(v, 2)) for symbol, v in zip(names, row)}
+        for row in matrix.tolist()
+    ]
+    if args.json:
+        ends = ends or [None] * len(starts)
+        for start, end, row in zip(starts, ends, rows):
+            print(dumps({"start": start, "end": end, "returns": row}))
+    else:
+        for start, end, row in zip(starts, ends or [None] * len(starts), rows):
+            print(f"\n📊 {start} ~ {end or '마지막 날'}")
+            ranked = sorted(((s, v) for s, v in row.items() if v is not None), key=lambda x: x[1], reverse=True)
+            for symbol, value in ranked[:20]:
+                sign = "+" if value >= 0 else ""
+                print(f"  {symbol:8} {sign}{value}%")
+            if len(ranked) > 20:
+                print(f"  ... 외 {len(ranked) - 20}개")
+    rate = len(starts) / elapsed if elapsed > 0 else float("inf")
+    print(f"⚡ 질의 {len(starts):,}개 × 자산 {len(names):,}개: {elapsed * 1000:.1f}ms ({rate:,.0f}개/초)",
+          file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+요청 속도 제한 / 재시도 도우미
+- TokenBucket: 분당 요청 예산을 지키도록 요청 전에 토큰을 기다림 (스레드 안전)
+- backoff_delay: 지수 백오프 + full jitter
+"""
+
+import random
+import threading
+import time
+
+# 재시도할 HTTP 상태 (레이트 리밋 / 일시적 서버 오류)
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class TokenBucket:
+    """분당 rate_per_minute개까지 요청을 허용하는 토큰 버킷
+
+    capacity만큼은 한 번에 몰아서 쓸 수 있고, 그 뒤로는 일정한 속도로 토큰이 찬다.
+    acquire()는 토큰이 생길 때까지 호출한 스레드만 재우기 때문에
+    다른 소스의 수집 스레드는 그동안에도 계속 돈다.
+    """
+
+    def __init__(self, rate_per_minute, capacity=None):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = capacity or max(1, int(rate_per_minute))
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def acquire(self):
+        """토큰 하나를 쓸 때까지 대기, 기다린 시간(초)을 반환"""
+        waited = 0.0
+        while True:
+            with self.lock:
+                self._refill()
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return waited
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+            waited += wait
+
+    def drain(self):
+        """남은 토큰을 비움 (429를 받으면 서버 쪽 예산이 바닥났다고 보고 속도를 맞춤)"""
+        with self.lock:
+            self._refill()
+            self.tokens = 0.0
+
+
+def backoff_delay(attempt, base=1.0, cap=60.0, retry_after=None):
+    """attempt번째 재시도 전에 쉴 시간 (초)
+
+    지수 백오프 상한 안에서 무작위로 고르고(full jitter),
+    서버가 Retry-After를 주면 그보다 짧게 쉬지는 않는다.
+    """
+    delay = random.uniform(0, min(cap, base * (2 ** attempt)))
+    if retry_after is not None:
+        delay = max(delay, retry_after)
+    return delay
+
+
+def parse_retry_after(value):
+    """Retry-After 헤더(초 단위)를 float로, 없거나 날짜 형식이면 None"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        return None
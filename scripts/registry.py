@@ -0,0 +1,52 @@
+"""
+자산 레지스트리 (data/assets.csv)
+- 열: symbol, name, source, id, color, group
+- source: 수집 소스 유형 (etf = yfinance, crypto = CoinGecko)
+- id: 소스 쪽 식별자 (비어 있으면 symbol 그대로, CoinGecko는 코인 id)
+"""
+
+import csv
+from pathlib import Path
+
+REGISTRY_PATH = Path(__file__).parent.parent / "data" / "assets.csv"
+
+SOURCE_TYPES = ("etf", "crypto")
+REQUIRED_COLUMNS = ("symbol", "name", "source", "color")
+
+
+def load_registry(path=REGISTRY_PATH):
+    """레지스트리 CSV → {심볼: {"name", "type", "id", "color", "group"}} (파일 순서 유지)"""
+    assets = {}
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        reader = csv.DictReader(f)
+        missing = [c for c in REQUIRED_COLUMNS if c not in (reader.fieldnames or [])]
+        if missing:
+            raise ValueError(f"{path}: 필수 열 없음 ({', '.join(missing)})")
+
+        for line, row in enumerate(reader, start=2):
+            symbol = (row["symbol"] or "").strip()
+            if not symbol or symbol.startswith("#"):
+                continue
+            source = (row["source"] or "").strip()
+            if source not in SOURCE_TYPES:
+                raise ValueError(f"{path}:{line}: 알 수 없는 source '{source}'")
+            if symbol in assets:
+                raise ValueError(f"{path}:{line}: 중복 심볼 '{symbol}'")
+
+            assets[symbol] = {
+                "name": row["name"].strip(),
+                "type": source,
+                "id": (row.get("id") or "").strip() or symbol,
+                "color": row["color"].strip(),
+                "group": (row.get("group") or "").strip(),
+            }
+    return assets
+
+
+def chunked(items, size):
+    """리스트를 size개씩 나눠서 차례로 돌려줌 (size는 1 이상)"""
+    if size < 1:
+        raise ValueError(f"묶음 크기는 1 이상이어야 함: {size}")
+    items = list(items)
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
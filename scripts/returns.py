@@ -0,0 +1,143 @@
+"""
+벡터화된 기간 수익률 엔진
+- 모든 자산의 (days, close)를 한 배열로 이어 붙이고
+- (자산 번호, 날짜) 복합 키 위에서 searchsorted 한 번으로 모든 기간의 시작점을 찾음
+- calculate_performance와 같은 결과 (반올림, None 규칙 포함)
+"""
+
+import re
+from datetime import date, datetime, timedelta
+
+import numpy as np
+
+from price_store import dates_to_days
+
+# 자산 번호를 상위 비트에, 날짜를 하위 비트에 넣은 복합 키
+_DAY_BITS = 32
+_DAY_OFFSET = 1 << 31
+
+# get_date_ranges와 같은 환산 (1M=30일, 12M=365일)
+_UNIT_DAYS = {"D": 1, "W": 7, "M": 30, "Y": 365}
+
+
+def get_date_ranges():
+    """기간별 시작 날짜 계산"""
+    today = datetime.now()
+
+    return {
+        "1W": today - timedelta(days=7),
+        "1M": today - timedelta(days=30),
+        "3M": today - timedelta(days=90),
+        "12M": today - timedelta(days=365),
+        "YTD": datetime(today.year, 1, 1),
+    }
+
+
+def to_day(value):
+    """datetime / date / 'YYYY-MM-DD' → 1970-01-01 기준 일수
+
+    calculate_performance처럼 시각은 버리고 날짜만 쓴다.
+    """
+    if isinstance(value, (datetime, date)):
+        value = value.strftime("%Y-%m-%d")
+    return int(dates_to_days(value))
+
+
+def parse_window(spec, today=None):
+    """추가 기간 지정 파싱 → (기간명, 시작일)
+
+    '2Y', '5Y', '18M', '10D' 같은 상대 기간이나
+    'label=YYYY-MM-DD' 형태의 임의 시작일을 받는다.
+    """
+    today = today or datetime.now()
+    if "=" in spec:
+        label, start = spec.split("=", 1)
+        return label, datetime.strptime(start, "%Y-%m-%d")
+
+    match = re.fullmatch(r"(\d+)([DWMY])", spec.upper())
+    if not match:
+        raise ValueError(f"기간 형식 오류: {spec} (예: 2Y, 18M, since=2024-01-01)")
+    count, unit = int(match.group(1)), match.group(2)
+    return spec.upper(), today - timedelta(days=count * _UNIT_DAYS[unit])
+
+
+def composite_keys(asset_index, days):
+    """(자산 번호, 날짜) → 정렬 순서가 (자산, 날짜) 순서와 같은 int64 키"""
+    return (np.asarray(asset_index, dtype=np.int64) << _DAY_BITS) + (
+        np.asarray(days, dtype=np.int64) + _DAY_OFFSET
+    )
+
+
+def concat_columns(columns, symbols):
+    """자산별 (days, close)를 symbols 순서로 한 배열에 이어 붙이기
+
+    반환: (자산별 길이, 자산별 끝 위치(cumsum), 전체 days, 전체 close)
+    """
+    lengths = np.fromiter((len(columns[s][0]) for s in symbols), dtype=np.int64, count=len(symbols))
+    ends = np.cumsum(lengths)
+    if not len(symbols) or not ends[-1]:
+        return lengths, ends, np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float64)
+    all_days = np.concatenate([np.asarray(columns[s][0]) for s in symbols])
+    all_close = np.concatenate([np.asarray(columns[s][1], dtype=np.float64) for s in symbols])
+    return lengths, ends, all_days, all_close
+
+
+def window_starts(all_days, lengths, start_days):
+    """자산 × 기간마다 시작일 이후 첫 bar의 전체 배열 위치 (자산 × 기간 행렬)
+
+    (자산 번호, 날짜) 복합 키 위에서 searchsorted 한 번으로 찾는다.
+    시작일 이후 bar가 없으면 그 자산의 끝 위치가 나온다.
+    """
+    n_assets = len(lengths)
+    keys = composite_keys(np.repeat(np.arange(n_assets), lengths), all_days)
+    queries = composite_keys(np.arange(n_assets)[:, None], np.asarray(start_days, dtype=np.int64)[None, :])
+    return np.searchsorted(keys, queries, side="left")
+
+
+def return_matrix(columns, windows):
+    """모든 자산 × 모든 기간 수익률(%)을 한 번에 계산
+
+    columns: {심볼: (days, close)} — days는 오름차순
+    windows: {기간명: 시작일} — 시작일은 datetime / date / 'YYYY-MM-DD'
+    반환: (심볼 리스트, 기간명 리스트, float64 행렬) — 계산할 수 없는 칸은 NaN
+    """
+    symbols = list(columns)
+    periods = list(windows)
+    n_assets, n_windows = len(symbols), len(periods)
+    result = np.full((n_assets, n_windows), np.nan)
+    if not n_assets or not n_windows:
+        return symbols, periods, result
+
+    lengths, ends, all_days, all_close = concat_columns(columns, symbols)
+    if not ends[-1]:
+        return symbols, periods, result
+
+    start_days = np.array([to_day(windows[p]) for p in periods], dtype=np.int64)
+    idx = window_starts(all_days, lengths, start_days)
+
+    # 시작일 이후 bar가 그 자산 구간 안에 있어야 유효
+    valid = (idx < ends[:, None]) & (lengths[:, None] > 0)
+    start_price = all_close[np.minimum(idx, len(all_close) - 1)]
+    end_price = all_close[np.maximum(ends - 1, 0)][:, None]
+    valid &= start_price != 0
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        pct = (end_price - start_price) / start_price * 100
+    result[valid] = pct[valid]
+    return symbols, periods, result
+
+
+def performance_table(columns, windows):
+    """return_matrix 결과를 {심볼: {기간명: 수익률 또는 None}}으로 변환
+
+    반올림은 파이썬 round(x, 2)를 그대로 써서 calculate_performance와
+    소수점 결과가 똑같이 나오도록 한다.
+    """
+    symbols, periods, matrix = return_matrix(columns, windows)
+    table = {}
+    for symbol, row in zip(symbols, matrix.tolist()):
+        table[symbol] = {
+            period: (None if value != value else round(value, 2))
+            for period, value in zip(periods, row)
+        }
+    return table
@@ -0,0 +1,128 @@
+"""
+벡터화된 기간별 위험 지표
+- 연율화 변동성, 최대 낙폭(MDD), 샤프/소르티노 비율, 최고/최저 일간 수익률
+- return_matrix처럼 모든 자산의 종가를 한 배열로 이어 붙이고,
+  (자산, 기간) 구간마다 필요한 부분만 모아서 구간별 reduce로 한 번에 계산 (자산별 파이썬 루프 없음)
+- 기간은 시작일 이후 첫 bar부터 마지막 bar까지 (calculate_performance와 같은 시작점)
+- 무위험 수익률은 0으로 둔다
+"""
+
+import numpy as np
+
+from returns import concat_columns, to_day, window_starts
+
+# 소스 유형별 연간 bar 수 (연율화에 사용)
+PERIODS_PER_YEAR = {"etf": 252, "crypto": 365}
+DEFAULT_PERIODS_PER_YEAR = 252
+
+RISK_KEYS = ("volatility", "maxDrawdown", "sharpe", "sortino", "bestDay", "worstDay")
+
+
+def _segment_index(starts, lengths):
+    """구간 (시작, 길이)들을 이어 붙인 원소 인덱스와 구간 번호"""
+    total = int(lengths.sum())
+    seg = np.repeat(np.arange(len(lengths)), lengths)
+    offsets = np.cumsum(lengths) - lengths
+    index = np.repeat(starts, lengths) + (np.arange(total) - np.repeat(offsets, lengths))
+    return index, seg, offsets
+
+
+def risk_matrix(columns, windows, periods_per_year=None):
+    """모든 자산 × 모든 기간의 위험 지표
+
+    columns: {심볼: (days, close)} — days는 오름차순
+    windows: {기간명: 시작일}
+    periods_per_year: {심볼: 연간 bar 수} (없는 심볼은 DEFAULT_PERIODS_PER_YEAR)
+    반환: (심볼 리스트, 기간명 리스트, {지표: float64 (자산 × 기간) 행렬}) — 계산할 수 없는 칸은 NaN
+    """
+    symbols = list(columns)
+    periods = list(windows)
+    n_assets, n_windows = len(symbols), len(periods)
+    result = {key: np.full((n_assets, n_windows), np.nan) for key in RISK_KEYS}
+    if not n_assets or not n_windows:
+        return symbols, periods, result
+
+    lengths, ends, all_days, all_close = concat_columns(columns, symbols)
+    if not ends[-1]:
+        return symbols, periods, result
+
+    # (자산, 기간) 구간 = 기간 시작 bar부터 자산 끝까지, 행 우선으로 이어 붙임
+    start_days = np.array([to_day(windows[p]) for p in periods], dtype=np.int64)
+    seg_starts = window_starts(all_days, lengths, start_days).ravel()
+    seg_lengths = np.maximum(np.repeat(ends, n_windows) - seg_starts, 0)
+    index, seg, offsets = _segment_index(seg_starts, seg_lengths)
+    values = all_close[index]
+    n_segments = len(seg_lengths)
+
+    # 일간 수익률 (구간의 첫 원소는 이전 bar가 같은 구간이 아니라서 제외)
+    same = seg[1:] == seg[:-1]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        daily = values[1:] / values[:-1] - 1
+    ret_seg = seg[1:][same]
+    daily = daily[same]
+    n_ret = np.bincount(ret_seg, minlength=n_segments)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mean = np.bincount(ret_seg, weights=daily, minlength=n_segments) / n_ret
+        var = np.bincount(ret_seg, weights=(daily - mean[ret_seg]) ** 2, minlength=n_segments) / (n_ret - 1)
+        std = np.sqrt(var)
+        downside = np.sqrt(np.bincount(ret_seg, weights=np.minimum(daily, 0) ** 2, minlength=n_segments) / n_ret)
+
+        ppy = np.fromiter(
+            ((periods_per_year or {}).get(s, DEFAULT_PERIODS_PER_YEAR) for s in symbols),
+            dtype=np.float64, count=n_assets,
+        )
+        scale = np.sqrt(np.repeat(ppy, n_windows))
+
+        volatility = np.where(n_ret >= 2, std * scale * 100, np.nan)
+        sharpe = np.where((n_ret >= 2) & (std > 0), mean / std * scale, np.nan)
+        sortino = np.where((n_ret >= 2) & (downside > 0), mean / downside * scale, np.nan)
+
+    best = np.full(n_segments, np.nan)
+    worst = np.full(n_segments, np.nan)
+    has_ret = n_ret > 0
+    if has_ret.any():
+        ret_offsets = (np.cumsum(n_ret) - n_ret)[has_ret]
+        best[has_ret] = np.maximum.reduceat(daily, ret_offsets) * 100
+        worst[has_ret] = np.minimum.reduceat(daily, ret_offsets) * 100
+
+    # 구간별 누적 최고가: 뒤 구간일수록 전체 가격 범위보다 큰 값을 더해서
+    # 전체 배열 한 번의 maximum.accumulate가 구간마다 새로 시작하게 함
+    mdd = np.full(n_segments, np.nan)
+    has_bar = seg_lengths > 0
+    if has_bar.any():
+        span = float(values.max() - values.min()) + 1.0
+        lifted = values + seg * span
+        peak = np.maximum.accumulate(lifted) - seg * span
+        with np.errstate(divide="ignore", invalid="ignore"):
+            drawdown = np.minimum(values / peak - 1, 0)
+        mdd[has_bar] = np.minimum.reduceat(drawdown, offsets[has_bar]) * 100
+
+    for key, column in (
+        ("volatility", volatility),
+        ("maxDrawdown", mdd),
+        ("sharpe", sharpe),
+        ("sortino", sortino),
+        ("bestDay", best),
+        ("worstDay", worst),
+    ):
+        matrix = column.reshape(n_assets, n_windows)
+        result[key] = np.where(np.isfinite(matrix), matrix, np.nan)
+    return symbols, periods, result
+
+
+def risk_table(columns, windows, periods_per_year=None):
+    """risk_matrix 결과를 {심볼: {기간명: {지표: 값 또는 None}}}로 변환 (소수 2자리)"""
+    symbols, periods, matrices = risk_matrix(columns, windows, periods_per_year)
+    # +0.0으로 -0.0을 0.0으로 맞춤
+    rounded = {key: (np.round(matrix, 2) + 0.0).tolist() for key, matrix in matrices.items()}
+    table = {}
+    for a, symbol in enumerate(symbols):
+        table[symbol] = {
+            period: {
+                key: (None if rounded[key][a][w] != rounded[key][a][w] else rounded[key][a][w])
+                for key in RISK_KEYS
+            }
+            for w, period in enumerate(periods)
+        }
+    return table
@@ -0,0 +1,48 @@
+"""
+JSON 직렬화 백엔드
+- orjson이 설치되어 있으면 사용하고, 없으면 표준 json으로 대체
+- JSON_BACKEND=stdlib 환경 변수로 표준 json을 강제할 수 있음 (비교·디버깅용)
+- 출력은 항상 compact(",", ":") + 한글 그대로(UTF-8)라서 두 백엔드가 같은 바이트를 낸다
+  단, 1e-4보다 작거나 1e16 이상인 float은 표기가 다르다 (1e-05 / 0.00001).
+  가격과 수익률은 소수 2자리로 반올림한 값이라 이 범위에 들지 않는다.
+"""
+
+import json
+import os
+
+try:
+    if os.environ.get("JSON_BACKEND", "").lower() == "stdlib":
+        raise ImportError
+    import orjson
+except ImportError:
+    orjson = None
+
+BACKEND = "orjson" if orjson is not None else "stdlib"
+
+_SEPARATORS = (",", ":")
+
+
+def dumps_bytes(obj, sort_keys=False):
+    """obj → compact JSON (UTF-8 bytes)"""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_SORT_KEYS if sort_keys else 0)
+    return json.dumps(obj, ensure_ascii=False, separators=_SEPARATORS, sort_keys=sort_keys).encode("utf-8")
+
+
+def dumps(obj, sort_keys=False):
+    """obj → compact JSON 문자열"""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_SORT_KEYS if sort_keys else 0).decode("utf-8")
+    return json.dumps(obj, ensure_ascii=False, separators=_SEPARATORS, sort_keys=sort_keys)
+
+
+def loads(data):
+    """JSON 문자열/바이트 → 객체"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def load(f):
+    """열린 파일 전체 → 객체"""
+    return loads(f.read())
@@ -0,0 +1,419 @@
+#!/usr/bin/env python3
+"""
+로컬 JSON API 서버
+- performance.json 한 버전을 Snapshot으로 메모리에 올림: 자산별 가격 배열 + 기간별 리베이스 시리즈와
+  메타/성과를 미리 직렬화한 JSON 조각 → 요청은 조각을 이어 붙이기만 하고 다시 계산하지 않음
+- 응답은 본문 해시 ETag + 미리 gzip한 본문과 함께 Snapshot 안에 캐시 (필터 없는 응답은 불러올 때 미리 만듦)
+  If-None-Match가 같으면 304, Accept-Encoding에 gzip이 있으면 압축 본문을 그대로 보냄
+- performance.json이 바뀌면(원자적 교체) 새 Snapshot을 다 만든 뒤 참조 하나만 바꿔서 교체
+  요청은 시작할 때 잡은 Snapshot으로 끝까지 응답하므로 중간 상태를 보지 않는다
+
+엔드포인트 (symbols=SPY,QQQ 로 자산 필터, 생략하면 전체):
+  GET /api/health
+  GET /api/assets?symbols=                    이름/색/기간별 성과/위험 지표
+  GET /api/performance?period=YTD&symbols=    기간 수익률 (period 생략 시 모든 기간)
+  GET /api/series?period=1M&symbols=          기간 시작일 대비 수익률 시리즈 (차트와 같은 공유 축/다운샘플링)
+  GET /api/prices?symbols=&start=&end=        종가 (start/end: YYYY-MM-DD)
+
+사용법:
+  python scripts/server.py --port 8000
+"""
+
+import argparse
+import gzip
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlsplit
+
+import numpy as np
+
+from downsample import POINT_BUDGET, point_budget, shared_slots
+from generate_html import DATA_PATH, iter_asset_columns, period_axes, rebased_assets
+from price_store import dates_to_days, days_to_dates
+from returns import get_date_ranges
+from serializer import dumps_bytes
+from streaming import read_last_updated
+
+HOST = "127.0.0.1"
+PORT = 8000
+
+# performance.json 변경을 확인하는 간격(초)
+RELOAD_INTERVAL = 2.0
+
+# Snapshot마다 들고 있는 필터된 응답 수와 본문(+gzip) 바이트 한도 (필터 없는 응답은 항상 유지)
+# /api/prices는 임의 start/end마다 키가 달라서 개수만으로는 메모리가 묶이지 않음
+MAX_CACHED_RESPONSES = 1024
+MAX_CACHED_BYTES = 64 * 1024 * 1024
+
+# 이보다 작은 본문은 압축하지 않음
+GZIP_MIN_BYTES = 256
+GZIP_LEVEL = 6
+
+
+class ApiError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+class Response:
+    """한 번 만들어 두고 그대로 보내는 응답 (본문, ETag, gzip 본문)"""
+
+    __slots__ = ("status", "body", "etag", "gzip_body", "size")
+
+    def __init__(self, body, status=HTTPStatus.OK):
+        self.status = status
+        self.body = body
+        self.etag = '"' + hashlib.sha256(body).hexdigest()[:20] + '"'
+        self.gzip_body = gzip.compress(body, GZIP_LEVEL, mtime=0) if len(body) >= GZIP_MIN_BYTES else None
+        self.size = len(body) + len(self.gzip_body or b"")
+
+
+def file_signature(path):
+    """파일이 바뀌었는지 판단하는 값 (원자적 교체면 inode가 바뀜)"""
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return st.st_ino, st.st_mtime_ns, st.st_size
+
+
+def _object(fragments):
+    """(키, JSON 조각 bytes) 목록 → JSON 객체 bytes"""
+    return b"{" + b",".join(dumps_bytes(key) + b":" + value for key, value in fragments) + b"}"
+
+
+class Snapshot:
+    """performance.json 한 버전의 메모리 상태 (만든 뒤에는 바꾸지 않고 통째로 교체)"""
+
+    def __init__(self, data_path=DATA_PATH, max_points=POINT_BUDGET):
+        self.signature = file_signature(data_path)
+        self.last_updated = read_last_updated(data_path)
+        self.loaded_at = datetime.now().isoformat(timespec="seconds")
+        date_ranges = get_date_ranges()
+        self.periods = list(date_ranges)
+
+        self.symbols = []
+        self.prices = {}
+        self.meta = {}
+        self.performance = {period: {} for period in self.periods}
+        self.series = {period: {} for period in self.periods}
+        for symbol, asset, days, close in iter_asset_columns(data_path):
+            self.symbols.append(symbol)
+            self.prices[symbol] = (np.asarray(days, dtype=np.int64), np.asarray(close, dtype=np.float64))
+            self.meta[symbol] = dumps_bytes({key: value for key, value in asset.items() if key != "prices"})
+            for period in self.periods:
+                self.performance[period][symbol] = dumps_bytes(asset.get("performance", {}).get(period))
+
+        # 리베이스 시리즈는 차트처럼 기간 공유 축에 맞춤 (자산마다 첫 bar 이전 칸은 뺌)
+        axis = np.unique(np.concatenate([days for days, _ in self.prices.values()] or [np.empty(0, np.int64)]))
+        start_days, axes = period_axes(axis, date_ranges)
+        slot_dates = {
+            period: days_to_dates(period_axis[shared_slots(len(period_axis), max_points)])
+            for period, period_axis in axes.items()
+        }
+        assets = ((symbol, None, days, close) for symbol, (days, close) in self.prices.items())
+        for symbol, _, series in rebased_assets(assets, start_days, axes, max_points):
+            for period, values in series.items():
+                first = int(np.argmax(np.isfinite(values)))
+                self.series[period][symbol] = dumps_bytes({
+                    "dates": slot_dates[period][first:].tolist(),
+                    "values": values[first:].tolist(),
+                })
+        self._order = {symbol: i for i, symbol in enumerate(self.symbols)}
+        self._head = b'{"lastUpdated":' + dumps_bytes(self.last_updated)
+
+        self._lock = threading.Lock()
+        self._cache = OrderedDict()
+        self._cache_bytes = 0
+        # 필터 없는 응답은 미리 만들어서 캐시 한도와 상관없이 유지
+        self._fixed = {}
+        for key in [("/api/health",), ("/api/assets", None), ("/api/performance", None, None)]:
+            self._fixed[key] = self._build(key)
+        for period in self.periods:
+            for path in ("/api/performance", "/api/series"):
+                self._fixed[(path, period, None)] = self._build((path, period, None))
+
+    # ---- 요청 해석 ----
+
+    def _symbols(self, query):
+        """symbols=SPY,QQQ → 레지스트리 순서의 튜플 (생략하면 None = 전체)"""
+        raw = [s.strip() for value in query.get("symbols", []) for s in value.split(",") if s.strip()]
+        if not raw:
+            return None
+        unknown = [s for s in raw if s not in self._order]
+        if unknown:
+            raise ApiError(HTTPStatus.NOT_FOUND, f"알 수 없는 심볼: {', '.join(unknown)}")
+        return tuple(sorted(set(raw), key=self._order.__getitem__))
+
+    def _period(self, query, required):
+        period = (query.get("period") or [None])[0]
+        if period is None:
+            if required:
+                raise ApiError(HTTPStatus.BAD_REQUEST, f"period가 필요함 ({', '.join(self.periods)})")
+            return None
+        if period not in self.periods:
+            raise ApiError(HTTPStatus.BAD_REQUEST, f"알 수 없는 기간: {period} ({', '.join(self.periods)})")
+        return period
+
+    def _date(self, query, name):
+        value = (query.get(name) or [None])[0]
+        if value is None:
+            return None
+        try:
+            return int(dates_to_days(value))
+        except ValueError:
+            raise ApiError(HTTPStatus.BAD_REQUEST, f"날짜 형식 오류: {name}={value} (YYYY-MM-DD)") from None
+
+    def cache_key(self, path, query):
+        """요청 → 정규화한 캐시 키 (순서/중복이 다른 같은 요청은 같은 키)"""
+        if path == "/api/health":
+            return (path,)
+        if path == "/api/assets":
+            return (path, self._symbols(query))
+        if path == "/api/performance":
+            return (path, self._period(query, required=False), self._symbols(query))
+        if path == "/api/series":
+            return (path, self._period(query, required=True), self._symbols(query))
+        if path == "/api/prices":
+            return (path, self._symbols(query), self._date(query, "start"), self._date(query, "end"))
+        raise ApiError(HTTPStatus.NOT_FOUND, f"없는 경로: {path}")
+
+    def response(self, path, query):
+        """요청에 맞는 Response (캐시에 있으면 그대로)"""
+        key = self.cache_key(path, query)
+        fixed = self._fixed.get(key)
+        if fixed is not None:
+            return fixed
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached is not None:
+                self._cache.move_to_end(key)
+                return cached
+        built = self._build(key)
+        if built.size > MAX_CACHED_BYTES:
+            return built
+        with self._lock:
+            previous = self._cache.pop(key, None)
+            if previous is not None:
+                self._cache_bytes -= previous.size
+            self._cache[key] = built
+            self._cache_bytes += built.size
+            while len(self._cache) > MAX_CACHED_RESPONSES or self._cache_bytes > MAX_CACHED_BYTES:
+                self._cache_bytes -= self._cache.popitem(last=False)[1].size
+        return built
+
+    # ---- 응답 조립 (미리 직렬화한 조각을 이어 붙이기만 함) ----
+
+    def _build(self, key):
+        path = key[0]
+        if path == "/api/health":
+            return Response(dumps_bytes({
+                "lastUpdated": self.last_updated,
+                "loadedAt": self.loaded_at,
+                "assets": len(self.symbols),
+                "periods": self.periods,
+            }))
+        if path == "/api/assets":
+            symbols = key[1] or self.symbols
+            return Response(self._head + b',"assets":' + _object((s, self.meta[s]) for s in symbols) + b"}")
+        if path == "/api/performance":
+            period, symbols = key[1], key[2] or self.symbols
+            if period is None:
+                body = _object(
+                    (s, _object((p, self.performance[p][s]) for p in self.periods)) for s in symbols
+                )
+                return Response(self._head + b',"performance":' + body + b"}")
+            body = _object((s, self.performance[period][s]) for s in symbols)
+            return Response(self._head + b',"period":' + dumps_bytes(period) + b',"performance":' + body + b"}")
+        if path == "/api/series":
+            period, symbols = key[1], key[2] or self.symbols
+            series = self.series[period]
+            body = _object((s, series[s]) for s in symbols if s in series)
+            return Response(self._head + b',"period":' + dumps_bytes(period) + b',"series":' + body + b"}")
+        if path == "/api/prices":
+            symbols, start, end = key[1] or self.symbols, key[2], key[3]
+            fragments = []
+            for symbol in symbols:
+                days, close = self.prices[symbol]
+                lo = 0 if start is None else int(np.searchsorted(days, start, side="left"))
+                hi = len(days) if end is None else int(np.searchsorted(days, end, side="right"))
+                fragments.append((symbol, dumps_bytes({
+                    "dates": days_to_dates(days[lo:hi]).tolist(),
+                    "close": close[lo:hi].tolist(),
+                })))
+            return Response(self._head + b',"prices":' + _object(fragments) + b"}")
+        raise ApiError(HTTPStatus.NOT_FOUND, f"없는 경로: {path}")
+
+
+def _quality(params):
+    """';q=0.5' 같은 파라미터 → q 값 (없으면 1, 형식이 틀리면 None)"""
+    for param in params.split(";"):
+        name, _, value = param.strip().partition("=")
+        if name.strip().lower() == "q":
+            try:
+                return float(value)
+            except ValueError:
+                return None
+    return 1.0
+
+
+def accepts_gzip(header):
+    """Accept-Encoding에 gzip(q > 0)이 있는지
+
+    gzip을 직접 적었으면 그 q를, 없으면 *의 q를 따른다. q 형식이 틀린 항목은 무시한다.
+    """
+    wildcard = None
+    for part in (header or "").split(","):
+        name, _, params = part.strip().partition(";")
+        name = name.strip().lower()
+        if name not in ("gzip", "*"):
+            continue
+        q = _quality(params)
+        if q is None:
+            continue
+        if name == "gzip":
+            return q > 0
+        wildcard = q
+    return wildcard is not None and wildcard > 0
+
+
+def etag_matches(header, etag):
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    return any(tag.strip().removeprefix("W/") == etag for tag in header.split(","))
+
+
+class ApiHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server_version = "performance-chart"
+    # 헤더와 본문을 따로 쓰므로 Nagle을 끄지 않으면 keep-alive 응답마다 지연 ACK(~40ms)를 기다림
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        self._serve(send_body=True)
+
+    def do_HEAD(self):
+        self._serve(send_body=False)
+
+    def _serve(self, send_body):
+        # 요청 하나는 시작할 때 잡은 Snapshot으로만 응답 (중간에 교체돼도 섞이지 않음)
+        snapshot = self.server.snapshot
+        url = urlsplit(self.path)
+        try:
+            response = snapshot.response(url.path.rstrip("/") or "/", parse_qs(url.query))
+        except ApiError as e:
+            response = Response(dumps_bytes({"error": str(e)}), status=e.status)
+
+        headers = {
+            "Content-Type": "application/json; charset=utf-8",
+            "ETag": response.etag,
+            "Cache-Control": "no-cache",
+            "Vary": "Accept-Encoding",
+            "Access-Control-Allow-Origin": "*",
+        }
+        if response.status == HTTPStatus.OK and etag_matches(self.headers.get("If-None-Match"), response.etag):
+            self.send_response(HTTPStatus.NOT_MODIFIED)
+            for name, value in headers.items():
+                if name != "Content-Type":
+                    self.send_header(name, value)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
+        body = response.body
+        if response.gzip_body is not None and accepts_gzip(self.headers.get("Accept-Encoding")):
+            body = response.gzip_body
+            headers["Content-Encoding"] = "gzip"
+        self.send_response(response.status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if send_body:
+            self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+
+class ApiServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, data_path=DATA_PATH, max_points=POINT_BUDGET, verbose=False):
+        self.data_path = data_path
+        self.max_points = max_points
+        self.verbose = verbose
+        self.snapshot = Snapshot(data_path, max_points)
+        super().__init__(address, ApiHandler)
+
+    def reload_if_changed(self):
+        """performance.json이 바뀌었으면 새 Snapshot을 만들어 교체 → 교체했는지 여부
+
+        만드는 중에 실패하면 (쓰는 중이거나 깨진 파일) 기존 Snapshot을 그대로 둔다.
+        """
+        signature = file_signature(self.data_path)
+        if signature is None or signature == self.snapshot.signature:
+            return False
+        try:
+            snapshot = Snapshot(self.data_path, self.max_points)
+        except (OSError, ValueError, KeyError) as e:
+            print(f"⚠️ 다시 불러오기 실패, 이전 데이터로 계속: {e}")
+            return False
+        self.snapshot = snapshot
+        print(f"🔄 다시 불러옴: {snapshot.last_updated} ({len(snapshot.symbols)}개 자산)")
+        return True
+
+    def watch(self, interval=RELOAD_INTERVAL):
+        """interval초마다 변경 확인하는 데몬 스레드 시작"""
+        def loop():
+            while True:
+                time.sleep(interval)
+                self.reload_if_changed()
+        thread = threading.Thread(target=loop, name="reload", daemon=True)
+        thread.start()
+        return thread
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="로컬 JSON API 서버")
+    parser.add_argument("--host", default=HOST, help=f"바인드 주소 (기본 {HOST})")
+    parser.add_argument("--port", type=int, default=PORT, help=f"포트 (기본 {PORT})")
+    parser.add_argument("--data", type=Path, default=DATA_PATH, help="performance.json 경로")
+    parser.add_argument("--max-points", type=point_budget, default=POINT_BUDGET,
+                        help=f"시리즈당 최대 점 수, 0이면 다운샘플링 안 함, 그 외엔 6 이상 (기본 {POINT_BUDGET})")
+    parser.add_argument("--reload-interval", type=float, default=RELOAD_INTERVAL,
+                        help=f"performance.json 변경 확인 간격(초), 0이면 확인 안 함 (기본 {RELOAD_INTERVAL:g})")
+    parser.add_argument("--verbose", action="store_true", help="요청마다 로그 출력")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    t0 = time.perf_counter()
+    server = ApiServer((args.host, args.port), args.data, args.max_points, args.verbose)
+    snapshot = server.snapshot
+    print(f"📦 {snapshot.last_updated} · {len(snapshot.symbols)}개 자산 불러옴 ({time.perf_counter() - t0:.2f}초)")
+    if args.reload_interval > 0:
+        server.watch(args.reload_interval)
+    print(f"🌐 http://{args.host}:{server.server_address[1]}/api/health")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
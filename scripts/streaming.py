@@ -0,0 +1,145 @@
+"""
+스트리밍 입출력 도우미
+- json_object_stream: 자산 하나씩 JSON 객체 항목을 이어 쓰는 제너레이터 기반 writer
+- 값은 serializer(orjson 또는 표준 json)로 compact하게 직렬화
+- performance.json은 자산 하나가 한 줄인 레이아웃으로 써서 한 줄씩 다시 읽을 수 있게 함
+  가격을 저장소에서 읽을 때는 줄에서 prices 배열을 잘라낸 나머지만 파싱 (bar 단위 객체를 만들지 않음)
+- peak_rss_mb: 프로세스 최대 RSS
+"""
+
+import os
+import re
+import resource
+import sys
+from contextlib import contextmanager
+from pathlib import Path
+
+from serializer import dumps, load, loads
+
+
+def _entry_writer(out, compact):
+    """send((key, value))로 받은 항목을 열린 파일 out에 바로 쓰는 제너레이터"""
+    item_sep, key_sep = (",", ":") if compact else (",\n", ": ")
+    first = True
+    while True:
+        key, value = yield
+        out.write(("" if first else item_sep) + dumps(key) + key_sep)
+        out.write(dumps(value))
+        first = False
+
+
+@contextmanager
+def object_entries(out, compact=False):
+    """이미 열린 파일에 JSON 객체 항목을 하나씩 이어 쓰기 (앞뒤 괄호는 호출하는 쪽에서)
+
+    with object_entries(out) as write:
+        write(key, value)
+    """
+    writer = _entry_writer(out, compact)
+    next(writer)
+    try:
+        yield lambda key, value: writer.send((key, value))
+    finally:
+        writer.close()
+
+
+@contextmanager
+def json_object_stream(path, head="{\n", tail="\n}", compact=False):
+    """항목을 하나씩 써 나가는 JSON 객체 파일
+
+    임시 파일에 쓰다가 블록을 정상적으로 빠져나가면 path로 교체하고,
+    예외가 나면 임시 파일을 지워서 기존 파일은 그대로 둔다.
+    """
+    path = Path(path)
+    tmp = path.with_name(path.name + ".tmp")
+    try:
+        with open(tmp, "w", encoding="utf-8") as out:
+            out.write(head)
+            with object_entries(out, compact) as write:
+                yield write
+            out.write(tail)
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
+    os.replace(tmp, path)
+
+
+# ============================================
+# performance.json (자산 하나가 한 줄)
+# ============================================
+
+def performance_head(last_updated):
+    return '{"lastUpdated": ' + dumps(last_updated) + ', "assets": {\n'
+
+
+PERFORMANCE_TAIL = "\n}}\n"
+
+
+def performance_stream(path, last_updated):
+    """performance.json을 자산 하나씩 쓰는 writer (json_object_stream 참고)"""
+    return json_object_stream(path, performance_head(last_updated), PERFORMANCE_TAIL)
+
+
+def read_last_updated(path):
+    """performance.json의 lastUpdated만 읽기 (한 줄 레이아웃이면 첫 줄만 파싱)"""
+    with open(path, "r", encoding="utf-8") as f:
+        first = f.readline()
+        if first.rstrip().endswith('"assets": {'):
+            return loads(first.rstrip()[:-len(', "assets": {')] + "}")["lastUpdated"]
+        f.seek(0)
+        return load(f)["lastUpdated"]
+
+
+def iter_performance_assets(path):
+    """performance.json의 (심볼, 자산) 항목을 하나씩 읽기
+
+    스트리밍 레이아웃이면 한 줄씩 파싱해서 전체 파일을 메모리에 올리지 않고,
+    예전 한 줄짜리 파일이면 통째로 읽어서 돌려준다.
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        first = f.readline()
+        if not first.rstrip().endswith('"assets": {'):
+            f.seek(0)
+            yield from load(f)["assets"].items()
+            return
+
+        for line in f:
+            line = line.strip()
+            if not line or line == "}}":
+                continue
+            item = loads("{" + line.rstrip(",") + "}")
+            yield from item.items()
+
+
+# 자산 줄의 "prices": [...] 항목과 그 앞(첫 항목이면 뒤) 쉼표 (가격 객체 안에는 ]가 없음)
+_PRICES = re.compile(r',\s*"prices":\s*\[[^\]]*\]|"prices":\s*\[[^\]]*\]\s*,?\s*')
+
+
+def iter_performance_meta(path):
+    """performance.json의 (심볼, prices를 뺀 자산)을 하나씩 읽기
+
+    가격은 파싱하지 않는다 (price_store에서 days/close로 읽는 경우).
+    예전 한 줄짜리 파일이면 통째로 읽고 prices만 뺀다.
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        first = f.readline()
+        if not first.rstrip().endswith('"assets": {'):
+            f.seek(0)
+            for symbol, asset in load(f)["assets"].items():
+                asset.pop("prices", None)
+                yield symbol, asset
+            return
+
+        for line in f:
+            line = line.strip()
+            if not line or line == "}}":
+                continue
+            item = loads("{" + _PRICES.sub("", line.rstrip(","), count=1) + "}")
+            yield from item.items()
+
+
+def peak_rss_mb():
+    """이 프로세스의 최대 RSS (MB)"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux는 KB, macOS는 바이트 단위
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
@@ -0,0 +1,62 @@
+"""배당/분할로 수정 종가가 다시 계산됐을 때 증분 수집이 전체 재수집으로 바뀌는지"""
+
+import sys
+from argparse import Namespace
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "scripts"))
+
+import fetch_data
+from price_store import dates_to_days, days_to_dates, restated
+
+DATES = [f"2026-01-{d:02d}" for d in range(5, 17)]
+
+
+def to_prices(dates, closes):
+    return [{"date": date, "price": price} for date, price in zip(dates, closes)]
+
+
+def stored_columns(closes):
+    return dates_to_days(DATES), np.asarray(closes, dtype=np.float64)
+
+
+def test_restated_ignores_rounding_and_last_bar():
+    stored = stored_columns([100.0] * len(DATES))
+    overlap = slice(-5, None)
+    fetched = dates_to_days(DATES[overlap]), np.array([100.01, 100.0, 99.99, 100.0, 103.5])
+    assert not restated(stored, fetched)
+
+
+def test_restated_detects_adjusted_history():
+    stored = stored_columns([100.0] * len(DATES))
+    fetched = dates_to_days(DATES[-5:] + ["2026-01-17"]), np.array([98.0] * 6)
+    assert restated(stored, fetched)
+
+
+def test_process_chunk_refetches_full_history(monkeypatch):
+    # 저장본은 배당 전 기준(100), 새로 받은 겹치는 구간은 배당 후 기준(98)
+    stored = {"SPY": stored_columns([100.0] * len(DATES))}
+    new_dates = DATES[-5:] + ["2026-01-17"]
+    full = to_prices(DATES + ["2026-01-17"], [98.0] * (len(DATES) + 1))
+    calls = []
+    
+    def fake_fetch_sources(plans, registry=None, batch_size=None, max_workers=None):
+        calls.append(plans)
+        if len(calls) == 1:
+            return {"SPY": to_prices(new_dates, [98.0] * len(new_dates))}
+        return {"SPY": full}
+    
+    monkeypatch.setattr(fetch_data, "fetch_sources", fake_fetch_sources)
+    registry = {"SPY": {"type": "etf"}}
+    args = Namespace(offline=False, full_refresh=False, batch_size=1, workers=1)
+    date_ranges = {"1W": "2026-01-10"}
+    
+    [(symbol, days, close, _, _)] = fetch_data.process_chunk(
+        ["SPY"], registry, stored, date_ranges, None, args
+    )
+    
+    assert calls[1] == {"etf": {fetch_data.HISTORY_DAYS: ["SPY"]}}
+    assert days_to_dates(days).tolist() == DATES + ["2026-01-17"]
+    assert np.all(close == 98.0)